@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
@@ -24,6 +26,39 @@ class Settings(BaseSettings):
     poster_api_url: str = "https://joinposter.com/api"
     poster_access_token: str = ""
     poster_poll_interval_ms: int = 30000
+    # Poster requests in flight per poll cycle
+    poster_poll_concurrency: int = 20
+
+    # Search-time budget for constrained plan optimization (0 = run to optimality)
+    plan_search_deadline_ms: int = 200
+    # Where engine calls run: process pool, thread pool or inline on the event loop
+    engine_executor: Literal["inline", "thread", "process"] = "process"
+    engine_workers: int = 0  # 0 = one per CPU
+    engine_max_pending: int = 32  # queued + running jobs before requests get 503
+    # Per-worker LRU of engine results keyed by catalog version and user profile
+    plan_cache_max_entries: int = 1024  # 0 = disabled
+    plan_cache_ttl_s: float = 300.0
+    # Approximate daily plans: targets snap to a (calories, protein, carbs, fat) grid
+    # whose cells share a per-slot shortlist of the best candidates
+    plan_approximate: bool = False
+    plan_approximate_grid: tuple[float, float, float, float] = (50.0, 5.0, 10.0, 5.0)
+    plan_approximate_shortlist: int = 256
+    # Log per-phase engine timings and send them in an X-Engine-Stats response header
+    engine_debug_stats: bool = False
+    # How long a worker reuses the global per-gram prices (0 = reload every request)
+    pricing_settings_ttl_s: float = 30.0
+    # Token bucket of this many cost units per minute per user (per IP when anonymous);
+    # "redis" shares buckets across workers. Costs apply by longest matching path prefix
+    rate_limit_backend: Literal["memory", "redis"] = "memory"
+    rate_limit_per_minute: int = 100
+    rate_limit_route_costs: dict[str, float] = {"/api/v1/matching/": 5.0}
+    # Messages buffered per SSE connection, and what happens when a slow one fills up
+    sse_queue_size: int = 16
+    sse_overflow_policy: Literal["drop_oldest", "coalesce", "disconnect"] = "coalesce"
+    # Idle SSE connections get a ping at least this often (one shared ticker per worker)
+    sse_heartbeat_s: float = 30.0
+    # Events kept per order channel for Last-Event-ID resume (0 = no replay)
+    sse_replay_size: int = 16
 
     api_port: int = 8000
     api_host: str = "0.0.0.0"
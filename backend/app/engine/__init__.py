@@ -1,18 +1,23 @@
+from app.engine.approximate import build_shortlist, plan_from_shortlist
+from app.engine.catalog import MealCatalog
 from app.engine.constants import (
     DEFAULT_SCORING_WEIGHTS,
     DEFAULT_SLOT_PERCENTAGES,
     DEFAULT_TOLERANCE,
 )
 from app.engine.daily_planner import generate_daily_plan
+from app.engine.daily_total import find_daily_total_plan
 from app.engine.filters import (
     filter_by_allergens,
     filter_by_category,
     filter_by_dietary_tags,
     filter_meals,
 )
+from app.engine.multi_day_assignment import assign_multi_day_plan
 from app.engine.multi_day_generator import generate_multi_day_plan
 from app.engine.optimizer import find_optimal_plan
 from app.engine.per_meal_matcher import match_meals
+from app.engine.plan_context import PreparedPlanContext
 from app.engine.scoring import calculate_deviation, calculate_score
 from app.engine.slot_allocator import allocate_slots
 from app.engine.variant_generator import generate_plan_variants
@@ -21,16 +26,22 @@ __all__ = [
     "DEFAULT_SCORING_WEIGHTS",
     "DEFAULT_SLOT_PERCENTAGES",
     "DEFAULT_TOLERANCE",
+    "MealCatalog",
+    "PreparedPlanContext",
     "allocate_slots",
+    "assign_multi_day_plan",
+    "build_shortlist",
     "calculate_deviation",
     "calculate_score",
     "filter_by_allergens",
     "filter_by_category",
     "filter_by_dietary_tags",
     "filter_meals",
+    "find_daily_total_plan",
     "find_optimal_plan",
     "generate_daily_plan",
     "generate_multi_day_plan",
     "generate_plan_variants",
     "match_meals",
+    "plan_from_shortlist",
 ]
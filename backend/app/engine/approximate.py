@@ -0,0 +1,197 @@
+"""Approximate daily plans from shortlists shared by nearby macro targets.
+
+User targets cluster tightly (2000 vs 2010 kcal). `build_shortlist` snaps a request's
+daily targets to a TargetGrid cell and keeps only the `size` best candidates per slot
+for that cell; `plan_from_shortlist` then re-scores just those against a user's exact
+targets. One shortlist serves every user in the cell, in time independent of the
+catalog size.
+
+The loss against exact planning is bounded. Moving a macro's target from t1 to t2
+changes any meal's score for that macro by at most 2 * ln(t2 / t1), so no meal left
+out of a slot's shortlist can score more than the slot's cutoff plus the weighted sum
+of those shifts. When the chosen meals don't clear that bound, the plan comes back
+with optimal=False and the bound on the lost average score as its gap_bound.
+"""
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.types import (
+    EngineStats,
+    MacroTargets,
+    Meal,
+    PlanRequest,
+    PlanResult,
+    ScoringWeights,
+    SearchBudget,
+    TargetGrid,
+)
+
+DEFAULT_SHORTLIST_SIZE = 256
+
+
+@dataclass(frozen=True)
+class PlanShortlist:
+    """Best candidates per slot for one grid cell of daily targets."""
+
+    request: PlanRequest  # the request with its daily targets snapped to the cell
+    catalog: MealCatalog  # every slot's shortlisted meals
+    slot_targets: tuple[MacroTargets, ...]  # snapped targets, per allocation
+    # Per allocation: snapped-target score of the best meal left out (-inf: none was)
+    cutoffs: tuple[float, ...]
+
+
+def snap_targets(targets: MacroTargets, grid: TargetGrid) -> MacroTargets:
+    """Centre of the grid cell holding `targets`."""
+    return MacroTargets(
+        calories=_snap(targets.calories, grid.calories),
+        protein=_snap(targets.protein, grid.protein),
+        carbs=_snap(targets.carbs, grid.carbs),
+        fat=_snap(targets.fat, grid.fat),
+    )
+
+
+def _snap(value: float, cell: float) -> float:
+    if cell <= 0:
+        return value
+    return math.floor(value / cell + 0.5) * cell
+
+
+def score_shift_bound(
+    a: MacroTargets, b: MacroTargets, weights: ScoringWeights = DEFAULT_SCORING_WEIGHTS
+) -> float:
+    """Upper bound on |calculate_score(m, a) - calculate_score(m, b)| over every meal m."""
+    shifts = [
+        _macro_shift_bound(x, y)
+        for x, y in (
+            (a.calories, b.calories),
+            (a.protein, b.protein),
+            (a.carbs, b.carbs),
+            (a.fat, b.fat),
+        )
+    ]
+    total_weight = weights.calories + weights.protein + weights.carbs + weights.fat
+    if total_weight == 0:
+        return sum(shifts) / 4
+    cal, pro, carb, fat = shifts
+    return (
+        cal * weights.calories
+        + pro * weights.protein
+        + carb * weights.carbs
+        + fat * weights.fat
+    ) / total_weight
+
+
+def _macro_shift_bound(t1: float, t2: float) -> float:
+    # A macro scores actual/t below t and 2 - actual/t up to 2t: |d/dt| <= 2/t
+    lo, hi = min(t1, t2), max(t1, t2)
+    if lo == hi:
+        return 0.0
+    if lo <= 0:
+        return 1.0  # scoring is discontinuous at a zero target
+    return min(1.0, 2 * math.log(hi / lo))
+
+
+def _require_separable(request: PlanRequest) -> None:
+    constrained = request.constraints is not None and not request.constraints.is_empty
+    if constrained or request.objective != "per_slot":
+        raise ValueError(
+            "Approximate planning requires the per_slot objective without constraints"
+        )
+
+
+def _canonical(request: PlanRequest) -> PlanRequest:
+    """`request` with allergies and preferences sorted and deduplicated, as profile_key
+    keys them (filtering does not depend on their order), and empty constraints as none."""
+    return replace(
+        request,
+        allergies=sorted(set(request.allergies)),
+        dietary_preferences=sorted(set(request.dietary_preferences)),
+        constraints=(
+            None
+            if request.constraints is not None and request.constraints.is_empty
+            else request.constraints
+        ),
+    )
+
+
+def build_shortlist(
+    meals: Sequence[Meal] | MealCatalog,
+    request: PlanRequest,
+    grid: TargetGrid = TargetGrid(),
+    size: int = DEFAULT_SHORTLIST_SIZE,
+) -> PlanShortlist:
+    """Shortlist of the `size` best candidates per slot for `request`'s grid cell.
+
+    Raises:
+        ValueError: If `size` < 1, or the request has constraints or a daily_total
+            objective (the loss bound only holds for independent slots).
+    """
+    if size < 1:
+        raise ValueError("Shortlist size must be at least 1")
+    _require_separable(request)
+
+    snapped = _canonical(
+        replace(request, daily_targets=snap_targets(request.daily_targets, grid))
+    )
+    context = PreparedPlanContext(meals, snapped)
+    shortlisted: dict[str, Meal] = {}
+    cutoffs: list[float] = []
+    for catalog, scores, order in context.ranked_by_slot:
+        for meal in catalog.take(order[:size]):
+            shortlisted[meal.id] = meal
+        cutoffs.append(float(scores[order[size]]) if len(order) > size else -math.inf)
+
+    return PlanShortlist(
+        request=snapped,
+        catalog=MealCatalog(shortlisted.values()),
+        slot_targets=tuple(a.targets for a in context.slot_allocations),
+        cutoffs=tuple(cutoffs),
+    )
+
+
+def plan_from_shortlist(
+    shortlist: PlanShortlist,
+    request: PlanRequest,
+    budget: SearchBudget | None = None,
+    stats: EngineStats | None = None,
+) -> PlanResult | None:
+    """Best plan for `request`'s exact targets among the shortlisted candidates.
+
+    `request` must equal the shortlist's request apart from its daily targets (and the
+    order or repetition of its allergies and preferences). The
+    result is optimal=True when it provably matches exact planning; otherwise its
+    gap_bound bounds how much higher the exact plan's total_score can be.
+
+    Raises:
+        ValueError: If `request` differs from the shortlist's in anything but targets.
+    """
+    if _canonical(replace(request, daily_targets=shortlist.request.daily_targets)) != (
+        shortlist.request
+    ):
+        raise ValueError("Request differs from the shortlist's beyond its daily targets")
+
+    context = PreparedPlanContext(shortlist.catalog, request, stats)
+    result = context.plan(stats=stats, budget=budget)
+    if result is None:
+        return None
+
+    weights = context.weights
+    losses = [
+        max(0.0, cutoff + score_shift_bound(snapped, allocation.targets, weights) - item.score)
+        for cutoff, snapped, allocation, item in zip(
+            shortlist.cutoffs,
+            shortlist.slot_targets,
+            context.slot_allocations,
+            result.items,
+            strict=True,
+        )
+    ]
+    gap = sum(losses) / len(losses)
+    if gap > 0:
+        return replace(result, optimal=False, gap_bound=gap)
+    return result
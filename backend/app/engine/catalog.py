@@ -0,0 +1,187 @@
+"""Columnar meal catalog: struct-of-arrays view over engine meals."""
+
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.types import Meal
+
+CATEGORY_ORDER: tuple[str, ...] = ("breakfast", "lunch", "dinner", "snack")
+
+RowIndex = NDArray[np.intp]
+
+
+def _category_sort_key(category: str) -> tuple[int, str]:
+    if category in CATEGORY_ORDER:
+        return CATEGORY_ORDER.index(category), ""
+    return len(CATEGORY_ORDER), category
+
+
+class MealCatalog:
+    """Immutable, columnar meal catalog shared by all engine entry points.
+
+    Rows are sorted by (category, id): each category occupies one contiguous row range,
+    and row order inside a category is the deterministic id tiebreak order. Macros live
+    in contiguous float64 columns; allergens and dietary tags are integer bitmask columns
+    (see ALLERGEN_BITS / DIETARY_TAG_BITS) so filters are array operations instead of
+    per-meal list scans.
+
+    Build once per catalog load (e.g. from the active DB rows) and reuse across requests.
+    """
+
+    __slots__ = (
+        "_category_ranges",
+        "_row_by_id",
+        "_value_columns",
+        "allergen_masks",
+        "calories",
+        "carbs",
+        "categories",
+        "category_codes",
+        "eligibility_cache",
+        "fat",
+        "id_rank",
+        "ids",
+        "meals",
+        "protein",
+        "tag_masks",
+    )
+
+    def __init__(self, meals: Iterable[Meal]) -> None:
+        ordered = sorted(meals, key=lambda m: (_category_sort_key(m.category), m.id))
+        n = len(ordered)
+
+        self.meals: tuple[Meal, ...] = tuple(ordered)
+        self.ids: tuple[str, ...] = tuple(m.id for m in ordered)
+
+        # Global id order, used to break score ties across categories
+        id_order = sorted(range(n), key=self.ids.__getitem__)
+        self.id_rank: NDArray[np.int64] = np.empty(n, dtype=np.int64)
+        self.id_rank[id_order] = np.arange(n, dtype=np.int64)
+
+        self.categories: tuple[str, ...] = tuple(
+            sorted({m.category for m in ordered}, key=_category_sort_key)
+        )
+        code_of = {c: i for i, c in enumerate(self.categories)}
+        self.category_codes: NDArray[np.int16] = np.fromiter(
+            (code_of[m.category] for m in ordered), dtype=np.int16, count=n
+        )
+        self._index_categories()
+
+        infos = [m.nutritional_info for m in ordered]
+        self.calories: NDArray[np.float64] = np.fromiter(
+            (i.calories for i in infos), dtype=np.float64, count=n
+        )
+        self.protein: NDArray[np.float64] = np.fromiter(
+            (i.protein for i in infos), dtype=np.float64, count=n
+        )
+        self.carbs: NDArray[np.float64] = np.fromiter(
+            (i.carbs for i in infos), dtype=np.float64, count=n
+        )
+        self.fat: NDArray[np.float64] = np.fromiter(
+            (i.fat for i in infos), dtype=np.float64, count=n
+        )
+
+        self.allergen_masks: NDArray[np.uint16] = np.fromiter(
+            (m.allergen_mask for m in ordered), dtype=np.uint16, count=n
+        )
+        self.tag_masks: NDArray[np.uint16] = np.fromiter(
+            (m.dietary_tag_mask for m in ordered), dtype=np.uint16, count=n
+        )
+
+        self._init_caches()
+
+    def _init_caches(self) -> None:
+        self._row_by_id: dict[str, int] | None = None
+        # Membership columns for values outside the closed allergen/tag sets
+        self._value_columns: dict[tuple[str, str], NDArray[np.bool_]] = {}
+        # Eligibility masks keyed by canonical (allergies, preferences); see filters
+        self.eligibility_cache: dict[object, NDArray[np.bool_]] = {}
+
+    def _index_categories(self) -> None:
+        self._category_ranges: dict[str, tuple[int, int]] = {}
+        for code, category in enumerate(self.categories):
+            start = int(np.searchsorted(self.category_codes, code, side="left"))
+            end = int(np.searchsorted(self.category_codes, code, side="right"))
+            self._category_ranges[category] = (start, end)
+
+    def _index_ids(self) -> dict[str, int]:
+        # Built lazily: per-slot subsets are scored and ranked but rarely looked up by id
+        if self._row_by_id is None:
+            self._row_by_id = {}
+            for row, meal_id in enumerate(self.ids):
+                self._row_by_id.setdefault(meal_id, row)
+        return self._row_by_id
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+    def category_range(self, category: str) -> tuple[int, int]:
+        """Half-open [start, end) row range of a category; (0, 0) when absent."""
+        return self._category_ranges.get(category, (0, 0))
+
+    def rows_for_category(self, category: str) -> RowIndex:
+        start, end = self.category_range(category)
+        return np.arange(start, end, dtype=np.intp)
+
+    def all_rows(self) -> RowIndex:
+        return np.arange(len(self.meals), dtype=np.intp)
+
+    def row_of(self, meal_id: str) -> int | None:
+        return self._index_ids().get(meal_id)
+
+    def rows_of(self, meal_ids: Iterable[str]) -> RowIndex:
+        """Rows of the given ids that exist in this catalog (unknown ids are ignored)."""
+        row_by_id = self._index_ids()
+        rows = [row_by_id[i] for i in meal_ids if i in row_by_id]
+        return np.asarray(sorted(rows), dtype=np.intp)
+
+    def exclusion_mask(self, meal_ids: Iterable[str]) -> NDArray[np.bool_]:
+        """Boolean mask that is False for every row whose id is in `meal_ids`."""
+        mask = np.ones(len(self.meals), dtype=np.bool_)
+        mask[self.rows_of(meal_ids)] = False
+        return mask
+
+    def value_column(self, field_name: str, value: str) -> NDArray[np.bool_]:
+        """Membership column for an allergen/tag value that has no bit assigned (cached)."""
+        key = (field_name, value)
+        column = self._value_columns.get(key)
+        if column is None:
+            column = np.fromiter(
+                (value in getattr(m, field_name) for m in self.meals),
+                dtype=np.bool_,
+                count=len(self.meals),
+            )
+            self._value_columns[key] = column
+        return column
+
+    def take(self, rows: Iterable[int]) -> list[Meal]:
+        meals = self.meals
+        return [meals[r] for r in rows]
+
+    def subset(self, rows: RowIndex) -> "MealCatalog":
+        """New catalog holding only `rows`, sliced from the columns without re-sorting."""
+        rows = np.sort(np.asarray(rows, dtype=np.intp))
+        sub = MealCatalog.__new__(MealCatalog)
+        sub.meals = tuple(self.take(rows))
+        sub.ids = tuple(m.id for m in sub.meals)
+        sub.id_rank = self.id_rank[rows]
+        sub.categories = self.categories
+        sub.category_codes = self.category_codes[rows]
+        sub.calories = self.calories[rows]
+        sub.protein = self.protein[rows]
+        sub.carbs = self.carbs[rows]
+        sub.fat = self.fat[rows]
+        sub.allergen_masks = self.allergen_masks[rows]
+        sub.tag_masks = self.tag_masks[rows]
+        sub._index_categories()
+        sub._init_caches()
+        return sub
+
+
+def as_catalog(meals: Sequence[Meal] | MealCatalog) -> MealCatalog:
+    """Accept either a prebuilt catalog or a plain meal list."""
+    if isinstance(meals, MealCatalog):
+        return meals
+    return MealCatalog(meals)
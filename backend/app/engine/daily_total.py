@@ -0,0 +1,466 @@
+"""Daily-total objective: best meal combination by the day's summed macros.
+
+The score of a plan is calculate_score(sum of its meals' macros, daily targets), which
+does not split into per-slot terms. Meet-in-the-middle: the slots are split into two
+halves (breakfast+lunch and dinner+snack for the default slots), every combination of
+each half is summed, and the search runs over (left, right) pairs of half-combinations
+instead of all n^4 plans:
+
+1. Combinations with identical macro sums are collapsed (the lowest-id one is kept).
+2. Incumbent: each left sum is paired with the right sums nearest in calories (binary
+   search on the calorie-sorted right side).
+3. score = 1 - sum(w_m * min(|total_m - target_m| / target_m, 1)) / W, so the macro
+   bounding boxes of two groups of sums give an upper bound on every pair between them.
+   Both sides are organised as k-d trees and descended together level by level; node
+   pairs whose bound cannot reach the incumbent are dropped, and the surviving leaf
+   pairs are scored exactly in bound order while the incumbent improves.
+
+Both bounds and exact scores honour the calorie window of PlanConstraints. The result is
+exact; ties are broken by meal ids in slot order.
+
+Step 3 is a k-d tree rather than a merge of two calorie-sorted sides: with a single
+sort key only calories can be bounded, while the score depends on all four macros, so
+a sorted-side merge cannot prune exactly.
+
+Each half is materialised in memory, so a half may hold at most MAX_SIDE_COMBINATIONS
+combinations. Larger pools are cut to their best-ranked meals per slot (by the slot
+score) before enumerating, and the plan is then marked optimal=False with the loose
+gap_bound 1 - total_score.
+"""
+
+import math
+import time
+from collections.abc import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.catalog import MealCatalog, RowIndex
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS
+from app.engine.optimizer import RankedSlot
+from app.engine.scoring import score_columns
+from app.engine.types import (
+    MacroTargets,
+    OptimalPlan,
+    OptimalPlanItem,
+    PlanConstraints,
+    ScoringWeights,
+    SearchBudget,
+    SearchStats,
+    SlotAllocation,
+)
+
+# Macro sums per k-d leaf (each leaf pair scores at most LEAF_SIZE^2 combinations)
+LEAF_SIZE = 4
+# Combination pairs scored per vectorized batch
+PAIR_BATCH = 1 << 20
+# Right-side neighbours (by calories) paired with each left sum for the incumbent
+INCUMBENT_NEIGHBOURS = 2
+# Combinations enumerated per half (four float64 sums plus one row index per slot each)
+MAX_SIDE_COMBINATIONS = 1 << 20
+# Slack on bound comparisons: survivors are re-scored exactly, so keeping more is safe
+_BOUND_SLACK = 1e-9
+
+
+def _macro_matrix(catalog: MealCatalog) -> NDArray[np.float64]:
+    return np.stack((catalog.calories, catalog.protein, catalog.carbs, catalog.fat))
+
+
+class _Side:
+    """Every combination of one meal per slot for a group of slots, with macro sums.
+
+    Combinations are enumerated in lexicographic row order, so combination index order
+    is the (slot-ordered) meal id order used as the tiebreak. Sums are accumulated left
+    to right, in the same order as summing the plan's nutritional info.
+    """
+
+    __slots__ = ("catalogs", "rows", "sums")
+
+    def __init__(self, catalogs: Sequence[MealCatalog], slot_rows: Sequence[RowIndex]) -> None:
+        self.catalogs = list(catalogs)
+        total = int(np.prod([len(r) for r in slot_rows])) if slot_rows else 1
+        # rows[s][i] = catalog row of slot s in combination i
+        self.rows: list[RowIndex] = []
+        repeat = total
+        for rows in slot_rows:
+            repeat //= len(rows)
+            self.rows.append(np.tile(np.repeat(rows, repeat), total // (len(rows) * repeat)))
+        self.sums = np.zeros((4, total), dtype=np.float64)
+        for catalog, rows in zip(self.catalogs, self.rows, strict=True):
+            self.sums += _macro_matrix(catalog)[:, rows]
+
+    def __len__(self) -> int:
+        return self.sums.shape[1]
+
+    def distinct(self) -> RowIndex:
+        """Lowest combination index of every distinct macro sum."""
+        order = np.lexsort(self.sums[::-1])  # stable: equal sums keep index order
+        ordered = self.sums[:, order]
+        new = np.ones(len(order), dtype=np.bool_)
+        new[1:] = np.any(ordered[:, 1:] != ordered[:, :-1], axis=0)
+        return np.sort(order[new])
+
+    def add_to(self, totals: NDArray[np.float64], index: NDArray[np.intp]) -> None:
+        """Add the meals of combinations `index` to `totals` (4, k), slot by slot."""
+        for catalog, rows in zip(self.catalogs, self.rows, strict=True):
+            totals += _macro_matrix(catalog)[:, rows[index]]
+
+
+class _KdTree:
+    """Implicit k-d tree over a set of macro sums, with per-node bounding boxes.
+
+    Level d has 2^d equal-size nodes laid out contiguously in `order`, so the children
+    of node (d, j) are (d + 1, 2j) and (d + 1, 2j + 1). `order` is padded to a multiple
+    of the leaf count by repeating member 0, which only re-scores one pair. Each node is
+    split at its median along the macro with the widest spread in score units (divided
+    by target / weight), so boxes are compact in exactly the metric the bound uses.
+    """
+
+    __slots__ = ("depth", "hi", "leaf_size", "lo", "order")
+
+    def __init__(self, sums: NDArray[np.float64], scale: NDArray[np.float64]) -> None:
+        n = sums.shape[1]
+        self.depth = max(0, int(np.ceil(np.log2(max(n, 1) / LEAF_SIZE))))
+        leaves = 1 << self.depth
+        self.leaf_size = -(-n // leaves)
+        order = np.zeros(self.leaf_size * leaves, dtype=np.intp)
+        order[:n] = np.arange(n, dtype=np.intp)
+
+        scaled = sums * scale[:, None]
+        for level in range(self.depth):
+            block = order.reshape(1 << level, -1)
+            values = scaled[:, block]
+            # A strided sample is enough to pick the split axis of large nodes
+            sample = values[:, :, :: max(1, block.shape[1] // 64)]
+            spread = _reduce_last(np.maximum, sample) - _reduce_last(np.minimum, sample)
+            axis = np.argmax(spread, axis=0)
+            key = np.take_along_axis(values, axis[None, :, None], axis=0)[0]
+            # Median split per node: O(n) per level
+            halves = np.argpartition(key, block.shape[1] // 2, axis=1)
+            order = np.take_along_axis(block, halves, axis=1).ravel()
+        self.order = order
+
+        # Boxes bottom-up: leaves from their members, parents from their two children
+        leaves_view = sums[:, order].reshape(4, leaves, self.leaf_size)
+        self.lo = [_reduce_last(np.minimum, leaves_view).T]
+        self.hi = [_reduce_last(np.maximum, leaves_view).T]
+        for _ in range(self.depth):
+            self.lo.insert(0, np.minimum(self.lo[0][0::2], self.lo[0][1::2]))
+            self.hi.insert(0, np.maximum(self.hi[0][0::2], self.hi[0][1::2]))
+
+
+def _reduce_last(ufunc: np.ufunc, values: NDArray[np.float64]) -> NDArray[np.float64]:
+    """ufunc.reduce over the last axis; short axes are folded column by column, which
+    is much faster than NumPy's per-element reduction loop for them."""
+    if values.shape[-1] > 512:
+        return ufunc.reduce(values, axis=-1)
+    result = values[..., 0].copy()
+    for i in range(1, values.shape[-1]):
+        ufunc(result, values[..., i], out=result)
+    return result
+
+
+def find_daily_total_plan(
+    slot_allocations: list[SlotAllocation],
+    ranked_by_slot: list[RankedSlot],
+    daily_targets: MacroTargets,
+    weights: ScoringWeights = DEFAULT_SCORING_WEIGHTS,
+    constraints: PlanConstraints | None = None,
+    stats: SearchStats | None = None,
+    budget: SearchBudget | None = None,
+) -> OptimalPlan | None:
+    """Plan maximizing the score of the summed daily macros (meet-in-the-middle).
+
+    Item scores stay the per-slot scores; total_score is the daily-total score. Building
+    both halves costs O(n^2 log n) for four slots of n meals; the pair search only scores
+    the leaf pairs its bound cannot rule out. Pass `stats` to collect the number of
+    scored (expanded) and skipped (pruned) half-combination pairs.
+
+    `budget` limits the pair search: the deadline is checked before the tree builds, at
+    every tree level and scoring batch, and max_nodes counts scored pairs. Enumerating
+    the halves and the incumbent always run. When the budget runs out the incumbent is
+    returned with optimal=False and the best bound among the unexplored pairs as
+    gap_bound.
+
+    Returns None when a slot has no candidates or no combination fits the calorie window.
+    """
+    if not slot_allocations or any(len(order) == 0 for _, _, order in ranked_by_slot):
+        return None
+
+    max_pairs = math.inf
+    deadline = math.inf
+    if budget is not None:
+        if budget.max_nodes is not None:
+            max_pairs = budget.max_nodes
+        if budget.deadline_ms is not None:
+            deadline = time.perf_counter() + budget.deadline_ms / 1000
+
+    catalogs = [catalog for catalog, _, _ in ranked_by_slot]
+    orders = [order for _, _, order in ranked_by_slot]
+    split = len(orders) // 2
+    keep = _pool_limit(orders[:split]) + _pool_limit(orders[split:])
+    truncated = any(k < len(order) for k, order in zip(keep, orders, strict=True))
+    slot_rows = [np.sort(order[:k]) for order, k in zip(orders, keep, strict=True)]
+    left = _Side(catalogs[:split], slot_rows[:split])
+    right = _Side(catalogs[split:], slot_rows[split:])
+
+    search = _PairSearch(left, right, daily_targets, weights, constraints)
+    search.find_incumbent()
+    search.exhaust(deadline, max_pairs)
+
+    if stats is not None:
+        stats.nodes_expanded += search.scored
+        stats.nodes_pruned += len(left) * len(right) - search.scored
+
+    if search.best_left < 0:
+        return None
+
+    chosen_rows = [
+        int(rows[index])
+        for side, index in ((left, search.best_left), (right, search.best_right))
+        for rows in side.rows
+    ]
+    items = [
+        OptimalPlanItem(slot=allocation.slot, meal=catalog.meals[row], score=float(scores[row]))
+        for allocation, (catalog, scores, _), row in zip(
+            slot_allocations, ranked_by_slot, chosen_rows, strict=True
+        )
+    ]
+    gap_bound = 0.0
+    if search.open_bound < math.inf:
+        gap_bound = max(0.0, 1.0 - search.open_bound / search.total_weight - search.best_score)
+    if truncated:
+        # Meals outside the bounded pools were never looked at; no score exceeds 1
+        gap_bound = max(gap_bound, 1.0 - search.best_score)
+    return OptimalPlan(
+        items=items,
+        total_score=search.best_score,
+        optimal=gap_bound == 0.0,
+        gap_bound=gap_bound,
+    )
+
+
+def _pool_limit(orders: Sequence[RowIndex]) -> list[int]:
+    """Meals to keep per slot (best-ranked first) so a half stays within
+    MAX_SIDE_COMBINATIONS: every pool is cut to the largest common size that fits."""
+    sizes = [len(order) for order in orders]
+    if math.prod(sizes) <= MAX_SIDE_COMBINATIONS:
+        return sizes
+    lo, hi = 1, max(sizes)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if math.prod(min(size, mid) for size in sizes) <= MAX_SIDE_COMBINATIONS:
+            lo = mid
+        else:
+            hi = mid - 1
+    return [min(size, lo) for size in sizes]
+
+
+class _PairSearch:
+    """Incumbent + leaf-pair branch-and-bound over (left, right) combination pairs."""
+
+    def __init__(
+        self,
+        left: _Side,
+        right: _Side,
+        targets: MacroTargets,
+        weights: ScoringWeights,
+        constraints: PlanConstraints | None,
+    ) -> None:
+        self.left = left
+        self.right = right
+        self.targets = targets
+        self.weights = weights
+        self.left_distinct = left.distinct()
+        self.right_distinct = right.distinct()
+
+        self.target_vector = np.array(
+            [targets.calories, targets.protein, targets.carbs, targets.fat]
+        )
+        weight_vector = np.array([weights.calories, weights.protein, weights.carbs, weights.fat])
+        if weight_vector.sum() == 0:
+            # calculate_score averages the macro scores when every weight is zero
+            weight_vector = np.ones(4)
+        self.weight_vector = weight_vector
+        self.total_weight = float(weight_vector.sum())
+
+        self.min_calories = -np.inf
+        self.max_calories = np.inf
+        if constraints is not None:
+            if constraints.min_calories is not None:
+                self.min_calories = constraints.min_calories
+            if constraints.max_calories is not None:
+                self.max_calories = constraints.max_calories
+
+        self.best_score = -1.0
+        self.best_left = -1
+        self.best_right = -1
+        self.scored = 0
+        # Lowest bound among leaf pairs left unscored when a budget stopped the search
+        self.open_bound = math.inf
+
+    def _deviation_limit(self) -> float:
+        """Largest weighted deviation sum a pair may have and still tie the incumbent."""
+        if self.best_left < 0:
+            return np.inf
+        return (1.0 - self.best_score) * self.total_weight + _BOUND_SLACK
+
+    def _score_pairs(
+        self, left_index: NDArray[np.intp], right_index: NDArray[np.intp]
+    ) -> None:
+        """Exactly score the given pairs and keep the best (score desc, left, right)."""
+        if len(left_index) == 0:
+            return
+        totals = self.left.sums[:, left_index].copy()
+        self.right.add_to(totals, right_index)
+        self.scored += len(left_index)
+
+        feasible = (totals[0] >= self.min_calories) & (totals[0] <= self.max_calories)
+        if not feasible.all():
+            left_index, right_index = left_index[feasible], right_index[feasible]
+            totals = totals[:, feasible]
+            if len(left_index) == 0:
+                return
+
+        scores, _ = score_columns(totals, self.targets, self.weights)
+        top = scores.max()
+        if top < self.best_score:
+            return
+        tied = np.flatnonzero(scores == top)
+        first = tied[np.lexsort((right_index[tied], left_index[tied]))[0]]
+        candidate = (float(top), -int(left_index[first]), -int(right_index[first]))
+        if candidate > (self.best_score, -self.best_left, -self.best_right):
+            self.best_score = float(top)
+            self.best_left = int(left_index[first])
+            self.best_right = int(right_index[first])
+
+    def find_incumbent(self) -> None:
+        """Score each distinct left sum against its calorie-nearest right sums."""
+        right_calories = self.right.sums[0, self.right_distinct]
+        by_calories = np.argsort(right_calories, kind="stable")
+        left_index = self.left_distinct
+        left_calories = self.left.sums[0, left_index]
+        wanted = np.clip(
+            self.targets.calories - left_calories,
+            self.min_calories - left_calories,
+            self.max_calories - left_calories,
+        )
+        positions = np.searchsorted(right_calories[by_calories], wanted)
+        for offset in range(-INCUMBENT_NEIGHBOURS, INCUMBENT_NEIGHBOURS):
+            picked = np.clip(positions + offset, 0, len(by_calories) - 1)
+            self._score_pairs(left_index, self.right_distinct[by_calories[picked]])
+
+    def _scale(self) -> NDArray[np.float64]:
+        """Score units per gram/kcal of each macro (0 for unweighted macros)."""
+        targets = np.where(self.target_vector > 0, self.target_vector, 1.0)
+        return self.weight_vector / targets
+
+    def _pair_bounds(
+        self,
+        left: _KdTree,
+        right: _KdTree,
+        level: tuple[int, int],
+        li: NDArray[np.intp],
+        ri: NDArray[np.intp],
+    ) -> NDArray[np.float64]:
+        """Lower bound of the weighted deviation sum over each (left, right) node pair."""
+        lo = left.lo[level[0]][li] + right.lo[level[1]][ri]
+        hi = left.hi[level[0]][li] + right.hi[level[1]][ri]
+        # Node pairs that cannot reach the calorie window are out entirely; the rest can
+        # only reach the part of their calorie range inside it
+        outside = (hi[:, 0] < self.min_calories) | (lo[:, 0] > self.max_calories)
+        np.maximum(lo[:, 0], self.min_calories, out=lo[:, 0])
+        np.minimum(hi[:, 0], self.max_calories, out=hi[:, 0])
+
+        targets = self.target_vector
+        gap = np.maximum(0.0, np.maximum(lo - targets, targets - hi))
+        positive = targets > 0
+        deviation = np.where(positive, gap / np.where(positive, targets, 1.0), gap > 0)
+        bound = np.minimum(deviation, 1.0) @ self.weight_vector
+        bound[outside] = np.inf
+        return bound
+
+    def exhaust(self, deadline: float = math.inf, max_pairs: float = math.inf) -> None:
+        """Score every combination pair the tree bounds cannot rule out.
+
+        Both trees are descended together, one level per step, keeping only node pairs
+        whose bound can still tie the incumbent; surviving leaf pairs are then scored
+        best bound first, re-checking the bound as the incumbent improves. The budget
+        is checked before building the trees, between descent levels and between
+        scoring batches.
+        """
+        if time.perf_counter() >= deadline:
+            self.open_bound = 0.0  # nothing explored beyond the incumbent
+            return
+
+        scale = self._scale()
+        left_members = self.left_distinct
+        right_members = self.right_distinct
+        left = _KdTree(self.left.sums[:, left_members], scale)
+        right = _KdTree(self.right.sums[:, right_members], scale)
+
+        pair_left = np.zeros(1, dtype=np.intp)
+        pair_right = np.zeros(1, dtype=np.intp)
+        bounds = self._pair_bounds(left, right, (0, 0), pair_left, pair_right)
+        for step in range(1, max(left.depth, right.depth) + 1):
+            if time.perf_counter() >= deadline:
+                if len(bounds):
+                    self.open_bound = float(bounds.min())
+                return
+            level = (min(step, left.depth), min(step, right.depth))
+            kept_left: list[NDArray[np.intp]] = []
+            kept_right: list[NDArray[np.intp]] = []
+            kept_bound: list[NDArray[np.float64]] = []
+            for li, ri in _children(pair_left, pair_right, level[0] == step, level[1] == step):
+                bound = self._pair_bounds(left, right, level, li, ri)
+                keep = bound <= self._deviation_limit()
+                kept_left.append(li[keep])
+                kept_right.append(ri[keep])
+                kept_bound.append(bound[keep])
+            pair_left = np.concatenate(kept_left)
+            pair_right = np.concatenate(kept_right)
+            bounds = np.concatenate(kept_bound)
+
+        by_bound = np.argsort(bounds, kind="stable")
+        pair_left, pair_right, bounds = pair_left[by_bound], pair_right[by_bound], bounds[by_bound]
+        cost = np.arange(1, len(bounds) + 1) * (left.leaf_size * right.leaf_size)
+        position = 0
+        while position < len(bounds) and bounds[position] <= self._deviation_limit():
+            if self.scored >= max_pairs or time.perf_counter() >= deadline:
+                self.open_bound = float(bounds[position])
+                return
+            # Leaf pairs (best bound first) until the batch holds PAIR_BATCH combinations
+            done = cost[position - 1] if position else 0
+            batch_pairs = min(PAIR_BATCH, max_pairs - self.scored)
+            end = max(position + 1, int(np.searchsorted(cost, done + batch_pairs, side="right")))
+            batch = slice(position, end)
+            live = bounds[batch] <= self._deviation_limit()
+            a, b = _leaf_pair_members(left, right, pair_left[batch][live], pair_right[batch][live])
+            self._score_pairs(left_members[a], right_members[b])
+            position = end
+
+
+def _children(
+    pair_left: NDArray[np.intp],
+    pair_right: NDArray[np.intp],
+    split_left: bool,
+    split_right: bool,
+) -> list[tuple[NDArray[np.intp], NDArray[np.intp]]]:
+    """Child node pairs one level down, grouped by which child of each side they take."""
+    left_children = (2 * pair_left, 2 * pair_left + 1) if split_left else (pair_left,)
+    right_children = (2 * pair_right, 2 * pair_right + 1) if split_right else (pair_right,)
+    return [(li, ri) for li in left_children for ri in right_children]
+
+
+def _leaf_pair_members(
+    left: _KdTree,
+    right: _KdTree,
+    left_leaves: NDArray[np.intp],
+    right_leaves: NDArray[np.intp],
+) -> tuple[NDArray[np.intp], NDArray[np.intp]]:
+    """Every (left member, right member) pair of the given leaf pairs, flattened."""
+    left_block = left.order.reshape(-1, left.leaf_size)[left_leaves]
+    right_block = right.order.reshape(-1, right.leaf_size)[right_leaves]
+    a = np.repeat(left_block, right.leaf_size, axis=1)
+    b = np.tile(right_block, (1, left.leaf_size))
+    return a.ravel(), b.ravel()
@@ -1,21 +1,40 @@
 """Meal filtering functions."""
 
-from app.engine.types import Meal
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.catalog import MealCatalog, RowIndex
+from app.engine.types import ALLERGEN_BITS, DIETARY_TAG_BITS, Meal, to_bitmask
+
+# Distinct (allergies, preferences) profiles whose eligibility mask a catalog keeps
+ELIGIBILITY_CACHE_SIZE = 256
+
+
+def _split_known(values: list[str], bits: dict[str, int]) -> tuple[int, frozenset[str]]:
+    """Bitmask of the closed-set values plus the leftover values that have no bit."""
+    unique = frozenset(values)
+    return to_bitmask(unique, bits), frozenset(v for v in unique if v not in bits)
 
 
 def filter_by_allergens(meals: list[Meal], allergies: list[str]) -> list[Meal]:
     """Remove meals containing any of the listed allergens."""
     if not allergies:
         return meals
-    allergen_set = set(allergies)
-    return [m for m in meals if not any(a in allergen_set for a in m.allergens)]
+    allergy_mask, unknown = _split_known(allergies, ALLERGEN_BITS)
+    if unknown:
+        allergen_set = set(allergies)
+        return [m for m in meals if not any(a in allergen_set for a in m.allergens)]
+    return [m for m in meals if (m.allergen_mask & allergy_mask) == 0]
 
 
 def filter_by_dietary_tags(meals: list[Meal], preferences: list[str]) -> list[Meal]:
     """Keep only meals that have ALL listed dietary tags (AND logic)."""
     if not preferences:
         return meals
-    return [m for m in meals if all(tag in m.dietary_tags for tag in preferences)]
+    pref_mask, unknown = _split_known(preferences, DIETARY_TAG_BITS)
+    if unknown:
+        return [m for m in meals if all(tag in m.dietary_tags for tag in preferences)]
+    return [m for m in meals if (m.dietary_tag_mask & pref_mask) == pref_mask]
 
 
 def filter_by_category(meals: list[Meal], category: str) -> list[Meal]:
@@ -42,3 +61,68 @@ def filter_meals(
         result = filter_by_category(result, category)
 
     return result
+
+
+def eligibility_mask(
+    catalog: MealCatalog,
+    allergies: list[str] | None = None,
+    dietary_preferences: list[str] | None = None,
+) -> NDArray[np.bool_]:
+    """Columnar equivalent of filter_by_allergens + filter_by_dietary_tags.
+
+    Tests `(allergen_mask & allergy_mask) == 0` and `(tag_mask & pref_mask) == pref_mask`
+    over the whole catalog. The result is cached on the catalog per canonical profile, so
+    repeated users with the same restrictions reuse it; it is read-only.
+    """
+    allergy_mask, unknown_allergies = _split_known(allergies or [], ALLERGEN_BITS)
+    pref_mask, unknown_prefs = _split_known(dietary_preferences or [], DIETARY_TAG_BITS)
+    key = (allergy_mask, unknown_allergies, pref_mask, unknown_prefs)
+
+    cached = catalog.eligibility_cache.get(key)
+    if cached is not None:
+        return cached
+
+    mask = np.ones(len(catalog), dtype=np.bool_)
+    if allergy_mask:
+        mask &= (catalog.allergen_masks & allergy_mask) == 0
+    if pref_mask:
+        mask &= (catalog.tag_masks & pref_mask) == pref_mask
+    for allergen in unknown_allergies:
+        mask &= ~catalog.value_column("allergens", allergen)
+    for tag in unknown_prefs:
+        mask &= catalog.value_column("dietary_tags", tag)
+
+    mask.flags.writeable = False
+    if len(catalog.eligibility_cache) >= ELIGIBILITY_CACHE_SIZE:
+        # Evict the oldest profile (dicts keep insertion order)
+        del catalog.eligibility_cache[next(iter(catalog.eligibility_cache))]
+    catalog.eligibility_cache[key] = mask
+    return mask
+
+
+def filter_rows(
+    catalog: MealCatalog,
+    allergies: list[str] | None = None,
+    dietary_preferences: list[str] | None = None,
+    category: str | None = None,
+) -> RowIndex:
+    """Columnar filter_meals: sorted catalog rows passing every applicable filter."""
+    if category is None:
+        return np.flatnonzero(eligibility_mask(catalog, allergies, dietary_preferences))
+
+    start, end = catalog.category_range(category)
+    if allergies or dietary_preferences:
+        mask = eligibility_mask(catalog, allergies, dietary_preferences)[start:end]
+        return np.flatnonzero(mask) + start
+    return np.arange(start, end, dtype=np.intp)
+
+
+def exclude_rows(rows: RowIndex, excluded: RowIndex) -> RowIndex:
+    """Drop `excluded` from sorted `rows` in O(k log n) via binary search."""
+    if len(excluded) == 0 or len(rows) == 0:
+        return rows
+    positions = np.searchsorted(rows, excluded)
+    in_range = positions < len(rows)
+    positions = positions[in_range]
+    hits = positions[rows[positions] == excluded[in_range]]
+    return np.delete(rows, hits)
@@ -0,0 +1,143 @@
+"""Multi-day plan solved as one assignment over the whole horizon.
+
+Each (day, slot) cell must be assigned one meal from that slot's candidates; a meal may
+fill at most `max_repeats` cells over the horizon and, optionally, never on two
+consecutive days. As a min-cost flow this is source -> meal (capacity = repeat cap,
+cost = -score) -> (day, slot) -> sink. Slots draw from disjoint categories and a meal's
+score does not depend on the day, so the flow decomposes per slot, and each slot's
+optimum fills the repeat caps in ranking order (score desc, id asc). The no-consecutive
+rule only limits how often a meal can fit: a multiset of `d` meals has a layout with
+no equal neighbours iff no meal occurs more than ceil(d / 2) times.
+"""
+
+from collections.abc import Sequence
+
+from app.engine.catalog import MealCatalog
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.types import (
+    DayPlanResult,
+    Meal,
+    MultiDayPlanResult,
+    PlanRequest,
+    VarietyConstraints,
+)
+
+
+def assign_multi_day_plan(
+    meals: Sequence[Meal] | MealCatalog,
+    request: PlanRequest,
+    num_days: int,
+    variety: VarietyConstraints = VarietyConstraints(),
+) -> MultiDayPlanResult:
+    """Solve a `num_days` plan globally under cross-day variety constraints.
+
+    Unlike generate_multi_day_plan (greedy day by day, repeats only after the pool runs
+    out), repeats here are planned up front and never break the variety rules. When a
+    slot cannot fill the horizon under those rules the plan is cut to the longest
+    feasible number of days.
+
+    Raises:
+        ValueError: If max_repeats < 1, a slot is requested twice, or the request has
+            per-day calorie constraints or the daily_total objective (both couple slots
+            within a day, so the assignment no longer decomposes per slot).
+    """
+    if variety.max_repeats < 1:
+        raise ValueError("max_repeats must be at least 1")
+    if request.objective != "per_slot":
+        raise ValueError("Global multi-day assignment requires the per_slot objective")
+    if request.constraints is not None and not request.constraints.is_empty:
+        raise ValueError("Global multi-day assignment does not support plan constraints")
+
+    context = PreparedPlanContext(meals, request)
+    slots = [a.slot for a in context.slot_allocations]
+    if len(set(slots)) != len(slots):
+        raise ValueError("Global multi-day assignment requires distinct slots")
+
+    pool_sizes = [len(order) for _, _, order in context.ranked_by_slot]
+    days = _feasible_days(pool_sizes, num_days, variety)
+    if days == 0:
+        return MultiDayPlanResult(days=[], total_unique_meals=0, total_repeated_meals=0)
+
+    # rows_by_slot[s][d] = slot-catalog row planned for slot s on day d
+    cap = _repeat_cap(days, variety)
+    needed = -(-days // cap)  # best-ranked rows that can cover every day
+    rows_by_slot = [
+        _layout(_fill_caps(order[:needed].tolist(), days, cap), days, variety)
+        for _, _, order in context.ranked_by_slot
+    ]
+
+    seen_meal_ids: set[str] = set()
+    total_repeated = 0
+    day_results: list[DayPlanResult] = []
+    for day in range(days):
+        plan = context.plan_for_rows([rows[day] for rows in rows_by_slot])
+        day_meal_ids = [item.meal.id for item in plan.items]
+        repeated_meal_ids = [i for i in day_meal_ids if i in seen_meal_ids]
+        seen_meal_ids.update(day_meal_ids)
+        total_repeated += len(repeated_meal_ids)
+        day_results.append(DayPlanResult(
+            day=day + 1,
+            plan=plan,
+            repeated_meal_ids=repeated_meal_ids,
+        ))
+
+    return MultiDayPlanResult(
+        days=day_results,
+        total_unique_meals=len(seen_meal_ids),
+        total_repeated_meals=total_repeated,
+    )
+
+
+def _repeat_cap(days: int, variety: VarietyConstraints) -> int:
+    """Most times a single meal can be used in `days` days."""
+    if variety.no_consecutive_days:
+        return min(variety.max_repeats, (days + 1) // 2)
+    return variety.max_repeats
+
+
+def _feasible_days(
+    pool_sizes: list[int], num_days: int, variety: VarietyConstraints
+) -> int:
+    """Longest horizon (<= num_days) every slot can fill under the variety rules."""
+    for days in range(max(num_days, 0), 0, -1):
+        cap = _repeat_cap(days, variety)
+        if all(size * cap >= days for size in pool_sizes):
+            return days
+    return 0
+
+
+def _fill_caps(ranked_rows: list[int], days: int, cap: int) -> list[tuple[int, int]]:
+    """(row, uses) for the best-ranked rows, each used up to `cap` times, `days` in all."""
+    counts: list[tuple[int, int]] = []
+    remaining = days
+    for row in ranked_rows:
+        if remaining <= 0:
+            break
+        uses = min(cap, remaining)
+        counts.append((row, uses))
+        remaining -= uses
+    return counts
+
+
+def _layout(
+    counts: list[tuple[int, int]], days: int, variety: VarietyConstraints
+) -> list[int]:
+    """Spread the chosen rows over the days.
+
+    Without the no-consecutive rule rows go out in ranking order. With it, rows are
+    placed most-used first on even days, then odd days; since no row is used more
+    than ceil(days / 2) times, no row lands on two adjacent days.
+    """
+    if variety.no_consecutive_days:
+        positions = [*range(0, days, 2), *range(1, days, 2)]
+        counts = sorted(counts, key=lambda c: -c[1])  # stable: ties keep ranking order
+    else:
+        positions = list(range(days))
+
+    layout = [0] * days
+    cursor = 0
+    for row, uses in counts:
+        for position in positions[cursor : cursor + uses]:
+            layout[position] = row
+        cursor += uses
+    return layout
@@ -1,8 +1,12 @@
 """Multi-day plan generator: loops daily planner with progressive meal exclusion."""
 
-from app.engine.daily_planner import generate_daily_plan
+from collections.abc import Sequence
+
+from app.engine.catalog import MealCatalog
+from app.engine.plan_context import PreparedPlanContext
 from app.engine.types import (
     DayPlanResult,
+    EngineStats,
     Meal,
     MultiDayPlanResult,
     PlanRequest,
@@ -10,18 +14,26 @@ from app.engine.types import (
 
 
 def generate_multi_day_plan(
-    meals: list[Meal],
+    meals: Sequence[Meal] | MealCatalog,
     request: PlanRequest,
     num_days: int,
+    stats: EngineStats | None = None,
 ) -> MultiDayPlanResult:
     """Generate a meal plan spanning multiple days.
 
     Algorithm:
     1. Loop num_days times, tracking used_meal_ids across days
-    2. Filter out used meals, call generate_daily_plan(available, request)
+    2. Plan the day from the prepared context with used meals masked out
     3. If None (pool exhausted), fallback to full pool, record repeated_meal_ids
     4. Return MultiDayPlanResult with per-day repeat info + aggregate stats
+
+    Filtering, allocation and per-slot ranking happen once in PreparedPlanContext, so
+    each day costs one masked selection rather than a full scoring pass.
+
+    Pass `stats` to collect timings and search counters summed over all days, plus
+    how many days fell back to the full pool.
     """
+    context = PreparedPlanContext(meals, request, stats)
     used_meal_ids: set[str] = set()
     all_seen_meal_ids: set[str] = set()
     total_repeated = 0
@@ -29,14 +41,15 @@ def generate_multi_day_plan(
 
     for day_num in range(1, num_days + 1):
         # Try with unused meals first
-        available = [m for m in meals if m.id not in used_meal_ids]
-        plan = generate_daily_plan(available, request)
+        plan = context.plan(used_meal_ids, stats)
 
         repeated_meal_ids: list[str] = []
 
         if plan is None:
             # Fallback: use full pool
-            plan = generate_daily_plan(meals, request)
+            if stats is not None:
+                stats.pool_exhausted_fallbacks += 1
+            plan = context.plan(stats=stats)
             if plan is None:
                 # Even full pool fails — stop generating
                 break
@@ -1,103 +1,344 @@
 """Branch-and-bound optimizer for finding optimal meal combinations across slots."""
 
+import bisect
+import math
+import time
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.catalog import MealCatalog, RowIndex, as_catalog
 from app.engine.constants import DEFAULT_SCORING_WEIGHTS
-from app.engine.scoring import calculate_score
+from app.engine.ranking import rank_order
+from app.engine.scoring import score_many
 from app.engine.types import (
+    EngineStats,
     Meal,
     MealSlot,
     OptimalPlan,
     OptimalPlanItem,
+    PlanConstraints,
     ScoringWeights,
+    SearchBudget,
+    SearchStats,
     SlotAllocation,
 )
 
+# A slot's candidate meals and their scores against the slot targets (aligned by row)
+ScoredSlot = tuple[MealCatalog, NDArray[np.float64]]
+# A scored slot plus its candidate rows in ranking order (score desc, id asc)
+RankedSlot = tuple[MealCatalog, NDArray[np.float64], RowIndex]
+
+# Search steps between deadline checks (reading the clock every step is measurable)
+CLOCK_CHECK_INTERVAL = 1024
+
 
 def find_optimal_plan(
     slot_allocations: list[SlotAllocation],
-    meals_by_slot: dict[MealSlot, list[Meal]],
+    meals_by_slot: Mapping[MealSlot, Sequence[Meal] | MealCatalog],
     weights: ScoringWeights = DEFAULT_SCORING_WEIGHTS,
+    constraints: PlanConstraints | None = None,
+    stats: SearchStats | None = None,
+    budget: SearchBudget | None = None,
 ) -> OptimalPlan | None:
     """Find the optimal combination of meals across slots maximizing total weighted score.
 
-    Algorithm: branch-and-bound in slot order.
+    The objective is the average of per-slot scores. Without cross-slot constraints it is
+    separable, so the optimum is simply the best-ranked meal in each slot (O(n) argmax).
+
+    With constraints: branch-and-bound in slot order.
     - Meals pre-sorted by slot-specific score (desc) to explore promising branches first.
-    - Pruning: if running score + theoretical max remaining can't beat current best, prune.
+    - Pruning: if running score + the best score still reachable in each remaining slot
+      can't beat the current best, prune.
+    - Calorie window: prune when the remaining slots can no longer land inside it.
+    - Anytime: when `budget` runs out the incumbent is returned with optimal=False and
+      a gap_bound from the unexplored branches. The separable path ignores the budget.
+
+    Pass `stats` to collect node/prune counters; an EngineStats also gets the score
+    and search timings and the candidate count per slot.
 
-    Returns None when no meals are available for any required slot.
+    Returns None when no meals are available for any required slot, when no
+    combination satisfies the constraints, or when the budget ran out before the
+    search found a feasible plan.
     """
     if not slot_allocations:
         return None
 
-    # Pre-score and sort meals for each slot
-    ranked_by_slot: list[dict[str, object]] = []
+    engine_stats = stats if isinstance(stats, EngineStats) else None
+    started = time.perf_counter()
+
+    # Pre-score meals for each slot (one vectorized pass per slot)
+    scored_by_slot: list[ScoredSlot] = []
     for allocation in slot_allocations:
-        slot_meals = meals_by_slot.get(allocation.slot, [])
-        scored = [
-            {
-                "meal": meal,
-                "score": calculate_score(meal.nutritional_info, allocation.targets, weights),
-            }
-            for meal in slot_meals
+        slot_catalog = as_catalog(meals_by_slot.get(allocation.slot, []))
+        if engine_stats is not None:
+            engine_stats.candidates_per_slot[allocation.slot] = len(slot_catalog)
+        # Verify every slot has at least one meal
+        if len(slot_catalog) == 0:
+            return None
+        scores, _ = score_many(slot_catalog, allocation.targets, weights)
+        scored_by_slot.append((slot_catalog, scores))
+
+    if constraints is None or constraints.is_empty:
+        scored_at = time.perf_counter()
+        if stats is not None:
+            stats.nodes_expanded += len(slot_allocations)
+        result = _best_per_slot(slot_allocations, scored_by_slot)
+    else:
+        ranked_by_slot = [
+            (catalog, scores, rank_order(scores, catalog.id_rank))
+            for catalog, scores in scored_by_slot
         ]
-        scored.sort(key=lambda x: (-x["score"], x["meal"].id))  # type: ignore[union-attr]
-        ranked_by_slot.append({"slot": allocation.slot, "meals": scored})
+        scored_at = time.perf_counter()
+        result = _branch_and_bound(slot_allocations, ranked_by_slot, constraints, stats, budget)
 
-    # Verify every slot has at least one meal
-    for slot_data in ranked_by_slot:
-        if not slot_data["meals"]:  # type: ignore[arg-type]
-            return None
+    if engine_stats is not None:
+        engine_stats.score_ms += (scored_at - started) * 1000
+        engine_stats.search_ms += (time.perf_counter() - scored_at) * 1000
+        engine_stats.searches += 1
+        engine_stats.budget_exhausted += result is not None and not result.optimal
+    return result
+
+
+def optimize_ranked(
+    slot_allocations: list[SlotAllocation],
+    ranked_by_slot: list[RankedSlot],
+    constraints: PlanConstraints | None = None,
+    stats: SearchStats | None = None,
+    budget: SearchBudget | None = None,
+) -> OptimalPlan | None:
+    """find_optimal_plan over slots that are already scored and ranked.
+
+    Callers that plan repeatedly against the same targets (variants, multi-day) rank
+    once and pass a filtered ranking per call, so nothing is re-scored or re-sorted.
+    """
+    if not slot_allocations or any(len(order) == 0 for _, _, order in ranked_by_slot):
+        return None
+
+    if constraints is None or constraints.is_empty:
+        if stats is not None:
+            stats.nodes_expanded += len(slot_allocations)
+        items: list[OptimalPlanItem] = []
+        running_score = 0.0
+        for allocation, (catalog, scores, order) in zip(
+            slot_allocations, ranked_by_slot, strict=True
+        ):
+            row = int(order[0])
+            score = float(scores[row])
+            running_score += score
+            items.append(
+                OptimalPlanItem(slot=allocation.slot, meal=catalog.meals[row], score=score)
+            )
+        return OptimalPlan(items=items, total_score=running_score / len(items))
+
+    return _branch_and_bound(slot_allocations, ranked_by_slot, constraints, stats, budget)
+
+
+def _best_per_slot(
+    slot_allocations: list[SlotAllocation],
+    scored_by_slot: list[ScoredSlot],
+) -> OptimalPlan:
+    """Separable objective: take the top-ranked meal (score desc, id asc) in each slot."""
+    items: list[OptimalPlanItem] = []
+    running_score = 0.0
+    for allocation, (catalog, scores) in zip(slot_allocations, scored_by_slot, strict=True):
+        tied = np.flatnonzero(scores == scores.max())
+        row = int(tied[np.argmin(catalog.id_rank[tied])])
+        score = float(scores[row])
+        running_score += score
+        items.append(OptimalPlanItem(slot=allocation.slot, meal=catalog.meals[row], score=score))
+
+    return OptimalPlan(items=items, total_score=running_score / len(items))
+
+
+def _branch_and_bound(
+    slot_allocations: list[SlotAllocation],
+    ranked_by_slot: list[RankedSlot],
+    constraints: PlanConstraints,
+    stats: SearchStats | None,
+    budget: SearchBudget | None = None,
+) -> OptimalPlan | None:
+    """Depth-first search with upper-bound pruning for non-separable (constrained) plans.
+
+    Runs on an explicit stack over per-slot ranking positions; plan items are only built
+    for the final incumbent. The stack also describes everything left unexplored, which
+    gives the gap bound when `budget` stops the search early.
+    """
+    max_nodes = math.inf
+    deadline = math.inf
+    if budget is not None:
+        if budget.max_nodes is not None:
+            max_nodes = budget.max_nodes
+        if budget.deadline_ms is not None:
+            deadline = time.perf_counter() + budget.deadline_ms / 1000
 
     num_slots = len(ranked_by_slot)
+    ranked_rows: list[list[int]] = []
+    ranked_scores: list[list[float]] = []
+    ranked_calories: list[list[float]] = []
+    for catalog, scores, order in ranked_by_slot:
+        ranked_rows.append(order.tolist())
+        ranked_scores.append(scores[order].tolist())
+        ranked_calories.append(catalog.calories[order].tolist())
+
+    # Admissible bound: best achievable score of every slot from index i to the end
+    suffix_best = [0.0] * (num_slots + 1)
+    # Calorie range still reachable from each slot index to the end of the plan
+    suffix_min_cal = [0.0] * (num_slots + 1)
+    suffix_max_cal = [0.0] * (num_slots + 1)
+    for i in range(num_slots - 1, -1, -1):
+        suffix_best[i] = suffix_best[i + 1] + ranked_scores[i][0]
+        suffix_min_cal[i] = suffix_min_cal[i + 1] + min(ranked_calories[i])
+        suffix_max_cal[i] = suffix_max_cal[i + 1] + max(ranked_calories[i])
+
+    min_calories = constraints.min_calories
+    max_calories = constraints.max_calories
+    last = num_slots - 1
+    closer = _CalorieRangeBest(ranked_calories[last])
+
     best_score = -1.0
-    best_items: list[OptimalPlanItem] | None = None
+    best_choice: list[int] | None = None
+    expanded = 0
+    pruned = 0
 
-    current_items: list[OptimalPlanItem] = []
-    running_score = 0.0
+    # choice[d] = ranking position chosen in slot d; prefix_*[d] = totals of slots < d
+    choice = [-1] * num_slots
+    prefix_score = [0.0] * (num_slots + 1)
+    prefix_calories = [0.0] * (num_slots + 1)
+    depth = 0
+    steps = 0
+    stopped = False
 
-    def search(slot_index: int) -> None:
-        nonlocal best_score, best_items, running_score
-
-        if slot_index == num_slots:
-            total_score = running_score / num_slots
-            if total_score > best_score:
-                best_score = total_score
-                best_items = list(current_items)
-            return
-
-        # Upper-bound pruning
-        remaining_slots = num_slots - slot_index
-        upper_bound = (running_score + remaining_slots) / num_slots
-        if upper_bound <= best_score + 1e-12:
-            return
-
-        slot_data = ranked_by_slot[slot_index]
-        slot_name: MealSlot = slot_data["slot"]  # type: ignore[assignment]
-        slot_meals: list[dict[str, object]] = slot_data["meals"]  # type: ignore[assignment]
-
-        for entry in slot_meals:
-            meal: Meal = entry["meal"]  # type: ignore[assignment]
-            score: float = entry["score"]  # type: ignore[assignment]
-
-            # Within-slot pruning
-            upper_bound_with_meal = (running_score + score + remaining_slots - 1) / num_slots
-            if upper_bound_with_meal <= best_score + 1e-12:
-                break
+    while depth >= 0:
+        steps += 1
+        if expanded >= max_nodes or (
+            steps % CLOCK_CHECK_INTERVAL == 0 and time.perf_counter() >= deadline
+        ):
+            stopped = True
+            break
 
-            running_score += score
-            current_items.append(OptimalPlanItem(slot=slot_name, meal=meal, score=score))
+        running_score = prefix_score[depth]
+        running_calories = prefix_calories[depth]
+
+        if depth == last:
+            # Close the plan directly: best-ranked last-slot meal inside the calorie window
+            expanded += 1
+            pos = closer.best_position(
+                -math.inf if min_calories is None else min_calories - running_calories,
+                math.inf if max_calories is None else max_calories - running_calories,
+            )
+            if pos is None:
+                pruned += 1
+            else:
+                total_score = (running_score + ranked_scores[last][pos]) / num_slots
+                if total_score > best_score:
+                    best_score = total_score
+                    best_choice = [*choice[:last], pos]
+                    # Early exit on perfect solution
+                    if best_score >= 1.0:
+                        break
+                else:
+                    pruned += 1
+            depth -= 1
+            continue
+
+        scores = ranked_scores[depth]
+        calories = ranked_calories[depth]
+        rest_best = suffix_best[depth + 1]
+        rest_min_cal = suffix_min_cal[depth + 1]
+        rest_max_cal = suffix_max_cal[depth + 1]
 
-            search(slot_index + 1)
+        pos = choice[depth] + 1
+        while pos < len(scores):
+            # Ranked order: once the bound fails, it fails for the rest of the slot
+            if (running_score + scores[pos] + rest_best) / num_slots <= best_score + 1e-12:
+                pruned += 1
+                pos = len(scores)
+                break
+            # Calorie-window feasibility of the remaining slots
+            total_calories = running_calories + calories[pos]
+            if (max_calories is not None and total_calories + rest_min_cal > max_calories) or (
+                min_calories is not None and total_calories + rest_max_cal < min_calories
+            ):
+                pruned += 1
+                pos += 1
+                continue
+            break
 
-            current_items.pop()
-            running_score -= score
+        if pos >= len(scores):
+            choice[depth] = -1
+            depth -= 1
+            continue
 
-            # Early exit on perfect solution
-            if best_score >= 1.0:
-                return
+        choice[depth] = pos
+        prefix_score[depth + 1] = running_score + scores[pos]
+        prefix_calories[depth + 1] = running_calories + calories[pos]
+        expanded += 1
+        depth += 1
 
-    search(0)
+    if stats is not None:
+        stats.nodes_expanded += expanded
+        stats.nodes_pruned += pruned
 
-    if best_items is None:
+    if best_choice is None:
         return None
 
-    return OptimalPlan(items=best_items, total_score=best_score)
+    gap_bound = 0.0
+    if stopped:
+        # Unexplored: siblings after the chosen position at every depth on the stack,
+        # plus the pending close when the search stopped at the last slot
+        open_best = 0.0
+        for d in range(depth + 1):
+            if d == last:
+                open_best = max(open_best, prefix_score[last] + suffix_best[last])
+            elif choice[d] + 1 < len(ranked_scores[d]):
+                open_best = max(
+                    open_best,
+                    prefix_score[d] + ranked_scores[d][choice[d] + 1] + suffix_best[d + 1],
+                )
+        gap_bound = open_best / num_slots - best_score
+        if gap_bound <= 1e-12:  # same slack as the pruning test
+            gap_bound = 0.0
+
+    items = [
+        OptimalPlanItem(
+            slot=allocation.slot,
+            meal=catalog.meals[ranked_rows[i][pos]],
+            score=ranked_scores[i][pos],
+        )
+        for i, (allocation, (catalog, _, _), pos) in enumerate(
+            zip(slot_allocations, ranked_by_slot, best_choice, strict=True)
+        )
+    ]
+    return OptimalPlan(
+        items=items, total_score=best_score, optimal=gap_bound == 0.0, gap_bound=gap_bound
+    )
+
+
+class _CalorieRangeBest:
+    """Best ranking position among meals whose calories fall in [lo, hi], in O(log n).
+
+    Meals are sorted by calories; a sparse table answers range-minimum queries over their
+    ranking positions, and the smallest position is the best (score desc, id asc) meal.
+    """
+
+    def __init__(self, ranked_calories: list[float]) -> None:
+        order = sorted(range(len(ranked_calories)), key=ranked_calories.__getitem__)
+        self.calories = [ranked_calories[i] for i in order]
+        level = np.asarray(order, dtype=np.intp)
+        self.table: list[list[int]] = [level.tolist()]
+        width = 1
+        while 2 * width <= len(order):
+            level = np.minimum(level[:-width], level[width:])
+            self.table.append(level.tolist())
+            width *= 2
+
+    def best_position(self, lo: float, hi: float) -> int | None:
+        start = bisect.bisect_left(self.calories, lo)
+        end = bisect.bisect_right(self.calories, hi)
+        if start >= end:
+            return None
+        k = (end - start).bit_length() - 1
+        row = self.table[k]
+        return min(row[start], row[end - (1 << k)])
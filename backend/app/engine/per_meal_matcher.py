@@ -1,41 +1,49 @@
 """Per-meal matching pipeline: filter -> score -> sort -> top N."""
 
+from collections.abc import Sequence
+
+from app.engine.catalog import MealCatalog, as_catalog
 from app.engine.constants import DEFAULT_SCORING_WEIGHTS
-from app.engine.filters import filter_meals
-from app.engine.scoring import calculate_deviation, calculate_score
+from app.engine.filters import exclude_rows, filter_rows
+from app.engine.ranking import top_k
+from app.engine.scoring import deviation_at, score_many
 from app.engine.types import Meal, MealMatchRequest, ScoredMeal
 
 
-def match_meals(meals: list[Meal], request: MealMatchRequest) -> list[ScoredMeal]:
+def match_meals(
+    meals: Sequence[Meal] | MealCatalog, request: MealMatchRequest
+) -> list[ScoredMeal]:
     """Full per-meal matching pipeline.
 
-    1. Filter meals by allergens, dietary preferences, and category
+    1. Filter meals by allergens, dietary preferences, category, and excluded ids
     2. Score each meal against the macro targets
-    3. Sort by score descending (deterministic with id tiebreak)
-    4. Apply limit
+    3. Select the top `limit` by score descending (deterministic with id tiebreak)
+
+    Step 3 is a partial selection, so the cost is O(n + K log K) rather than a full sort.
     """
     effective_weights = request.weights or DEFAULT_SCORING_WEIGHTS
+    catalog = as_catalog(meals)
 
     # Step 1: Filter
-    filtered = filter_meals(
-        meals,
+    rows = filter_rows(
+        catalog,
         allergies=request.allergies,
         dietary_preferences=request.dietary_preferences,
         category=request.category,
     )
+    if request.exclude_meal_ids:
+        rows = exclude_rows(rows, catalog.rows_of(request.exclude_meal_ids))
+
+    # Step 2: Score (vectorized over the filtered rows)
+    scores, deviations = score_many(catalog, request.targets, effective_weights, rows)
 
-    # Step 2: Score
-    scored = [
+    # Step 3: Top K by score descending, tiebreak by id
+    top = top_k(scores, catalog.id_rank[rows], request.limit)
+    return [
         ScoredMeal(
-            meal=meal,
-            score=calculate_score(meal.nutritional_info, request.targets, effective_weights),
-            deviation=calculate_deviation(meal.nutritional_info, request.targets),
+            meal=catalog.meals[rows[i]],
+            score=float(scores[i]),
+            deviation=deviation_at(deviations, i),
         )
-        for meal in filtered
+        for i in top
     ]
-
-    # Step 3: Sort by score descending, tiebreak by id
-    scored.sort(key=lambda s: (-s.score, s.meal.id))
-
-    # Step 4: Apply limit
-    return scored[: request.limit]
@@ -0,0 +1,188 @@
+"""Prepared planning state reused across repeated plans for the same request."""
+
+import time
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from app.engine.catalog import MealCatalog, as_catalog
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS
+from app.engine.daily_total import find_daily_total_plan
+from app.engine.filters import filter_rows
+from app.engine.optimizer import RankedSlot, optimize_ranked
+from app.engine.ranking import rank_order
+from app.engine.scoring import score_many
+from app.engine.slot_allocator import allocate_slots
+from app.engine.types import (
+    EngineStats,
+    Meal,
+    NutritionalInfo,
+    OptimalPlan,
+    OptimalPlanItem,
+    PlanItem,
+    PlanRequest,
+    PlanResult,
+    SearchBudget,
+    SearchStats,
+)
+
+
+class PreparedPlanContext:
+    """Filtered, allocated and ranked candidates for one PlanRequest.
+
+    Filtering, slot allocation, grouping and per-slot scoring/ranking depend only on the
+    catalog and the request, so they run once here. Each call to `plan` then only masks
+    out excluded meal ids from the precomputed rankings before optimizing, which is what
+    variants and multi-day generation need for every day or variant after the first.
+    """
+
+    __slots__ = ("catalog", "ranked_by_slot", "request", "slot_allocations", "weights")
+
+    def __init__(
+        self,
+        meals: Sequence[Meal] | MealCatalog,
+        request: PlanRequest,
+        stats: EngineStats | None = None,
+    ) -> None:
+        """Pass `stats` to record the filter/allocate/group/score phase timings."""
+        self.weights = weights = request.weights or DEFAULT_SCORING_WEIGHTS
+        self.catalog = as_catalog(meals)
+        self.request = request
+
+        # Filter meals globally
+        started = time.perf_counter()
+        filtered = filter_rows(
+            self.catalog,
+            allergies=request.allergies,
+            dietary_preferences=request.dietary_preferences,
+        )
+        filtered_at = time.perf_counter()
+
+        # Allocate slot targets
+        self.slot_allocations = allocate_slots(request.daily_targets, request.slots)
+        allocated_at = time.perf_counter()
+
+        # Group meals by slot (category matches slot name), then score and rank each slot.
+        # Filtered rows are sorted, so each category is one contiguous slice of them.
+        self.ranked_by_slot: list[RankedSlot] = []
+        group_s = score_s = 0.0
+        for allocation in self.slot_allocations:
+            slot_started = time.perf_counter()
+            start, end = self.catalog.category_range(allocation.slot)
+            lo, hi = np.searchsorted(filtered, [start, end])
+            slot_catalog = self.catalog.subset(filtered[lo:hi])
+            grouped_at = time.perf_counter()
+            scores, _ = score_many(slot_catalog, allocation.targets, weights)
+            self.ranked_by_slot.append(
+                (slot_catalog, scores, rank_order(scores, slot_catalog.id_rank))
+            )
+            group_s += grouped_at - slot_started
+            score_s += time.perf_counter() - grouped_at
+
+        if stats is not None:
+            stats.filter_ms += (filtered_at - started) * 1000
+            stats.allocate_ms += (allocated_at - filtered_at) * 1000
+            stats.group_ms += group_s * 1000
+            stats.score_ms += score_s * 1000
+            for allocation, (slot_catalog, _, _) in zip(
+                self.slot_allocations, self.ranked_by_slot, strict=True
+            ):
+                stats.candidates_per_slot[allocation.slot] = len(slot_catalog)
+
+    def plan(
+        self,
+        exclude_meal_ids: Iterable[str] = (),
+        stats: SearchStats | None = None,
+        budget: SearchBudget | None = None,
+    ) -> PlanResult | None:
+        """Optimal plan over the prepared candidates minus `exclude_meal_ids`.
+
+        With a `budget` the search may stop early and return its best plan so far,
+        marked optimal=False with a gap_bound. An EngineStats `stats` also gets the
+        search time and outcome.
+
+        Returns None when a slot has no candidates left or no combination satisfies
+        the request constraints (or none was found within the budget).
+        """
+        started = time.perf_counter()
+        excluded = frozenset(exclude_meal_ids)
+        ranked_by_slot = self.ranked_by_slot
+        if excluded:
+            ranked_by_slot = []
+            for catalog, scores, order in self.ranked_by_slot:
+                available = catalog.exclusion_mask(excluded)
+                ranked_by_slot.append((catalog, scores, order[available[order]]))
+
+        if self.request.objective == "daily_total":
+            optimal = find_daily_total_plan(
+                self.slot_allocations,
+                ranked_by_slot,
+                self.request.daily_targets,
+                self.weights,
+                self.request.constraints,
+                stats,
+                budget,
+            )
+        else:
+            optimal = optimize_ranked(
+                self.slot_allocations, ranked_by_slot, self.request.constraints, stats, budget
+            )
+        if isinstance(stats, EngineStats):
+            stats.search_ms += (time.perf_counter() - started) * 1000
+            stats.searches += 1
+            stats.budget_exhausted += optimal is not None and not optimal.optimal
+        if optimal is None:
+            return None
+        return self._build_result(optimal)
+
+    def plan_for_rows(self, rows: Sequence[int]) -> PlanResult:
+        """PlanResult for an explicit choice of one slot-catalog row per allocation."""
+        items: list[OptimalPlanItem] = []
+        running_score = 0.0
+        for allocation, (catalog, scores, _), row in zip(
+            self.slot_allocations, self.ranked_by_slot, rows, strict=True
+        ):
+            score = float(scores[row])
+            running_score += score
+            items.append(
+                OptimalPlanItem(slot=allocation.slot, meal=catalog.meals[row], score=score)
+            )
+        return self._build_result(
+            OptimalPlan(items=items, total_score=running_score / len(items))
+        )
+
+    def _build_result(self, optimal: OptimalPlan) -> PlanResult:
+        allocation_map = {a.slot: a for a in self.slot_allocations}
+
+        items = [
+            PlanItem(
+                slot=item.slot,
+                meal=item.meal,
+                score=item.score,
+                slot_targets=allocation_map[item.slot].targets,
+            )
+            for item in optimal.items
+        ]
+
+        actual_macros = _sum_nutritional_info(
+            [item.meal.nutritional_info for item in optimal.items]
+        )
+
+        return PlanResult(
+            items=items,
+            total_score=optimal.total_score,
+            actual_macros=actual_macros,
+            target_macros=self.request.daily_targets,
+            optimal=optimal.optimal,
+            gap_bound=optimal.gap_bound,
+        )
+
+
+def _sum_nutritional_info(infos: list[NutritionalInfo]) -> NutritionalInfo:
+    """Sum nutritional info across multiple meals."""
+    return NutritionalInfo(
+        calories=sum(i.calories for i in infos),
+        protein=sum(i.protein for i in infos),
+        carbs=sum(i.carbs for i in infos),
+        fat=sum(i.fat for i in infos),
+    )
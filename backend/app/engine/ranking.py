@@ -0,0 +1,32 @@
+"""Deterministic ranking over score arrays: score descending, id ascending."""
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.catalog import RowIndex
+
+
+def rank_order(scores: NDArray[np.float64], tiebreak: NDArray[np.int64]) -> RowIndex:
+    """Full ranking: positions sorted by (-score, tiebreak)."""
+    return np.lexsort((tiebreak, -scores))
+
+
+def top_k(
+    scores: NDArray[np.float64], tiebreak: NDArray[np.int64], k: int
+) -> RowIndex:
+    """First `k` positions of rank_order without sorting the whole array.
+
+    argpartition finds the k-th best score in O(n); only candidates at or above it
+    (including every tie at the threshold, so the id tiebreak stays exact) are sorted.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return rank_order(scores, tiebreak)
+
+    neg = -scores
+    threshold = neg[np.argpartition(neg, k - 1)[k - 1]]
+    candidates = np.flatnonzero(neg <= threshold)
+    order = np.lexsort((tiebreak[candidates], neg[candidates]))
+    return candidates[order[:k]]
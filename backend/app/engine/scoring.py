@@ -1,8 +1,17 @@
 """Scoring functions for macro matching."""
 
+from collections.abc import Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.engine.catalog import MealCatalog, RowIndex
 from app.engine.constants import DEFAULT_SCORING_WEIGHTS
 from app.engine.types import MacroDeviation, MacroTargets, NutritionalInfo, ScoringWeights
 
+# Column order of the deviations matrix returned by score_many
+MACRO_COLUMNS: tuple[str, ...] = ("calories", "protein", "carbs", "fat")
+
 
 def calculate_deviation(actual: NutritionalInfo, target: MacroTargets) -> MacroDeviation:
     """Absolute per-macro deviation between actual nutritional info and target macros."""
@@ -58,3 +67,78 @@ def calculate_score(
     )
 
     return weighted_sum / total_weight
+
+
+def _score_macro_column(
+    deviation: NDArray[np.float64], actual: NDArray[np.float64], target: float
+) -> NDArray[np.float64]:
+    """Vectorized _score_macro given the precomputed |actual - target| column."""
+    if target == 0:
+        return (actual == 0).astype(np.float64)
+    normalized_deviation = deviation / target
+    return np.maximum(0.0, 1.0 - np.minimum(normalized_deviation, 1.0))
+
+
+def score_many(
+    catalog: MealCatalog,
+    target: MacroTargets,
+    weights: ScoringWeights = DEFAULT_SCORING_WEIGHTS,
+    rows: RowIndex | None = None,
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Batch calculate_score + calculate_deviation over catalog columns.
+
+    Scores `rows` (sorted ascending, as filter_rows returns them; default: every row) in
+    one pass and returns `(scores, deviations)`, where deviations is an (n, 4) matrix in
+    MACRO_COLUMNS order. Operations run in the same order as the scalar functions, so
+    results are bit-for-bit identical to them.
+    """
+    columns = (catalog.calories, catalog.protein, catalog.carbs, catalog.fat)
+    if rows is not None:
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            # Contiguous sorted rows (e.g. one unfiltered category): views, no gather
+            columns = tuple(c[rows[0] : rows[-1] + 1] for c in columns)
+        else:
+            columns = tuple(c[rows] for c in columns)
+    return score_columns(columns, target, weights)
+
+
+def score_columns(
+    columns: Sequence[NDArray[np.float64]],
+    target: MacroTargets,
+    weights: ScoringWeights = DEFAULT_SCORING_WEIGHTS,
+) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """score_many over explicit (calories, protein, carbs, fat) columns of equal length.
+
+    Lets callers score derived macro totals (e.g. summed meal combinations) with the
+    exact arithmetic of calculate_score.
+    """
+    targets = (target.calories, target.protein, target.carbs, target.fat)
+
+    # Macro-major storage keeps each column contiguous; callers get the (n, 4) view
+    by_macro = np.empty((len(MACRO_COLUMNS), len(columns[0])), dtype=np.float64)
+    macro_scores: list[NDArray[np.float64]] = []
+    for i, (actual, macro_target) in enumerate(zip(columns, targets, strict=True)):
+        np.abs(actual - macro_target, out=by_macro[i])
+        macro_scores.append(_score_macro_column(by_macro[i], actual, macro_target))
+    cal, pro, carb, fat = macro_scores
+    deviations = by_macro.T
+
+    total_weight = weights.calories + weights.protein + weights.carbs + weights.fat
+
+    if total_weight == 0:
+        return (cal + pro + carb + fat) / 4, deviations
+
+    weighted_sum = (
+        cal * weights.calories
+        + pro * weights.protein
+        + carb * weights.carbs
+        + fat * weights.fat
+    )
+
+    return weighted_sum / total_weight, deviations
+
+
+def deviation_at(deviations: NDArray[np.float64], index: int) -> MacroDeviation:
+    """MacroDeviation for one row of a score_many deviations matrix."""
+    calories, protein, carbs, fat = deviations[index].tolist()
+    return MacroDeviation(calories=calories, protein=protein, carbs=carbs, fat=fat)
@@ -1,7 +1,8 @@
 """Type definitions for the meal plan engine. Zero external dependencies."""
 
+from collections.abc import Iterable
 from dataclasses import dataclass, field
-from typing import Literal
+from typing import Literal, get_args
 
 MealCategory = Literal["breakfast", "lunch", "dinner", "snack"]
 MealSlot = Literal["breakfast", "lunch", "dinner", "snack"]
@@ -11,6 +12,21 @@ Allergen = Literal[
 DietaryTag = Literal[
     "vegetarian", "vegan", "gluten_free", "keto", "low_carb", "high_protein", "dairy_free", "halal"
 ]
+# per_slot: average of each meal's score against its slot share of the targets
+# daily_total: score of the day's summed macros against the daily targets
+PlanObjective = Literal["per_slot", "daily_total"]
+
+# One bit per value of the closed Allergen / DietaryTag sets
+ALLERGEN_BITS: dict[str, int] = {a: 1 << i for i, a in enumerate(get_args(Allergen))}
+DIETARY_TAG_BITS: dict[str, int] = {t: 1 << i for i, t in enumerate(get_args(DietaryTag))}
+
+
+def to_bitmask(values: Iterable[str], bits: dict[str, int]) -> int:
+    """OR together the bits of `values`; values outside the closed set are ignored."""
+    mask = 0
+    for value in values:
+        mask |= bits.get(value, 0)
+    return mask
 
 
 @dataclass(frozen=True)
@@ -45,6 +61,15 @@ class Meal:
     active: bool = True
     image_url: str | None = None
     poster_product_id: str | None = None
+    # Precomputed from allergens / dietary_tags for bitwise filtering
+    allergen_mask: int = field(init=False, repr=False, compare=False)
+    dietary_tag_mask: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "allergen_mask", to_bitmask(self.allergens, ALLERGEN_BITS))
+        object.__setattr__(
+            self, "dietary_tag_mask", to_bitmask(self.dietary_tags, DIETARY_TAG_BITS)
+        )
 
 
 @dataclass(frozen=True)
@@ -104,6 +129,92 @@ class OptimalPlanItem:
 class OptimalPlan:
     items: list[OptimalPlanItem]
     total_score: float
+    # False when a SearchBudget stopped the search before it proved optimality;
+    # gap_bound then bounds how much total_score could still improve
+    optimal: bool = True
+    gap_bound: float = 0.0
+
+
+@dataclass
+class SearchStats:
+    """Branch-and-bound counters, filled in when passed to the optimizer."""
+
+    nodes_expanded: int = 0
+    nodes_pruned: int = 0
+
+
+@dataclass
+class EngineStats(SearchStats):
+    """Where a planner call spent its time, filled in when passed to it.
+
+    Accumulates across calls: a multi-day plan adds one search per day.
+    """
+
+    filter_ms: float = 0.0
+    allocate_ms: float = 0.0
+    group_ms: float = 0.0
+    score_ms: float = 0.0  # scoring and ranking every candidate
+    search_ms: float = 0.0
+    searches: int = 0
+    budget_exhausted: int = 0  # searches that stopped early with optimal=False
+    pool_exhausted_fallbacks: int = 0  # multi-day days that had to reuse meals
+    candidates_per_slot: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class SearchBudget:
+    """Limits on a constrained plan search, counted from the start of the search.
+
+    When a limit is hit the best plan found so far is returned with optimal=False.
+    """
+
+    deadline_ms: float | None = None
+    max_nodes: int | None = None
+
+
+@dataclass(frozen=True)
+class PlanConstraints:
+    """Cross-slot constraints on a daily plan.
+
+    Any bound that is set couples the slots together, so the optimizer can no longer
+    pick each slot independently and falls back to branch-and-bound.
+    """
+
+    min_calories: float | None = None
+    max_calories: float | None = None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.min_calories is None and self.max_calories is None
+
+
+@dataclass(frozen=True)
+class VarietyConstraints:
+    """Cross-day variety rules for a multi-day plan solved as one assignment."""
+
+    max_repeats: int = 1  # times a meal may appear over the whole horizon
+    no_consecutive_days: bool = True
+
+
+@dataclass(frozen=True)
+class VariantDiversity:
+    """How plan variants must differ from every variant returned before them."""
+
+    # None: variants share no meals; m: each pair of variants differs in >= m slots
+    min_differing_slots: int | None = None
+
+
+@dataclass(frozen=True)
+class TargetGrid:
+    """Cell size per macro when daily targets are snapped for approximate planning.
+
+    A size of 0 keeps that macro exact.
+    """
+
+    calories: float = 50.0
+    protein: float = 5.0
+    carbs: float = 10.0
+    fat: float = 5.0
 
 
 @dataclass(frozen=True)
@@ -114,6 +225,7 @@ class MealMatchRequest:
     category: MealCategory | None = None
     limit: int = 10
     weights: ScoringWeights | None = None
+    exclude_meal_ids: frozenset[str] = frozenset()
 
 
 @dataclass(frozen=True)
@@ -123,6 +235,8 @@ class PlanRequest:
     allergies: list[str] = field(default_factory=list)
     dietary_preferences: list[str] = field(default_factory=list)
     weights: ScoringWeights | None = None
+    constraints: PlanConstraints | None = None
+    objective: PlanObjective = "per_slot"
 
 
 @dataclass(frozen=True)
@@ -131,6 +245,8 @@ class PlanResult:
     total_score: float
     actual_macros: NutritionalInfo
     target_macros: MacroTargets
+    optimal: bool = True  # see OptimalPlan
+    gap_bound: float = 0.0
 
 
 @dataclass(frozen=True)
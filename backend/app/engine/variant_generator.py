@@ -1,28 +1,175 @@
-"""Generate multiple diverse plan variants by excluding previously used meals."""
+"""Generate multiple diverse plan variants in one search over the per-slot rankings.
 
-from app.engine.daily_planner import generate_daily_plan
-from app.engine.types import Meal, PlanRequest, PlanResult
+Variants come out in score order: each one is the best plan that satisfies the
+diversity rule against every variant before it, so with min_differing_slots=1 the
+result is exactly the k best distinct plans.
+
+With the per-slot objective and no plan constraints the score is a sum of independent
+slot scores, so each step partitions the candidates per slot (Lawler-style) instead of
+re-running the planner:
+
+- Disjoint meals: each slot keeps a cursor into its ranking and skips used meal ids.
+  Used ids only grow, so the cursors never move back and all variants together walk
+  each ranking once.
+- At least m differing slots: in each slot a candidate either repeats a row of some
+  earlier variant or is new to that slot, and every new row differs from all earlier
+  variants there. The best new row therefore dominates the other new rows, which leaves
+  at most (variants so far + 1) candidates per slot for a small branch-and-bound.
+
+Other requests (plan constraints, daily_total) couple the slots and fall back to
+re-optimizing the prepared context with used meals excluded.
+"""
+
+from collections.abc import Sequence
+
+from app.engine.catalog import MealCatalog
+from app.engine.optimizer import RankedSlot
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.types import Meal, PlanRequest, PlanResult, VariantDiversity
+
+# Slack on bound comparisons: bounds and leaf totals are summed in different orders
+_BOUND_SLACK = 1e-12
 
 
 def generate_plan_variants(
-    meals: list[Meal],
+    meals: Sequence[Meal] | MealCatalog,
     request: PlanRequest,
     count: int = 3,
+    diversity: VariantDiversity = VariantDiversity(),
 ) -> list[PlanResult]:
-    """Generate up to `count` diverse daily plan variants.
+    """Generate up to `count` diverse daily plan variants, best first.
+
+    By default variants share no meals; `diversity.min_differing_slots` relaxes that to
+    "every pair of variants differs in at least that many slots". May return fewer than
+    `count` if the candidates run out.
 
-    Each variant excludes meals used in prior variants to ensure diversity.
-    May return fewer than `count` if insufficient meals remain.
+    Raises:
+        ValueError: If min_differing_slots is outside 1..number of slots, or is combined
+            with plan constraints or the daily_total objective.
     """
+    context = PreparedPlanContext(meals, request)
+    separable = request.objective == "per_slot" and (
+        request.constraints is None or request.constraints.is_empty
+    )
+
+    min_differing = diversity.min_differing_slots
+    if min_differing is not None:
+        if not 1 <= min_differing <= len(context.slot_allocations):
+            raise ValueError("min_differing_slots must be between 1 and the number of slots")
+        if not separable:
+            raise ValueError(
+                "min_differing_slots requires the per_slot objective without plan constraints"
+            )
+        return _differing_variants(context, count, min_differing)
+    if separable:
+        return _disjoint_variants(context, count)
+
     variants: list[PlanResult] = []
     used_meal_ids: set[str] = set()
-
     for _ in range(count):
-        available = [m for m in meals if m.id not in used_meal_ids]
-        result = generate_daily_plan(available, request)
+        result = context.plan(used_meal_ids)
         if result is None:
             break
         variants.append(result)
         used_meal_ids.update(item.meal.id for item in result.items)
+    return variants
+
 
+def _disjoint_variants(context: PreparedPlanContext, count: int) -> list[PlanResult]:
+    """Variants sharing no meals: the first unused row of every slot ranking."""
+    if not context.slot_allocations:
+        return []
+    cursors = [0] * len(context.ranked_by_slot)
+    used_meal_ids: set[str] = set()
+    variants: list[PlanResult] = []
+
+    for _ in range(count):
+        rows: list[int] = []
+        for s, (catalog, _, order) in enumerate(context.ranked_by_slot):
+            cursor = cursors[s]
+            while cursor < len(order) and catalog.ids[order[cursor]] in used_meal_ids:
+                cursor += 1
+            cursors[s] = cursor
+            if cursor == len(order):
+                return variants
+            rows.append(int(order[cursor]))
+
+        result = context.plan_for_rows(rows)
+        variants.append(result)
+        used_meal_ids.update(item.meal.id for item in result.items)
+    return variants
+
+
+def _differing_variants(
+    context: PreparedPlanContext, count: int, min_differing: int
+) -> list[PlanResult]:
+    """Variants where every pair differs in at least `min_differing` slots."""
+    if not context.slot_allocations:
+        return []
+    chosen: list[list[int]] = []
+    variants: list[PlanResult] = []
+
+    for _ in range(count):
+        rows = _best_differing_rows(context.ranked_by_slot, chosen, min_differing)
+        if rows is None:
+            break
+        chosen.append(rows)
+        variants.append(context.plan_for_rows(rows))
     return variants
+
+
+def _best_differing_rows(
+    ranked_by_slot: list[RankedSlot], chosen: list[list[int]], min_differing: int
+) -> list[int] | None:
+    """Best rows differing from each chosen plan in >= min_differing slots, or None.
+
+    Depth-first over the slots, candidates in ranking order, so the first plan found
+    with the best score is also first in (slot 0 rank, slot 1 rank, ...) order.
+    """
+    slot_count = len(ranked_by_slot)
+    candidates: list[list[int]] = []
+    for s, (_, _, order) in enumerate(ranked_by_slot):
+        repeated = {plan[s] for plan in chosen}
+        slot_candidates: list[int] = []
+        # Rows ranked after the best new row are dominated by it: they score no higher
+        # and differ from fewer chosen plans
+        for position in range(len(order)):
+            row = int(order[position])
+            slot_candidates.append(row)
+            if row not in repeated:
+                break
+        candidates.append(slot_candidates)
+
+    slot_scores = [scores for _, scores, _ in ranked_by_slot]
+    # suffix_best[s] = best possible score sum of slots s..end
+    suffix_best = [0.0] * (slot_count + 1)
+    for s in range(slot_count - 1, -1, -1):
+        suffix_best[s] = suffix_best[s + 1] + float(slot_scores[s][candidates[s][0]])
+
+    best_total = -1.0
+    best_rows: list[int] | None = None
+    rows = [0] * slot_count
+    differing = [0] * len(chosen)
+
+    def search(s: int, partial: float) -> None:
+        nonlocal best_total, best_rows
+        if s == slot_count:
+            if partial > best_total:
+                best_total = partial
+                best_rows = rows.copy()
+            return
+        remaining = slot_count - s - 1
+        for row in candidates[s]:
+            total = partial + float(slot_scores[s][row])
+            if total + suffix_best[s + 1] + _BOUND_SLACK <= best_total:
+                return  # candidates are in score order, so later ones bound lower
+            for j, plan in enumerate(chosen):
+                differing[j] += plan[s] != row
+            if all(d + remaining >= min_differing for d in differing):
+                rows[s] = row
+                search(s + 1, total)
+            for j, plan in enumerate(chosen):
+                differing[j] -= plan[s] != row
+
+    search(0, 0.0)
+    return best_rows
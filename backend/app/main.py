@@ -11,6 +11,9 @@ from fastapi.staticfiles import StaticFiles
 from app.config import settings
 from app.database import engine
 from app.middleware import RateLimitMiddleware, RequestLoggerMiddleware
+from app.rate_limit import create_rate_limiter
+from app.realtime.redis_pubsub import order_status_relay
+from app.realtime.sse_manager import sse_manager
 from app.redis import close_redis, get_redis
 from app.routes.admin import router as admin_router
 from app.routes.auth import router as auth_router
@@ -24,6 +27,8 @@ from app.routes.sse import router as sse_router
 from app.routes.subscriptions import router as subscriptions_router
 from app.routes.users import router as users_router
 from app.routes.webhooks import router as webhooks_router
+from app.services.catalog_snapshot import catalog_snapshots
+from app.services.engine_executor import engine_executor
 
 STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 
@@ -33,8 +38,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     # Startup
     if settings.redis_url:
         await get_redis()
+    await engine_executor.start()
+    await catalog_snapshots.start_listener()
+    await sse_manager.start()
+    await order_status_relay.start()
     yield
     # Shutdown
+    await order_status_relay.stop()
+    await sse_manager.stop()
+    await catalog_snapshots.stop_listener()
+    engine_executor.shutdown()
     await engine.dispose()
     if settings.redis_url:
         await close_redis()
@@ -44,7 +57,13 @@ def create_app() -> FastAPI:
     app = FastAPI(title="CalorieHero API", version="1.0.0", lifespan=lifespan)
 
     app.add_middleware(RequestLoggerMiddleware)
-    app.add_middleware(RateLimitMiddleware, requests_per_minute=100)
+    app.add_middleware(
+        RateLimitMiddleware,
+        limiter=create_rate_limiter(
+            settings.rate_limit_backend, settings.rate_limit_per_minute
+        ),
+        route_costs=settings.rate_limit_route_costs,
+    )
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -1,14 +1,18 @@
 """Request logging and rate limiting middleware (pure ASGI)."""
 
 import logging
+import math
 import time
-from collections import defaultdict
-from datetime import UTC, datetime
+from collections.abc import Mapping
 
-from starlette.requests import Request
+from jose import JWTError, jwt
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.config import settings
+from app.rate_limit import InMemoryRateLimiter, RateLimiter
+
 logger = logging.getLogger("caloriehero.access")
 
 
@@ -44,34 +48,68 @@ class RequestLoggerMiddleware:
 
 
 class RateLimitMiddleware:
-    """Simple in-memory rate limiting per client IP."""
-
-    def __init__(self, app: ASGIApp, *, requests_per_minute: int = 100) -> None:
+    """Token-bucket rate limiting per user (per client IP when unauthenticated).
+
+    Each request spends the cost of the longest `route_costs` prefix matching its
+    path (1 otherwise), so expensive routes use up the budget faster. Costs must lie
+    between 1 and the bucket size: a bigger one could never be paid.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        requests_per_minute: int = 100,
+        limiter: RateLimiter | None = None,
+        route_costs: Mapping[str, float] | None = None,
+    ) -> None:
         self.app = app
-        self.rpm = requests_per_minute
-        self._buckets: dict[str, list[float]] = defaultdict(list)
+        self.limiter = limiter or InMemoryRateLimiter(requests_per_minute)
+        for prefix, cost in (route_costs or {}).items():
+            if not 1 <= cost <= self.limiter.limit:
+                raise ValueError(
+                    f"Rate limit cost {cost} for {prefix!r} must be between 1 and the "
+                    f"bucket size {self.limiter.limit:g}"
+                )
+        # Longest prefix first, so the most specific route wins
+        self.route_costs = sorted(
+            (route_costs or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    def _cost(self, path: str) -> float:
+        for prefix, cost in self.route_costs:
+            if path.startswith(prefix):
+                return cost
+        return 1.0
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http" or scope["path"] == "/health":
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope)
-        client_ip = request.client.host if request.client else "unknown"
-        now = datetime.now(UTC).timestamp()
-        window_start = now - 60
-
-        # Clean old entries and append current
-        bucket = self._buckets[client_ip]
-        self._buckets[client_ip] = [t for t in bucket if t > window_start]
-        self._buckets[client_ip].append(now)
-
-        if len(self._buckets[client_ip]) > self.rpm:
+        decision = await self.limiter.hit(_client_key(scope), self._cost(scope["path"]))
+        if not decision.allowed:
             response = JSONResponse(
                 status_code=429,
                 content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": str(max(1, math.ceil(decision.retry_after_s)))},
             )
             await response(scope, receive, send)
             return
 
         await self.app(scope, receive, send)
+
+
+def _client_key(scope: Scope) -> str:
+    """Bucket key: the user id of a valid bearer token, otherwise the client IP."""
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            user_id = jwt.decode(token, settings.jwt_secret, algorithms=["HS256"]).get("sub")
+        except JWTError:
+            user_id = None
+        if user_id:
+            return f"user:{user_id}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
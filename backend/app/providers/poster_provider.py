@@ -2,6 +2,10 @@
 
 from typing import Protocol
 
+import httpx
+
+from app.config import settings
+
 # Poster status → CalorieHero status mapping
 POSTER_STATUS_MAP = {
     "new": "preparing",
@@ -29,40 +33,66 @@ class PosterProvider(Protocol):
 
 
 class RealPosterProvider:
-    def __init__(self, api_url: str, access_token: str) -> None:
+    """Poster REST client over one keep-alive connection pool.
+
+    The pool is created on first use and reused by every call, so a poll cycle pays
+    for at most `max_connections` TCP/TLS handshakes (default: the poller's
+    settings.poster_poll_concurrency). Call `aclose` on shutdown.
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        access_token: str,
+        max_connections: int | None = None,
+        timeout_s: float = 10.0,
+    ) -> None:
         self.api_url = api_url
         self.access_token = access_token
+        self.max_connections = max_connections or settings.poster_poll_concurrency
+        self.timeout_s = timeout_s
+        self._client: httpx.AsyncClient | None = None
 
     async def create_order(self, order_data: dict) -> str:
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"{self.api_url}/order.createOrder",
-                params={"token": self.access_token},
-                json=order_data,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            return str(data.get("response", {}).get("order_id", ""))
+        resp = await self._http().post(
+            f"{self.api_url}/order.createOrder",
+            params={"token": self.access_token},
+            json=order_data,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return str(data.get("response", {}).get("order_id", ""))
 
     async def get_order_status(self, poster_order_id: str) -> str | None:
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{self.api_url}/order.getOrder",
-                params={
-                    "token": self.access_token,
-                    "order_id": poster_order_id,
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            poster_status = (
-                data.get("response", {}).get("status", "")
+        resp = await self._http().get(
+            f"{self.api_url}/order.getOrder",
+            params={
+                "token": self.access_token,
+                "order_id": poster_order_id,
+            },
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        poster_status = (
+            data.get("response", {}).get("status", "")
+        )
+        return POSTER_STATUS_MAP.get(poster_status)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout_s,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
             )
-            return POSTER_STATUS_MAP.get(poster_status)
+        return self._client
 
 
 class MockPosterProvider:
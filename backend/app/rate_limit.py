@@ -0,0 +1,162 @@
+"""Rate limiter backends — token buckets, in-memory or shared through Redis.
+
+Each key (a user, or a client IP for anonymous requests) owns a bucket of `limit`
+tokens that refills continuously at `limit / window_s` tokens per second, and every
+request spends its route's cost. A bucket left alone for `window_s` is full again, so
+idle buckets are dropped without changing any decision.
+
+- InMemoryRateLimiter: O(1) per request, per worker process.
+- RedisRateLimiter: one atomic Lua script per request, shared by every worker. Falls
+  back to a per-process InMemoryRateLimiter while Redis is unconfigured or unreachable.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal, Protocol
+
+from redis.exceptions import RedisError
+
+from app.redis import RedisScript, get_redis
+
+logger = logging.getLogger(__name__)
+
+RateLimitBackend = Literal["memory", "redis"]
+
+KEY_PREFIX = "ratelimit:"
+
+# KEYS[1] = bucket; ARGV = limit, refill per ms, cost, ttl ms.
+# Uses the server clock, so workers with skewed clocks still share one timeline.
+# Returns {allowed, tokens left as a string} (Lua numbers would be truncated).
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + clock[2] / 1000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = limit
+if state[1] then
+  tokens = math.min(limit, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+end
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    remaining: float  # tokens left in the bucket
+    retry_after_s: float = 0.0  # until the rejected request's cost has refilled
+
+
+class RateLimiter(Protocol):
+    limit: float  # bucket size: the most one request can cost
+
+    async def hit(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        """Spend `cost` tokens from `key`'s bucket if it holds that many."""
+        ...
+
+
+class InMemoryRateLimiter:
+    def __init__(
+        self,
+        limit: float,
+        window_s: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = limit
+        self.window_s = window_s
+        self._rate = limit / window_s
+        self._clock = clock
+        # key -> [tokens, last hit], least recently hit first
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    @property
+    def tracked_keys(self) -> int:
+        return len(self._buckets)
+
+    async def hit(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        now = self._clock()
+        self._evict_idle(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.limit, now]
+        else:
+            bucket[0] = min(self.limit, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return RateLimitDecision(allowed=True, remaining=bucket[0])
+        return RateLimitDecision(
+            allowed=False,
+            remaining=bucket[0],
+            retry_after_s=(cost - bucket[0]) / self._rate,
+        )
+
+    def _evict_idle(self, now: float) -> None:
+        # Buckets are ordered by last hit, so the idle ones are all at the front
+        cutoff = now - self.window_s
+        while self._buckets:
+            key, bucket = next(iter(self._buckets.items()))
+            if bucket[1] > cutoff:
+                break
+            del self._buckets[key]
+
+
+class RedisRateLimiter:
+    def __init__(self, limit: float, window_s: float = 60.0) -> None:
+        self.limit = limit
+        self.window_s = window_s
+        self._rate = limit / window_s
+        self._fallback = InMemoryRateLimiter(limit, window_s)
+        self._script = RedisScript(TOKEN_BUCKET_SCRIPT)
+        self._degraded = False  # last call fell back because Redis failed
+
+    async def hit(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        client = await get_redis()
+        if client is None:
+            return await self._fallback.hit(key, cost)
+        try:
+            allowed, tokens = await self._script.on(client)(
+                keys=[KEY_PREFIX + key],
+                args=[self.limit, self._rate / 1000, cost, math.ceil(self.window_s * 1000)],
+            )
+        except RedisError:
+            if not self._degraded:
+                logger.warning("Rate limiter falling back to in-memory buckets", exc_info=True)
+                self._degraded = True
+            return await self._fallback.hit(key, cost)
+        if self._degraded:
+            logger.info("Rate limiter back on Redis")
+            self._degraded = False
+
+        remaining = float(tokens)
+        if int(allowed):
+            return RateLimitDecision(allowed=True, remaining=remaining)
+        return RateLimitDecision(
+            allowed=False,
+            remaining=remaining,
+            retry_after_s=(cost - remaining) / self._rate,
+        )
+
+
+def create_rate_limiter(
+    backend: RateLimitBackend, limit: float, window_s: float = 60.0
+) -> RateLimiter:
+    if backend == "redis":
+        return RedisRateLimiter(limit, window_s)
+    return InMemoryRateLimiter(limit, window_s)
@@ -1,41 +1,163 @@
-"""Redis pub/sub for order status changes."""
+"""Redis pub/sub for order status changes.
 
+Status changes are published on `order_status:{order_id}`. Each worker runs one
+OrderStatusRelay: a single pattern subscription to `order_status:*` that dispatches
+every message into the local SSEManager's `order:{order_id}` channel. However many
+orders are being tracked, a worker holds one Redis pub/sub connection.
+
+The publish script also assigns the event id from one Redis counter, so ids agree
+across workers and never repeat, and appends the event to a short per-order stream. A worker with
+no local history for an order (one started after a deploy, say) replays a
+reconnecting client's missed events from that stream.
+"""
+
+import asyncio
 import json
 import logging
+from dataclasses import dataclass
+
+from redis.exceptions import RedisError
 
-from app.redis import get_redis
+from app.config import settings
+from app.realtime.sse_manager import SSEEvent, SSEManager, events_after, sse_manager
+from app.redis import RedisScript, get_redis
 
 logger = logging.getLogger(__name__)
 
 CHANNEL_PREFIX = "order_status:"
+ORDER_STATUS_PATTERN = f"{CHANNEL_PREFIX}*"
+EVENT_ID_KEY = "order_status_event_id"
+HISTORY_PREFIX = "order_status_history:"
+HISTORY_TTL_S = 24 * 3600
 
+# KEYS[1] = event id counter, KEYS[2] = history stream; ARGV = channel, data JSON,
+# history length, history ttl. Atomic, so each channel's messages go out in id order.
+# Publishes {"id": <event id>, "data": <data>} and returns the event id.
+PUBLISH_SCRIPT = """
+local id = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', ARGV[3], '*', 'id', id, 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('PUBLISH', ARGV[1], '{"id": ' .. id .. ', "data": ' .. ARGV[2] .. '}')
+return id
+"""
 
-async def publish_order_status(order_id: str, status: str) -> None:
-    """Publish an order status change to Redis."""
-    redis = await get_redis()
-    if redis is None:
-        return
-    channel = f"{CHANNEL_PREFIX}{order_id}"
-    message = json.dumps({"order_id": order_id, "status": status})
-    await redis.publish(channel, message)
+_publish_script = RedisScript(PUBLISH_SCRIPT)
 
+# Reconnect backoff: doubles after every failed attempt, reset once subscribed
+RELAY_RETRY_DELAY = 0.5
+RELAY_MAX_RETRY_DELAY = 30.0
 
-async def subscribe_order_status(order_id: str):  # type: ignore[no-untyped-def]
-    """Subscribe to order status changes via Redis pub/sub.
 
-    Returns an async generator of status messages.
+def order_channel(order_id: str) -> str:
+    """SSEManager channel carrying one order's status updates."""
+    return f"order:{order_id}"
+
+
+async def publish_order_status(order_id: str, status: str) -> None:
+    """Publish an order status change to every worker's SSE subscribers.
+
+    Without Redis (or while it is unreachable) only this worker's subscribers hear it,
+    under an id the worker mints itself (see sse_manager).
     """
+    data = {"order_id": order_id, "status": status}
+    redis = await get_redis()
+    if redis is not None:
+        try:
+            await _publish_script.on(redis)(
+                keys=[EVENT_ID_KEY, f"{HISTORY_PREFIX}{order_id}"],
+                args=[
+                    f"{CHANNEL_PREFIX}{order_id}",
+                    json.dumps(data),
+                    max(1, settings.sse_replay_size),
+                    HISTORY_TTL_S,
+                ],
+            )
+            return
+        except RedisError:
+            logger.warning("Order status publish failed; delivering locally", exc_info=True)
+    sse_manager.publish_nowait(order_channel(order_id), data)
+
+
+async def order_status_history(order_id: str, last_event_id: str) -> list[SSEEvent]:
+    """Events for `order_id` missed since `last_event_id`, from its Redis stream."""
     redis = await get_redis()
     if redis is None:
-        return
-    channel = f"{CHANNEL_PREFIX}{order_id}"
-    pubsub = redis.pubsub()
-    await pubsub.subscribe(channel)
+        return []
     try:
-        async for message in pubsub.listen():
-            if message["type"] == "message":
-                data = json.loads(message["data"])
-                yield data
-    finally:
-        await pubsub.unsubscribe(channel)
-        await pubsub.close()
+        entries = await redis.xrange(f"{HISTORY_PREFIX}{order_id}")
+    except RedisError:
+        logger.warning("Order status history unavailable", exc_info=True)
+        return []
+    events = [SSEEvent(fields["id"], fields["data"]) for _, fields in entries]
+    return events_after(events, last_event_id)
+
+
+@dataclass
+class RelayStats:
+    redis_connections: int = 0  # pub/sub connections open right now (0 or 1)
+    connects: int = 0
+    messages: int = 0
+    errors: int = 0
+
+
+class OrderStatusRelay:
+    def __init__(self, manager: SSEManager = sse_manager) -> None:
+        self.manager = manager
+        self.stats = RelayStats()
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Start relaying Redis status messages into SSE (no-op without Redis)."""
+        if self._task is None and await get_redis() is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def dispatch(self, channel: str, data: str) -> None:
+        order_id = channel.removeprefix(CHANNEL_PREFIX)
+        try:
+            message = json.loads(data)
+            event_id, payload = str(int(message["id"])), message["data"]
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Ignoring malformed order status message on %s", channel)
+            return
+        self.stats.messages += 1
+        self.manager.publish_nowait(order_channel(order_id), payload, event_id)
+
+    async def _run(self) -> None:
+        delay = RELAY_RETRY_DELAY
+        while True:
+            redis = await get_redis()
+            if redis is None:
+                return
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.psubscribe(ORDER_STATUS_PATTERN)
+                self.stats.redis_connections += 1
+                self.stats.connects += 1
+                delay = RELAY_RETRY_DELAY
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            self.dispatch(message["channel"], message["data"])
+                finally:
+                    self.stats.redis_connections -= 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("Order status relay failed; reconnecting in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RELAY_MAX_RETRY_DELAY)
+            finally:
+                await pubsub.aclose()
+
+
+order_status_relay = OrderStatusRelay()
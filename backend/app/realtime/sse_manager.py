@@ -1,39 +1,368 @@
-"""SSE connection manager — asyncio.Queue per connection."""
+"""SSE connection manager — a bounded SSEConnection per client, one heartbeat ticker.
+
+Publishing never waits on a subscriber: each message is fanned out with put_nowait,
+and a connection whose buffer is full (a stalled tab, a slow network) is handled by
+the overflow policy instead of growing without bound:
+
+- "drop_oldest": discard the oldest queued message to make room.
+- "coalesce": discard what is queued from the new message's channel and keep only
+  the new message. Status channels carry full snapshots, so the latest one
+  supersedes the rest.
+- "disconnect": drop the subscriber; its stream ends and the client reconnects.
+
+Heartbeats come from one ticker per manager rather than a timer per connection.
+Connections sit on a timer wheel of HEARTBEAT_SLOTS slots; each tick visits one
+slot and queues HEARTBEAT_MESSAGE on every connection there that received nothing
+since the previous tick. A connection therefore never goes more than one interval
+plus one tick (heartbeat_s / HEARTBEAT_SLOTS) without a message or a ping.
+
+A connection may listen on several channels at once (`subscribe_many`), so one
+stream can carry every order a customer is tracking.
+
+Every published event gets an id. Normally the publisher assigns it from one Redis
+counter shared by all workers (see redis_pubsub), a plain increasing number. An
+event published without one (Redis down or unconfigured) gets "<epoch>-<n>" from
+this manager, where the epoch is random per process, so a minted id never passes
+for a Redis one or for another process's. The last `replay_size` events of each
+recently published channel stay in a ring buffer. A client reconnecting with
+Last-Event-ID gets the events it missed from `replay` instead of refetching the
+order (see events_after). Status events are full snapshots, so even a partial or
+repeated replay ends on the current status.
+"""
 
 import asyncio
 import json
 import logging
-from collections import defaultdict
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, replace
+from typing import Literal
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+OverflowPolicy = Literal["drop_oldest", "coalesce", "disconnect"]
+
+
+@dataclass(frozen=True, slots=True)
+class SSEEvent:
+    id: str
+    data: str
+    channel: str = ""
+
+
+# Published events always have an id, so neither marker can be mistaken for one.
+# Queued for a subscriber dropped by the "disconnect" policy to wake its stream
+DISCONNECT_MESSAGE = SSEEvent("", "")
+# Queued on an idle connection when its heartbeat is due
+HEARTBEAT_MESSAGE = SSEEvent("", "ping")
+
+HEARTBEAT_SLOTS = 30
+
+
+def global_event_id(event_id: str) -> int | None:
+    """The shared counter value of a publisher-assigned id; None for a minted one."""
+    return int(event_id) if event_id.isascii() and event_id.isdigit() else None
+
+
+def events_after(events: Sequence[SSEEvent], last_event_id: str) -> list[SSEEvent]:
+    """What a client that last saw `last_event_id` missed from `events`, oldest first.
+
+    When `last_event_id` is among `events`, everything after it. Otherwise a
+    publisher-assigned id still orders against the other publisher-assigned ids;
+    events with minted ids cannot be placed and are always included. A minted
+    `last_event_id` that is not found says nothing about what the client saw, so
+    every event is resent.
+    """
+    for index, event in enumerate(events):
+        if event.id == last_event_id:
+            return list(events[index + 1 :])
+    after = global_event_id(last_event_id)
+    if after is None:
+        return list(events)
+    return [
+        event for event in events
+        if (number := global_event_id(event.id)) is None or number > after
+    ]
+
+
+class SSEConnection:
+    """One client's bounded message buffer, with a queue-like interface.
+
+    Much smaller than an asyncio.Queue: a short list and at most one waiter future.
+    """
+
+    __slots__ = ("active_tick", "channels", "closed", "maxsize", "slot", "_buffer", "_waiter")
+
+    def __init__(self, maxsize: int, slot: int = 0, channels: tuple[str, ...] = ()) -> None:
+        self.maxsize = maxsize
+        self.slot = slot  # timer wheel slot
+        self.channels = channels
+        self.active_tick = -1  # manager tick during which it last received a message
+        self.closed = False  # dropped by the manager
+        self._buffer: list[SSEEvent] = []
+        self._waiter: asyncio.Future[None] | None = None
+
+    def qsize(self) -> int:
+        return len(self._buffer)
+
+    def empty(self) -> bool:
+        return not self._buffer
+
+    def full(self) -> bool:
+        return len(self._buffer) >= self.maxsize
+
+    def put_nowait(self, item: SSEEvent) -> None:
+        if len(self._buffer) >= self.maxsize:
+            raise asyncio.QueueFull
+        self._buffer.append(item)
+        self._wake()
+
+    def get_nowait(self) -> SSEEvent:
+        if not self._buffer:
+            raise asyncio.QueueEmpty
+        return self._buffer.pop(0)
+
+    async def get(self) -> SSEEvent:
+        while not self._buffer:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._buffer.pop(0)
+
+    def replace_with(self, item: SSEEvent) -> int:
+        """Discard everything queued and queue `item`; returns the discarded count."""
+        discarded = len(self._buffer)
+        self._buffer = [item]
+        self._wake()
+        return discarded
+
+    def coalesce(self, item: SSEEvent) -> int:
+        """Discard what is queued from `item`'s channel (or else the oldest event) and
+        queue `item`; returns the discarded count."""
+        kept = [event for event in self._buffer if event.channel != item.channel]
+        if len(kept) == len(self._buffer):
+            kept.pop(0)
+        discarded = len(self._buffer) - len(kept)
+        kept.append(item)
+        self._buffer = kept
+        return discarded
+
+    def shift_in(self, item: SSEEvent) -> None:
+        """Discard the oldest queued item and queue `item`."""
+        self._buffer.pop(0)
+        self._buffer.append(item)
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+
+@dataclass
+class SSEStats:
+    connections: int = 0
+    channels: int = 0
+    published: int = 0  # publish calls
+    delivered: int = 0  # messages queued to a subscriber
+    dropped: int = 0  # queued messages discarded by drop_oldest / coalesce
+    disconnected: int = 0  # subscribers dropped by the disconnect policy
+    heartbeats: int = 0  # pings queued on idle connections
+    replayed: int = 0  # events resent to reconnecting clients
+    history_channels: int = 0  # channels with a replay buffer
+    queued: int = 0  # messages waiting across all connections
+    max_queue_depth: int = 0
+
 
 class SSEManager:
-    def __init__(self) -> None:
-        self._connections: dict[str, list[asyncio.Queue[str]]] = defaultdict(list)
-
-    def subscribe(self, channel: str) -> asyncio.Queue[str]:
-        queue: asyncio.Queue[str] = asyncio.Queue()
-        self._connections[channel].append(queue)
-        logger.info("SSE subscribe: %s (total: %d)", channel, len(self._connections[channel]))
-        return queue
-
-    def unsubscribe(self, channel: str, queue: asyncio.Queue[str]) -> None:
-        if channel in self._connections:
-            self._connections[channel] = [
-                q for q in self._connections[channel] if q is not queue
-            ]
-            if not self._connections[channel]:
+    def __init__(
+        self,
+        queue_size: int = 16,
+        overflow: OverflowPolicy = "coalesce",
+        heartbeat_s: float = 30.0,
+        replay_size: int = 16,
+        replay_channels: int = 10_000,
+    ) -> None:
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.heartbeat_s = heartbeat_s
+        self._connections: dict[str, set[SSEConnection]] = defaultdict(set)
+        self._counters = SSEStats()
+        self._wheel: list[set[SSEConnection]] = [set() for _ in range(HEARTBEAT_SLOTS)]
+        self._slot = 0
+        self._ticks = 0  # ticks since start; publish stamps connections with it
+        self._ticker: asyncio.Task[None] | None = None
+        self.replay_size = replay_size
+        self.replay_channels = replay_channels
+        # channel -> its last replay_size events, least recently published first
+        self._history: OrderedDict[str, deque[SSEEvent]] = OrderedDict()
+        self.epoch = uuid.uuid4().hex[:8]  # prefixes the ids this manager mints
+        self._minted = 0
+
+    def subscribe(self, channel: str) -> SSEConnection:
+        return self.subscribe_many((channel,))
+
+    def subscribe_many(self, channels: Iterable[str]) -> SSEConnection:
+        """One connection receiving the events of every channel in `channels`."""
+        # Joining the slot just visited puts the first check a full interval away
+        connection = SSEConnection(self.queue_size, self._slot, tuple(dict.fromkeys(channels)))
+        for channel in connection.channels:
+            self._connections[channel].add(connection)
+        self._wheel[self._slot].add(connection)
+        logger.debug("SSE subscribe: %s", ", ".join(connection.channels))
+        return connection
+
+    def unsubscribe(self, channel: str, connection: SSEConnection) -> None:
+        connections = self._connections.get(channel)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
                 del self._connections[channel]
+        # Keep the heartbeat while another of its channels still delivers to it
+        if not any(connection in self._connections.get(c, ()) for c in connection.channels):
+            self._wheel[connection.slot].discard(connection)
 
-    async def publish(self, channel: str, data: dict) -> None:
-        message = json.dumps(data)
-        queues = self._connections.get(channel, [])
-        for queue in queues:
-            await queue.put(message)
+    def unsubscribe_all(self, connection: SSEConnection) -> None:
+        """Remove `connection` from every channel it was subscribed to."""
+        for channel in connection.channels:
+            self.unsubscribe(channel, connection)
+        # unsubscribe only leaves the wheel per channel, which misses a channel-less one
+        self._wheel[connection.slot].discard(connection)
+
+    async def publish(self, channel: str, data: dict, event_id: str | None = None) -> str:
+        return self.publish_nowait(channel, data, event_id)
+
+    def publish_nowait(self, channel: str, data: dict, event_id: str | None = None) -> str:
+        """Queue `data` for every subscriber of `channel` without waiting on any.
+
+        Returns the event's id: `event_id` when the publisher assigned one, otherwise
+        a new "<epoch>-<n>" id minted here.
+        """
+        self._counters.published += 1
+        if event_id is None:
+            self._minted += 1
+            event_id = f"{self.epoch}-{self._minted}"
+        message = SSEEvent(event_id, json.dumps(data), channel)
+        self._remember(channel, message)
+        connections = self._connections.get(channel)
+        if not connections:
+            return event_id
+        overflowed: list[SSEConnection] = []
+        for connection in connections:
+            connection.active_tick = self._ticks
+            if connection.full():  # cheaper than catching QueueFull from thousands of stalled tabs
+                overflowed.append(connection)
+            else:
+                connection.put_nowait(message)
+        self._counters.delivered += len(connections) - len(overflowed)
+        for connection in overflowed:
+            self._overflow(channel, connection, message)
+        return event_id
+
+    def replay(self, channel: str, last_event_id: str) -> list[SSEEvent] | None:
+        """Buffered events on `channel` missed by a client that last saw `last_event_id`.
+
+        None when this worker holds no history for the channel (nothing published
+        here recently), so the caller can look elsewhere.
+        """
+        history = self._history.get(channel)
+        if history is None:
+            return None
+        missed = events_after(list(history), last_event_id)
+        self._counters.replayed += len(missed)
+        return missed
+
+    def _remember(self, channel: str, event: SSEEvent) -> None:
+        if self.replay_size < 1:
+            return
+        history = self._history.get(channel)
+        if history is None:
+            history = self._history[channel] = deque(maxlen=self.replay_size)
+            if len(self._history) > self.replay_channels:
+                self._history.popitem(last=False)
+        else:
+            self._history.move_to_end(channel)
+        history.append(event)
+
+    def _overflow(self, channel: str, connection: SSEConnection, message: SSEEvent) -> None:
+        if self.overflow == "coalesce":
+            self._counters.dropped += connection.coalesce(message)
+        elif self.overflow == "drop_oldest":
+            connection.shift_in(message)
+            self._counters.dropped += 1
+        else:
+            self.unsubscribe_all(connection)
+            self._counters.dropped += connection.replace_with(DISCONNECT_MESSAGE)
+            self._counters.disconnected += 1
+            connection.closed = True
+            logger.info("SSE subscriber on %s disconnected: queue full", channel)
+            return
+        self._counters.delivered += 1
+
+    def tick(self) -> int:
+        """Advance the heartbeat wheel one slot; returns how many pings were queued."""
+        self._slot = (self._slot + 1) % HEARTBEAT_SLOTS
+        self._ticks += 1
+        # A message since the previous tick keeps the connection within one interval
+        # plus one tick of its next visit; anything older would let it go ~2 intervals
+        recent = self._ticks - 1
+        pinged = 0
+        for connection in self._wheel[self._slot]:
+            if connection.active_tick < recent and connection.empty():
+                connection.put_nowait(HEARTBEAT_MESSAGE)
+                pinged += 1
+        self._counters.heartbeats += pinged
+        return pinged
+
+    async def start(self) -> None:
+        """Start the heartbeat ticker (once per process, from the app lifespan)."""
+        if self._ticker is None:
+            self._ticker = asyncio.create_task(self._run_ticker())
+
+    async def stop(self) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+
+    async def _run_ticker(self) -> None:
+        interval = self.heartbeat_s / HEARTBEAT_SLOTS
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + interval
+        while True:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            next_tick += interval
+            self.tick()
 
     def connection_count(self, channel: str) -> int:
-        return len(self._connections.get(channel, []))
+        return len(self._connections.get(channel, ()))
+
+    def stats(self) -> SSEStats:
+        """Counters plus current connection and queue-depth gauges (O(connections))."""
+        # A connection on several channels is counted once
+        unique = set().union(*self._connections.values())
+        depths = [connection.qsize() for connection in unique]
+        return replace(
+            self._counters,
+            connections=len(depths),
+            channels=len(self._connections),
+            history_channels=len(self._history),
+            queued=sum(depths),
+            max_queue_depth=max(depths, default=0),
+        )
 
 
-sse_manager = SSEManager()
+sse_manager = SSEManager(
+    queue_size=settings.sse_queue_size,
+    overflow=settings.sse_overflow_policy,
+    heartbeat_s=settings.sse_heartbeat_s,
+    replay_size=settings.sse_replay_size,
+)
@@ -1,4 +1,5 @@
 import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
 
 from app.config import settings
 
@@ -19,3 +20,22 @@ async def close_redis() -> None:
     if redis_client is not None:
         await redis_client.close()
         redis_client = None
+
+
+class RedisScript:
+    """A Lua script registered lazily on whichever client get_redis() returns.
+
+    The registered script sends EVALSHA and reloads the script if Redis lost it
+    (NOSCRIPT); it is registered again when the client changes.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._script: AsyncScript | None = None
+        self._client: aioredis.Redis | None = None
+
+    def on(self, client: aioredis.Redis) -> AsyncScript:
+        if self._script is None or self._client is not client:
+            self._script = client.register_script(self.source)
+            self._client = client
+        return self._script
@@ -1,5 +1,6 @@
-"""Admin routes — dashboard stats, all-orders list, all-users list."""
+"""Admin routes — dashboard stats, all-orders list, all-users list, plan cache and SSE stats."""
 
+from dataclasses import asdict
 from typing import Annotated
 
 from fastapi import APIRouter, Depends
@@ -14,6 +15,9 @@ from app.models.meal import Meal
 from app.models.order import Order
 from app.models.subscription import Subscription
 from app.models.user import User
+from app.realtime.redis_pubsub import order_status_relay
+from app.realtime.sse_manager import sse_manager
+from app.services.plan_cache import plan_cache
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
 
@@ -27,6 +31,34 @@ class DashboardStats(BaseModel):
     orders_by_status: dict[str, int]
 
 
+class PlanCacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    expired: int
+    evicted: int
+    invalidations: int
+    size: int
+    max_entries: int
+
+
+class SSEStatsResponse(BaseModel):
+    connections: int
+    channels: int
+    published: int
+    delivered: int
+    dropped: int
+    disconnected: int
+    heartbeats: int
+    replayed: int
+    history_channels: int
+    queued: int
+    max_queue_depth: int
+    queue_size: int
+    overflow_policy: str
+    redis_connections: int  # pub/sub connections held by the order status relay
+    relayed_messages: int
+
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     db: Annotated[AsyncSession, Depends(get_db)],
@@ -111,3 +143,35 @@ async def list_all_users(
         }
         for u in users
     ]
+
+
+@router.get("/plan-cache", response_model=PlanCacheStatsResponse)
+async def get_plan_cache_stats(
+    _admin: Annotated[User, Depends(get_current_admin)],
+) -> PlanCacheStatsResponse:
+    """This worker's plan cache counters."""
+    stats = plan_cache.stats
+    return PlanCacheStatsResponse(
+        hits=stats.hits,
+        misses=stats.misses,
+        expired=stats.expired,
+        evicted=stats.evicted,
+        invalidations=stats.invalidations,
+        size=stats.size,
+        max_entries=plan_cache.max_entries,
+    )
+
+
+@router.get("/sse", response_model=SSEStatsResponse)
+async def get_sse_stats(
+    _admin: Annotated[User, Depends(get_current_admin)],
+) -> SSEStatsResponse:
+    """This worker's SSE connections, queue depths, overflow and relay counters."""
+    stats = sse_manager.stats()
+    return SSEStatsResponse(
+        **asdict(stats),
+        queue_size=sse_manager.queue_size,
+        overflow_policy=sse_manager.overflow,
+        redis_connections=order_status_relay.stats.redis_connections,
+        relayed_messages=order_status_relay.stats.messages,
+    )
@@ -2,14 +2,18 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.engine.types import EngineStats
 from app.models.user import User
 from app.schemas.matching import RecalculatePlanRequest, SlotAlternativesRequest
+from app.services.engine_executor import EngineBusyError, EngineCancelledError
 from app.services.plan_service import (
+    engine_stats_json,
     generate_multi_day_plan_for_user,
     generate_plan_for_user,
     generate_plans_for_user,
@@ -20,6 +24,28 @@ from app.services.plan_service import (
 
 router = APIRouter(prefix="/api/v1/matching", tags=["matching"])
 
+# Non-standard "client closed request" status: nobody is left to read the response
+CLIENT_CLOSED_REQUEST = 499
+
+
+def _engine_unavailable(e: EngineBusyError | EngineCancelledError) -> HTTPException:
+    if isinstance(e, EngineBusyError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    return HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail=str(e))
+
+
+def _debug_stats() -> EngineStats | None:
+    return EngineStats() if settings.engine_debug_stats else None
+
+
+def _attach_stats(response: Response, stats: EngineStats | None) -> None:
+    if stats is not None:
+        response.headers["X-Engine-Stats"] = engine_stats_json(stats)
+
 
 @router.post("/meals")
 async def match_meals_route(
@@ -37,56 +63,86 @@ async def match_meals_route(
 
 @router.post("/plan")
 async def generate_plan_route(
+    request: Request,
+    response: Response,
     user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> dict:
+    stats = _debug_stats()
     try:
-        result = await generate_plan_for_user(db, user.id)
+        result = await generate_plan_for_user(
+            db, user.id, is_disconnected=request.is_disconnected, stats=stats
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         )
+    except (EngineBusyError, EngineCancelledError) as e:
+        raise _engine_unavailable(e)
     if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not generate plan — no suitable meals found",
         )
+    _attach_stats(response, stats)
     return result
 
 
 @router.post("/plans")
 async def generate_plans_route(
+    request: Request,
     user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     count: Annotated[int, Query(ge=1, le=5)] = 3,
+    min_differing_slots: Annotated[int | None, Query(ge=1, le=4)] = None,
 ) -> list[dict]:
-    """Generate multiple plan variants for comparison."""
+    """Generate multiple plan variants for comparison.
+
+    Variants share no meals unless `min_differing_slots` is given, in which case each
+    pair of variants only has to differ in that many slots.
+    """
     try:
-        return await generate_plans_for_user(db, user.id, count=count)
+        return await generate_plans_for_user(
+            db,
+            user.id,
+            count=count,
+            min_differing_slots=min_differing_slots,
+            is_disconnected=request.is_disconnected,
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         )
+    except (EngineBusyError, EngineCancelledError) as e:
+        raise _engine_unavailable(e)
 
 
 @router.post("/multi-day-plan")
 async def generate_multi_day_plan_route(
+    request: Request,
+    response: Response,
     user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     days: Annotated[int, Query(ge=4, le=30)] = 7,
 ) -> dict:
     """Generate a multi-day meal plan."""
+    stats = _debug_stats()
     try:
-        result = await generate_multi_day_plan_for_user(db, user.id, days)
+        result = await generate_multi_day_plan_for_user(
+            db, user.id, days, is_disconnected=request.is_disconnected, stats=stats
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
         )
+    except (EngineBusyError, EngineCancelledError) as e:
+        raise _engine_unavailable(e)
     if result is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not generate multi-day plan — no suitable meals found",
         )
+    _attach_stats(response, stats)
     return result
 
 
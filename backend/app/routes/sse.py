@@ -1,47 +1,135 @@
 """SSE routes — real-time order status updates."""
 
-import asyncio
+import math
 import uuid
+from collections.abc import AsyncIterator
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.realtime.sse_manager import sse_manager
-from app.services.order_service import get_order
+from app.realtime.redis_pubsub import order_channel, order_status_history
+from app.realtime.sse_manager import (
+    HEARTBEAT_MESSAGE,
+    SSEEvent,
+    global_event_id,
+    sse_manager,
+)
+from app.services.order_service import owned_order_ids
 
 router = APIRouter(prefix="/api/v1/sse", tags=["sse"])
 
+# Orders one multiplexed stream may follow
+MAX_STREAM_ORDERS = 50
+# sse_starlette ping interval: effectively never. The manager's shared ticker sends
+# heartbeats; ping=0 only disables sse_starlette's pinger in its newer releases
+NO_PING_S = 365 * 24 * 3600
+
+
+@router.get("/orders")
+async def stream_orders_status(
+    user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    order_ids: Annotated[list[uuid.UUID] | None, Query()] = None,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> EventSourceResponse:
+    """Stream status changes of several orders over one connection.
+
+    Follows the given `order_ids` (repeat the parameter), or else every unfinished
+    order of the caller at connect time (404 when there is none). Each event's data
+    names its order_id.
+    """
+    if order_ids is not None:
+        order_ids = list(dict.fromkeys(order_ids))
+        if len(order_ids) > MAX_STREAM_ORDERS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"At most {MAX_STREAM_ORDERS} orders per stream",
+            )
+    owned = await owned_order_ids(db, user.id, order_ids, limit=MAX_STREAM_ORDERS)
+    if order_ids is not None and len(owned) < len(order_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Order not found",
+        )
+    if not owned:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No unfinished orders to stream",
+        )
+    return _stream([str(order_id) for order_id in owned], last_event_id)
+
 
 @router.get("/orders/{order_id}")
 async def stream_order_status(
     order_id: uuid.UUID,
     user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    last_event_id: Annotated[str | None, Header()] = None,
 ) -> EventSourceResponse:
-    order = await get_order(db, order_id)
-    if order is None or order.user_id != user.id:
+    """Stream an order's status changes.
+
+    A reconnecting EventSource sends Last-Event-ID; the events it missed are sent
+    first, from this worker's replay buffer or the order's Redis history.
+    """
+    if not await owned_order_ids(db, user.id, [order_id]):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found",
         )
+    return _stream([str(order_id)], last_event_id)
+
 
-    channel = f"order:{order_id}"
-    queue = sse_manager.subscribe(channel)
+def _stream(order_ids: list[str], last_event_id: str | None) -> EventSourceResponse:
+    channels = [order_channel(order_id) for order_id in order_ids]
+    connection = sse_manager.subscribe_many(channels)
 
-    async def event_generator():  # type: ignore[no-untyped-def]
+    async def event_generator() -> AsyncIterator[dict[str, str]]:
         try:
+            # Subscribed before the replay lookup, so nothing published in between is
+            # lost; events already replayed are skipped when they arrive again
+            replayed: set[str] = set()
+            if last_event_id and sse_manager.replay_size > 0:
+                for event in await _missed_events(order_ids, last_event_id):
+                    replayed.add(event.id)
+                    yield {"id": event.id, "event": "status", "data": event.data}
             while True:
-                try:
-                    data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield {"event": "status", "data": data}
-                except TimeoutError:
+                event = await connection.get()
+                if connection.closed:
+                    # Dropped for falling behind; the browser's EventSource reconnects
+                    break
+                if event is HEARTBEAT_MESSAGE:
                     yield {"event": "ping", "data": ""}
+                elif event.id in replayed:
+                    replayed.discard(event.id)
+                else:
+                    yield {"id": event.id, "event": "status", "data": event.data}
         finally:
-            sse_manager.unsubscribe(channel, queue)
+            sse_manager.unsubscribe_all(connection)
+
+    return EventSourceResponse(event_generator(), ping=NO_PING_S)
+
+
+async def _missed_events(order_ids: list[str], last_event_id: str) -> list[SSEEvent]:
+    """Events missed since `last_event_id` across `order_ids`.
+
+    In shared-counter order; events with worker-minted ids (published while Redis was
+    down) cannot be placed among those and keep their per-order order at the end.
+    """
+    missed: list[SSEEvent] = []
+    for order_id in order_ids:
+        events = sse_manager.replay(order_channel(order_id), last_event_id)
+        if events is None:  # nothing published on this worker lately, e.g. just deployed
+            events = await order_status_history(order_id, last_event_id)
+        missed.extend(events)
+    missed.sort(key=_shared_order)
+    return missed
+
 
-    return EventSourceResponse(event_generator())
+def _shared_order(event: SSEEvent) -> float:
+    number = global_event_id(event.id)
+    return math.inf if number is None else number
@@ -0,0 +1,183 @@
+"""Active-catalog snapshot — the active meals, loaded once and shared by every request.
+
+Matching and planning used to SELECT every active meal and convert it to an engine
+Meal on every request. CatalogSnapshotService keeps one immutable CatalogSnapshot
+(engine meals, their MealCatalog and the DB rows by id) per catalog version:
+
+- Writes: meal_service calls `refresh` after committing a create/update/delete. The
+  new snapshot is loaded and swapped in with a single assignment, so requests already
+  holding the old snapshot finish on it and no request ever sees a half-built one.
+- Versions: a per-process counter, bumped on every invalidation. The version doubles
+  as the catalog key for caches and the engine executor.
+- Other workers: `refresh` publishes on CATALOG_CHANNEL; every worker's listener
+  invalidates its snapshot, and the next request there reloads it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.engine.catalog import MealCatalog
+from app.engine.types import Meal as EngineMeal
+from app.engine.types import NutritionalInfo
+from app.models.meal import Meal
+from app.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "catalog:invalidate"
+# Seconds to wait before resubscribing after the Redis connection drops
+LISTENER_RETRY_DELAY = 1.0
+
+
+def db_meal_to_engine(meal: Meal) -> EngineMeal:
+    """Convert SQLAlchemy Meal to engine Meal dataclass."""
+    return EngineMeal(
+        id=str(meal.id),
+        name=meal.name,
+        description=meal.description,
+        category=meal.category,
+        nutritional_info=NutritionalInfo(
+            calories=meal.calories,
+            protein=meal.protein,
+            carbs=meal.carbs,
+            fat=meal.fat,
+        ),
+        serving_size=meal.serving_size,
+        price=meal.price,
+        allergens=meal.allergens or [],
+        dietary_tags=meal.dietary_tags or [],
+    )
+
+
+def _detached_copy(meal: Meal) -> Meal:
+    """Transient copy of a loaded row, so the caller's session keeps its own object."""
+    columns = inspect(Meal).column_attrs
+    return Meal(**{attr.key: getattr(meal, attr.key) for attr in columns})
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    meals: tuple[EngineMeal, ...]
+    catalog: MealCatalog
+    # Session-less copies of the rows: no session can expire, refresh or modify them
+    db_meals_by_id: Mapping[str, Meal]
+
+    @property
+    def key(self) -> str:
+        """Catalog key for the engine executor and plan caches."""
+        return f"catalog-v{self.version}"
+
+
+class CatalogSnapshotService:
+    def __init__(self) -> None:
+        self._version = 1
+        self._snapshot: CatalogSnapshot | None = None
+        self._lock = asyncio.Lock()
+        self._listener: asyncio.Task[None] | None = None
+        # Tags this worker's invalidation messages so it skips its own
+        self._origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        """Current snapshot, loading it with `db` if it is missing or stale."""
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        async with self._lock:
+            # Another request may have loaded it while this one waited
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != self._version:
+                snapshot = await self._load(db, self._version)
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        """Mark the current snapshot stale; the next `get` loads a new version."""
+        self._version += 1
+
+    async def refresh(self, db: AsyncSession) -> CatalogSnapshot:
+        """Invalidate everywhere and swap in a freshly loaded snapshot.
+
+        Call after committing a change to the meals table.
+        """
+        self.invalidate()
+        await self._publish_invalidation()
+        return await self.get(db)
+
+    async def _load(self, db: AsyncSession, version: int) -> CatalogSnapshot:
+        result = await db.execute(select(Meal).where(Meal.active.is_(True)))
+        db_meals = [_detached_copy(m) for m in result.scalars().all()]
+        meals = tuple(db_meal_to_engine(m) for m in db_meals)
+        logger.info("Catalog snapshot v%d loaded: %d active meals", version, len(meals))
+        return CatalogSnapshot(
+            version=version,
+            meals=meals,
+            catalog=MealCatalog(meals),
+            db_meals_by_id=MappingProxyType({str(m.id): m for m in db_meals}),
+        )
+
+    async def _publish_invalidation(self) -> None:
+        redis = await get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.publish(CATALOG_CHANNEL, json.dumps({"origin": self._origin}))
+        except Exception:
+            # Other workers stay stale until their next invalidation; this one is fresh
+            logger.exception("Failed to publish catalog invalidation")
+
+    def handle_message(self, data: str) -> None:
+        """Apply an invalidation message published by some worker."""
+        if json.loads(data).get("origin") != self._origin:
+            self.invalidate()
+
+    async def start_listener(self) -> None:
+        """Follow other workers' invalidations (no-op without Redis)."""
+        if self._listener is None and await get_redis() is not None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            redis = await get_redis()
+            if redis is None:
+                return
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(CATALOG_CHANNEL)
+                # Writes missed while (re)subscribing are covered by invalidating now
+                self.invalidate()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.handle_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalog invalidation listener failed; resubscribing")
+                await asyncio.sleep(LISTENER_RETRY_DELAY)
+            finally:
+                await pubsub.aclose()
+
+
+catalog_snapshots = CatalogSnapshotService()
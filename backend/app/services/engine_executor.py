@@ -0,0 +1,246 @@
+"""Engine executor — run CPU-bound meal plan engine calls off the event loop.
+
+The engine is synchronous NumPy/Python; calling it inside an `async def` handler stalls
+every other request on the worker (including SSE heartbeats) for the whole plan.
+EngineExecutor runs engine functions in a process pool instead:
+
+- Warm catalogs: each worker process keeps the MealCatalog of the latest catalog keys,
+  so a job normally ships only its key and small arguments. A worker that has not seen
+  the key answers with _CatalogMissingError and the job is resent once with the meals.
+- Bounded queue: at most `max_pending` jobs are queued or running; further jobs fail
+  fast with EngineBusyError instead of piling up behind a saturated pool.
+- Engine stats: a job given an EngineStats runs with a fresh one in the worker, which
+  comes back with the result and is added into the caller's.
+- Cancellation: when the awaiting request is cancelled, or its `is_disconnected`
+  callback reports the client gone, the job is cancelled if it has not started. A
+  running job cannot be interrupted; the plan search deadline bounds it.
+
+Modes: "process" (default), "thread" (shares the GIL; NumPy kernels still release it)
+and "inline" (runs on the loop — for tests and single-user development).
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Any, Literal
+
+from app.config import settings
+from app.engine.catalog import MealCatalog
+from app.engine.types import EngineStats, Meal
+
+logger = logging.getLogger(__name__)
+
+EngineExecutorMode = Literal["inline", "thread", "process"]
+
+# Catalogs kept per process (the current one plus one being replaced)
+CATALOG_CACHE_SIZE = 2
+# Seconds between client-disconnect checks while a job is pending
+DISCONNECT_POLL_INTERVAL = 0.1
+
+
+class EngineBusyError(RuntimeError):
+    """Raised when the engine queue already holds `max_pending` jobs."""
+
+
+class EngineCancelledError(RuntimeError):
+    """Raised when a job was cancelled because its client disconnected."""
+
+
+class _CatalogMissingError(Exception):
+    """Raised in a worker asked to use a catalog key it has not loaded."""
+
+
+@dataclass
+class EngineExecutorStats:
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    cancelled: int = 0
+    catalog_loads: int = 0  # jobs resent with meals to a cold worker
+    in_flight: int = 0
+
+
+# Per-process catalog cache (the worker's, or the API process's in inline/thread mode)
+_catalogs: OrderedDict[str, MealCatalog] = OrderedDict()
+
+
+def _catalog_for(key: str, meals: Sequence[Meal] | None) -> MealCatalog:
+    catalog = _catalogs.get(key)
+    if catalog is not None:
+        _catalogs.move_to_end(key)
+        return catalog
+    if meals is None:
+        raise _CatalogMissingError(key)
+    catalog = MealCatalog(meals)
+    _catalogs[key] = catalog
+    while len(_catalogs) > CATALOG_CACHE_SIZE:
+        _catalogs.popitem(last=False)
+    return catalog
+
+
+def _run_job(
+    catalog_key: str,
+    meals: Sequence[Meal] | None,
+    fn: Callable[..., Any],
+    args: tuple[object, ...],
+    with_stats: bool = False,
+) -> Any:
+    catalog = _catalog_for(catalog_key, meals)
+    if not with_stats:
+        return fn(catalog, *args)
+    stats = EngineStats()
+    return fn(catalog, *args, stats=stats), stats
+
+
+def _add_stats(total: EngineStats, job: EngineStats) -> None:
+    for f in fields(EngineStats):
+        if f.name == "candidates_per_slot":
+            total.candidates_per_slot.update(job.candidates_per_slot)
+        else:
+            setattr(total, f.name, getattr(total, f.name) + getattr(job, f.name))
+
+
+def _warm_worker() -> None:
+    """Process pool initializer: import the engine before the first job arrives."""
+    import app.engine  # noqa: F401
+
+
+def _noop() -> None:
+    return None
+
+
+class EngineExecutor:
+    def __init__(
+        self,
+        mode: EngineExecutorMode = "process",
+        max_workers: int | None = None,
+        max_pending: int = 32,
+    ) -> None:
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.stats = EngineExecutorStats()
+        self._pool: Executor | None = None
+
+    def _ensure_pool(self) -> Executor | None:
+        if self.mode == "inline":
+            return None
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="engine"
+                )
+            else:
+                # spawn: forking a process that runs an event loop and threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_worker,
+                )
+        return self._pool
+
+    async def start(self) -> None:
+        """Start every worker now so the first requests don't pay for process spawn."""
+        pool = self._ensure_pool()
+        if pool is None:
+            return
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, _noop) for _ in range(self.max_workers))
+        )
+        logger.info("Engine executor started: %s x%d", self.mode, self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def run(
+        self,
+        catalog_key: str,
+        meals: Sequence[Meal],
+        fn: Callable[..., Any],
+        *args: object,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        stats: EngineStats | None = None,
+    ) -> Any:
+        """Run `fn(catalog, *args)` against the catalog identified by `catalog_key`.
+
+        `fn` must be a module-level function (it is pickled by reference). `meals` are
+        only sent to workers that don't hold `catalog_key` yet. With `stats`, `fn` must
+        accept a `stats` keyword; what it records is added into `stats`.
+
+        Raises:
+            EngineBusyError: If `max_pending` jobs are already queued or running.
+            EngineCancelledError: If `is_disconnected` reported the client gone.
+        """
+        if self.stats.in_flight >= self.max_pending:
+            self.stats.rejected += 1
+            raise EngineBusyError("Meal plan engine is busy, try again shortly")
+
+        self.stats.submitted += 1
+        self.stats.in_flight += 1
+        try:
+            job = functools.partial(
+                _run_job, fn=fn, args=args, with_stats=stats is not None
+            )
+            pool = self._ensure_pool()
+            if pool is None:
+                result = job(catalog_key, meals)
+            else:
+                # Threads share this process's cache, so they can always be sent the meals
+                first_meals = meals if self.mode == "thread" else None
+                try:
+                    result = await self._submit(
+                        pool, functools.partial(job, catalog_key, first_meals), is_disconnected
+                    )
+                except _CatalogMissingError:
+                    self.stats.catalog_loads += 1
+                    result = await self._submit(
+                        pool, functools.partial(job, catalog_key, meals), is_disconnected
+                    )
+            self.stats.completed += 1
+            if stats is not None:
+                result, job_stats = result
+                _add_stats(stats, job_stats)
+            return result
+        finally:
+            self.stats.in_flight -= 1
+
+    async def _submit(
+        self,
+        pool: Executor,
+        job: Callable[[], Any],
+        is_disconnected: Callable[[], Awaitable[bool]] | None,
+    ) -> Any:
+        loop = asyncio.get_running_loop()
+        # Cancelling this asyncio future also cancels the pool's future if still queued
+        future = loop.run_in_executor(pool, job)
+        try:
+            if is_disconnected is None:
+                return await future
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=DISCONNECT_POLL_INTERVAL)
+                if done:
+                    return future.result()
+                if await is_disconnected():
+                    future.cancel()
+                    self.stats.cancelled += 1
+                    raise EngineCancelledError("Client disconnected")
+        except asyncio.CancelledError:
+            future.cancel()
+            self.stats.cancelled += 1
+            raise
+
+
+engine_executor = EngineExecutor(
+    mode=settings.engine_executor,
+    max_workers=settings.engine_workers or None,
+    max_pending=settings.engine_max_pending,
+)
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.meal import Meal
 from app.schemas.meal import MealCreate, MealUpdate
+from app.services.catalog_snapshot import catalog_snapshots
 
 
 async def list_meals(
@@ -35,6 +36,7 @@ async def create_meal(db: AsyncSession, data: MealCreate) -> Meal:
     db.add(meal)
     await db.commit()
     await db.refresh(meal)
+    await catalog_snapshots.refresh(db)
     return meal
 
 
@@ -49,6 +51,7 @@ async def update_meal(
         setattr(meal, key, value)
     await db.commit()
     await db.refresh(meal)
+    await catalog_snapshots.refresh(db)
     return meal
 
 
@@ -59,4 +62,5 @@ async def delete_meal(db: AsyncSession, meal_id: uuid.UUID) -> Meal | None:
     meal.active = False
     await db.commit()
     await db.refresh(meal)
+    await catalog_snapshots.refresh(db)
     return meal
@@ -1,6 +1,7 @@
 """Order service — create, list, get, update status."""
 
 import uuid
+from collections.abc import Collection
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,8 +9,10 @@ from sqlalchemy.orm import selectinload
 
 from app.models.meal import Meal
 from app.models.order import Order, OrderItem
+from app.realtime.redis_pubsub import publish_order_status
+from app.schemas.common import OrderStatus
 from app.schemas.order import OrderCreate
-from app.services.pricing_service import calculate_item_price
+from app.services.pricing_service import price_items_bulk
 
 
 async def create_order(
@@ -45,9 +48,13 @@ async def create_order(
                 f"Cannot remove more fat than {meal.name} contains"
             )
 
-        unit_price = await calculate_item_price(
-            db, meal, item.extra_protein, item.extra_carbs, item.extra_fat
-        )
+    unit_prices = await price_items_bulk(
+        db,
+        [meals_by_id[item.meal_id] for item in data.items],
+        [(item.extra_protein, item.extra_carbs, item.extra_fat) for item in data.items],
+    )
+    for item, unit_price in zip(data.items, unit_prices, strict=True):
+        meal = meals_by_id[item.meal_id]
         line_total = unit_price * item.quantity
         total += line_total
         order_items.append(
@@ -88,6 +95,33 @@ async def get_order(
     return result.scalar_one_or_none()
 
 
+# Orders whose status can no longer change
+FINISHED_ORDER_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+
+
+async def owned_order_ids(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    order_ids: Collection[uuid.UUID] | None = None,
+    limit: int | None = None,
+) -> list[uuid.UUID]:
+    """Which of `order_ids` belong to `user_id`, in one query.
+
+    Without `order_ids`, the user's unfinished orders, newest first.
+    """
+    query = select(Order.id).where(Order.user_id == user_id)
+    if order_ids is None:
+        query = query.where(Order.status.notin_(FINISHED_ORDER_STATUSES)).order_by(
+            Order.created_at.desc()
+        )
+    else:
+        query = query.where(Order.id.in_(order_ids))
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+
 async def list_orders(
     db: AsyncSession, user_id: uuid.UUID
 ) -> list[Order]:
@@ -109,4 +143,5 @@ async def update_order_status(
     order.status = new_status
     await db.commit()
     await db.refresh(order)
+    await publish_order_status(str(order.id), order.status)
     return order
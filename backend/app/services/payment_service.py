@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.order import Order
 from app.models.payment import PaymentIntent
 from app.providers.payment_provider import PaymentProvider, PaymentResult
+from app.realtime.redis_pubsub import publish_order_status
 
 
 async def create_payment_for_order(
@@ -67,4 +68,6 @@ async def handle_payment_success(
         order.status = "paid"
 
     await db.commit()
+    if order is not None:
+        await publish_order_status(str(order.id), "paid")
     return order
@@ -0,0 +1,116 @@
+"""Plan cache — reuse engine results across users with the same profile.
+
+Onboarding defaults mean many users share identical targets, allergies and
+preferences, and the engine is deterministic for a given catalog and profile.
+PlanCache is a per-worker LRU of engine results (plans, variants, multi-day plans
+and match rankings) with a TTL and a size bound:
+
+- Keys: the canonical profile (targets, sorted allergies and preferences, weights)
+  plus the mode and its parameters. Pricing is applied when responses are built, so
+  the cached engine results don't depend on it.
+- Catalog changes: entries belong to one catalog snapshot version. The first lookup
+  under a newer version drops them all; lookups under an older one bypass the cache.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from app.config import settings
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS
+from app.engine.types import MacroTargets, ScoringWeights
+
+
+@dataclass
+class PlanCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0  # misses on an entry past its TTL
+    evicted: int = 0  # entries dropped for the size bound
+    invalidations: int = 0  # catalog version changes that cleared the cache
+    size: int = 0
+
+
+def profile_key(
+    targets: MacroTargets,
+    allergies: Sequence[str],
+    preferences: Sequence[str],
+    weights: ScoringWeights | None = None,
+) -> tuple[Hashable, ...]:
+    """Canonical form of the inputs that decide a user's engine results."""
+    w = weights or DEFAULT_SCORING_WEIGHTS
+    return (
+        (targets.calories, targets.protein, targets.carbs, targets.fat),
+        tuple(sorted(set(allergies))),
+        tuple(sorted(set(preferences))),
+        (w.calories, w.protein, w.carbs, w.fat),
+    )
+
+
+class PlanCache:
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.stats = PlanCacheStats()
+        self._catalog_version = 0
+        # key -> (monotonic expiry, value), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_s > 0
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.stats.size = 0
+
+    async def get_or_compute(
+        self,
+        catalog_version: int,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        should_store: Callable[[Any], bool] | None = None,
+    ) -> Any:
+        """Cached result for `key` under `catalog_version`, else `await compute()`.
+
+        `should_store` can veto caching a result (e.g. one cut short by a deadline).
+        """
+        if not self.enabled or catalog_version < self._catalog_version:
+            return await compute()
+        if catalog_version > self._catalog_version:
+            if self._entries:
+                self.stats.invalidations += 1
+            self.clear()
+            self._catalog_version = catalog_version
+
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.stats.expired += 1
+        self.stats.misses += 1
+
+        value = await compute()
+        # The catalog may have moved on while the engine ran
+        if catalog_version == self._catalog_version and (
+            should_store is None or should_store(value)
+        ):
+            self._entries[key] = (time.monotonic() + self.ttl_s, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evicted += 1
+        self.stats.size = len(self._entries)
+        return value
+
+
+plan_cache = PlanCache(
+    max_entries=settings.plan_cache_max_entries,
+    ttl_s=settings.plan_cache_ttl_s,
+)
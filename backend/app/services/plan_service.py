@@ -1,12 +1,19 @@
 """Plan service — wire meal plan engine to DB."""
 
+import json
+import logging
 import uuid
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from dataclasses import asdict
 from datetime import date
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.config import settings
+from app.engine.approximate import build_shortlist, plan_from_shortlist, snap_targets
+from app.engine.catalog import MealCatalog
 from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
 from app.engine.daily_planner import generate_daily_plan
 from app.engine.multi_day_generator import generate_multi_day_plan
@@ -14,40 +21,38 @@ from app.engine.per_meal_matcher import match_meals
 from app.engine.scoring import calculate_score
 from app.engine.slot_allocator import allocate_slots
 from app.engine.types import (
+    EngineStats,
     MacroTargets,
     MealMatchRequest,
     NutritionalInfo,
     PlanRequest,
     PlanResult,
-)
-from app.engine.types import (
-    Meal as EngineMeal,
+    ScoredMeal,
+    SearchBudget,
+    TargetGrid,
+    VariantDiversity,
 )
 from app.engine.variant_generator import generate_plan_variants
 from app.models.meal import Meal
 from app.models.meal_plan import MealPlan, MealPlanItem
 from app.models.user import User, UserProfile
-from app.services.pricing_service import calculate_item_price
-
-
-def _db_meal_to_engine(meal: Meal) -> EngineMeal:
-    """Convert SQLAlchemy Meal to engine Meal dataclass."""
-    return EngineMeal(
-        id=str(meal.id),
-        name=meal.name,
-        description=meal.description,
-        category=meal.category,
-        nutritional_info=NutritionalInfo(
-            calories=meal.calories,
-            protein=meal.protein,
-            carbs=meal.carbs,
-            fat=meal.fat,
-        ),
-        serving_size=meal.serving_size,
-        price=meal.price,
-        allergens=meal.allergens or [],
-        dietary_tags=meal.dietary_tags or [],
-    )
+from app.services.catalog_snapshot import (
+    CatalogSnapshot,
+    catalog_snapshots,
+    db_meal_to_engine,
+)
+from app.services.engine_executor import engine_executor
+from app.services.plan_cache import plan_cache, profile_key
+from app.services.pricing_service import (
+    PricingRates,
+    get_pricing_rates,
+    price_items_bulk,
+)
+
+logger = logging.getLogger(__name__)
+
+# Async callback reporting whether the requesting client has gone away
+DisconnectCheck = Callable[[], Awaitable[bool]]
 
 
 def _db_meal_to_response(db_meal: Meal) -> dict:
@@ -102,20 +107,89 @@ async def _load_user_targets(
     return targets, profile.allergies or [], profile.dietary_preferences or []
 
 
-async def _load_active_meals(db: AsyncSession) -> list[Meal]:
-    """Load all active meals from DB."""
-    meals_result = await db.execute(
-        select(Meal).where(Meal.active.is_(True))
+async def _match(catalog: MealCatalog, request: MealMatchRequest) -> list[ScoredMeal]:
+    return match_meals(catalog, request)
+
+
+async def _daily_plan(
+    snapshot: CatalogSnapshot,
+    request: PlanRequest,
+    is_disconnected: DisconnectCheck | None,
+    stats: EngineStats | None = None,
+) -> PlanResult | None:
+    """Exact daily plan, or one re-scored from the shortlist of its target grid cell."""
+    if not settings.plan_approximate:
+        return await engine_executor.run(
+            snapshot.key,
+            snapshot.meals,
+            generate_daily_plan,
+            request,
+            _search_budget(),
+            is_disconnected=is_disconnected,
+            stats=stats,
+        )
+
+    grid = TargetGrid(*settings.plan_approximate_grid)
+    size = settings.plan_approximate_shortlist
+    cell = snap_targets(request.daily_targets, grid)
+    shortlist = await plan_cache.get_or_compute(
+        snapshot.version,
+        (
+            "shortlist",
+            size,
+            profile_key(cell, request.allergies, request.dietary_preferences, request.weights),
+            tuple((slot["slot"], slot["percentage"]) for slot in request.slots),
+        ),
+        lambda: engine_executor.run(
+            snapshot.key,
+            snapshot.meals,
+            build_shortlist,
+            request,
+            grid,
+            size,
+            is_disconnected=is_disconnected,
+        ),
     )
-    return list(meals_result.scalars().all())
+    # A few hundred candidates per slot: cheap enough to plan on the event loop
+    return plan_from_shortlist(shortlist, request, _search_budget(), stats)
+
+
+def engine_stats_json(stats: EngineStats) -> str:
+    """Compact JSON of `stats`, as logged and sent in the X-Engine-Stats header."""
+    data = {
+        name: round(value, 3) if isinstance(value, float) else value
+        for name, value in asdict(stats).items()
+    }
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _log_engine_stats(
+    mode: str, user_id: uuid.UUID, profile: tuple[Hashable, ...], stats: EngineStats
+) -> None:
+    # searches == 0 means the result came from the plan cache
+    logger.info(
+        "Engine stats: mode=%s user=%s profile=%s %s",
+        mode,
+        user_id,
+        profile,
+        engine_stats_json(stats),
+    )
+
+
+def _search_budget() -> SearchBudget | None:
+    """Deadline for the plan search, so plan latency stays bounded under load."""
+    if settings.plan_search_deadline_ms <= 0:
+        return None
+    return SearchBudget(deadline_ms=settings.plan_search_deadline_ms)
 
 
 async def _build_plan_response(
     db: AsyncSession,
     plan_result: PlanResult,
     targets: MacroTargets,
-    db_meals_by_id: dict[str, Meal],
+    db_meals_by_id: Mapping[str, Meal],
     variant_id: str | None = None,
+    rates: PricingRates | None = None,
 ) -> dict:
     """Convert a PlanResult into an API response dict with auto-extras."""
     slot_pcts = {
@@ -151,15 +225,17 @@ async def _build_plan_response(
     )
 
     # Calculate extra prices per item
+    item_meals = [db_meals_by_id[item.meal.id] for item in plan_result.items]
+    unit_prices = await price_items_bulk(
+        db,
+        item_meals,
+        [(e["extra_protein"], e["extra_carbs"], e["extra_fat"]) for e in item_extras],
+        rates=rates,
+    )
     total_extra_price = 0.0
     item_extra_prices: list[float] = []
-    for i, item in enumerate(plan_result.items):
-        extras = item_extras[i]
-        db_meal = db_meals_by_id[item.meal.id]
-        extra_price = await calculate_item_price(
-            db, db_meal,
-            extras["extra_protein"], extras["extra_carbs"], extras["extra_fat"],
-        ) - db_meal.price
+    for db_meal, unit_price in zip(item_meals, unit_prices, strict=True):
+        extra_price = unit_price - db_meal.price
         item_extra_prices.append(round(extra_price, 2))
         total_extra_price += extra_price
 
@@ -189,6 +265,8 @@ async def _build_plan_response(
         "id": variant_id or str(uuid.uuid4()),
         "date": date.today().isoformat(),
         "total_score": round(plan_result.total_score, 4),
+        "optimal": plan_result.optimal,
+        "gap_bound": round(plan_result.gap_bound, 4),
         "actual_macros": {
             "calories": round(adjusted_calories, 1),
             "protein": round(adjusted_protein, 1),
@@ -213,8 +291,7 @@ async def match_meals_for_user(
 ) -> list[dict]:
     """Match meals based on user profile targets."""
     targets, allergies, preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
-    engine_meals = [_db_meal_to_engine(m) for m in db_meals]
+    snapshot = await catalog_snapshots.get(db)
 
     request = MealMatchRequest(
         targets=targets,
@@ -222,7 +299,11 @@ async def match_meals_for_user(
         dietary_preferences=preferences,
         limit=limit,
     )
-    scored = match_meals(engine_meals, request)
+    scored = await plan_cache.get_or_compute(
+        snapshot.version,
+        ("match", limit, profile_key(targets, allergies, preferences)),
+        lambda: _match(snapshot.catalog, request),
+    )
 
     return [
         {
@@ -238,11 +319,15 @@ async def match_meals_for_user(
 async def generate_plan_for_user(
     db: AsyncSession,
     user_id: uuid.UUID,
+    is_disconnected: DisconnectCheck | None = None,
+    stats: EngineStats | None = None,
 ) -> dict | None:
-    """Generate a daily plan and persist it."""
+    """Generate a daily plan and persist it.
+
+    Pass `stats` to collect (and log) the engine's phase timings and search counters.
+    """
     targets, allergies, preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
-    engine_meals = [_db_meal_to_engine(m) for m in db_meals]
+    snapshot = await catalog_snapshots.get(db)
 
     request = PlanRequest(
         daily_targets=targets,
@@ -250,12 +335,22 @@ async def generate_plan_for_user(
         allergies=allergies,
         dietary_preferences=preferences,
     )
-    plan_result = generate_daily_plan(engine_meals, request)
+    profile = profile_key(targets, allergies, preferences)
+    plan_result = await plan_cache.get_or_compute(
+        snapshot.version,
+        ("daily", profile),
+        lambda: _daily_plan(snapshot, request, is_disconnected, stats),
+        # A plan cut short by the search deadline could be improved next time
+        should_store=lambda result: result is None or result.optimal,
+    )
+    if stats is not None:
+        _log_engine_stats("daily", user_id, profile, stats)
     if plan_result is None:
         return None
 
-    db_meals_by_id = {str(m.id): m for m in db_meals}
-    response = await _build_plan_response(db, plan_result, targets, db_meals_by_id)
+    response = await _build_plan_response(
+        db, plan_result, targets, snapshot.db_meals_by_id
+    )
 
     # Persist
     plan = MealPlan(
@@ -292,11 +387,12 @@ async def generate_plans_for_user(
     db: AsyncSession,
     user_id: uuid.UUID,
     count: int = 3,
+    min_differing_slots: int | None = None,
+    is_disconnected: DisconnectCheck | None = None,
 ) -> list[dict]:
     """Generate multiple plan variants without persisting."""
     targets, allergies, preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
-    engine_meals = [_db_meal_to_engine(m) for m in db_meals]
+    snapshot = await catalog_snapshots.get(db)
 
     request = PlanRequest(
         daily_targets=targets,
@@ -304,14 +400,27 @@ async def generate_plans_for_user(
         allergies=allergies,
         dietary_preferences=preferences,
     )
-    variants = generate_plan_variants(engine_meals, request, count=count)
+    variants = await plan_cache.get_or_compute(
+        snapshot.version,
+        ("variants", count, min_differing_slots, profile_key(targets, allergies, preferences)),
+        lambda: engine_executor.run(
+            snapshot.key,
+            snapshot.meals,
+            generate_plan_variants,
+            request,
+            count,
+            VariantDiversity(min_differing_slots),
+            is_disconnected=is_disconnected,
+        ),
+    )
 
-    db_meals_by_id = {str(m.id): m for m in db_meals}
+    rates = await get_pricing_rates(db)
     results = []
     for variant in variants:
         variant_id = str(uuid.uuid4())
         resp = await _build_plan_response(
-            db, variant, targets, db_meals_by_id, variant_id=variant_id
+            db, variant, targets, snapshot.db_meals_by_id,
+            variant_id=variant_id, rates=rates,
         )
         results.append(resp)
     return results
@@ -326,7 +435,7 @@ async def get_slot_alternatives(
 ) -> list[dict]:
     """Get alternative meals for a specific slot."""
     targets, allergies, preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
+    snapshot = await catalog_snapshots.get(db)
 
     # Compute slot-level targets
     slot_allocations = allocate_slots(targets, DEFAULT_SLOT_PERCENTAGES)
@@ -336,26 +445,19 @@ async def get_slot_alternatives(
     if slot_targets is None:
         raise ValueError(f"Invalid slot: {slot}")
 
-    engine_meals = [_db_meal_to_engine(m) for m in db_meals]
-
     request = MealMatchRequest(
         targets=slot_targets,
         allergies=allergies,
         dietary_preferences=preferences,
         category=slot,  # type: ignore[arg-type]
-        limit=limit + len(exclude_meal_ids),
+        limit=limit,
+        exclude_meal_ids=frozenset(exclude_meal_ids),
     )
-    scored = match_meals(engine_meals, request)
-
-    # Filter out excluded meals and re-apply limit
-    exclude_set = set(exclude_meal_ids)
-    db_meals_by_id = {str(m.id): m for m in db_meals}
+    scored = match_meals(snapshot.catalog, request)
 
     results = []
     for s in scored:
-        if s.meal.id in exclude_set:
-            continue
-        db_meal = db_meals_by_id.get(s.meal.id)
+        db_meal = snapshot.db_meals_by_id.get(s.meal.id)
         result: dict = {
             "meal_id": s.meal.id,
             "meal_name": s.meal.name,
@@ -365,8 +467,6 @@ async def get_slot_alternatives(
         if db_meal:
             result["meal"] = _db_meal_to_response(db_meal)
         results.append(result)
-        if len(results) >= limit:
-            break
 
     return results
 
@@ -380,8 +480,8 @@ async def recalculate_plan(
     from app.engine.constants import DEFAULT_SCORING_WEIGHTS
 
     targets, _allergies, _preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
-    db_meals_by_id = {str(m.id): m for m in db_meals}
+    snapshot = await catalog_snapshots.get(db)
+    db_meals_by_id = snapshot.db_meals_by_id
 
     # Compute slot targets
     slot_allocations = allocate_slots(targets, DEFAULT_SLOT_PERCENTAGES)
@@ -406,7 +506,7 @@ async def recalculate_plan(
         if allocation is None:
             raise ValueError(f"Invalid slot: {slot}")
 
-        engine_meal = _db_meal_to_engine(db_meal)
+        engine_meal = db_meal_to_engine(db_meal)
         score = calculate_score(
             engine_meal.nutritional_info,
             allocation.targets,
@@ -445,13 +545,17 @@ async def generate_multi_day_plan_for_user(
     db: AsyncSession,
     user_id: uuid.UUID,
     num_days: int,
+    is_disconnected: DisconnectCheck | None = None,
+    stats: EngineStats | None = None,
 ) -> dict | None:
-    """Generate a multi-day meal plan (ephemeral, not persisted)."""
+    """Generate a multi-day meal plan (ephemeral, not persisted).
+
+    Pass `stats` to collect (and log) the engine's phase timings and search counters.
+    """
     from datetime import timedelta
 
     targets, allergies, preferences = await _load_user_targets(db, user_id)
-    db_meals = await _load_active_meals(db)
-    engine_meals = [_db_meal_to_engine(m) for m in db_meals]
+    snapshot = await catalog_snapshots.get(db)
 
     request = PlanRequest(
         daily_targets=targets,
@@ -459,21 +563,36 @@ async def generate_multi_day_plan_for_user(
         allergies=allergies,
         dietary_preferences=preferences,
     )
-    multi_result = generate_multi_day_plan(engine_meals, request, num_days)
+    profile = profile_key(targets, allergies, preferences)
+    multi_result = await plan_cache.get_or_compute(
+        snapshot.version,
+        ("multi_day", num_days, profile),
+        lambda: engine_executor.run(
+            snapshot.key,
+            snapshot.meals,
+            generate_multi_day_plan,
+            request,
+            num_days,
+            is_disconnected=is_disconnected,
+            stats=stats,
+        ),
+    )
+    if stats is not None:
+        _log_engine_stats(f"multi_day_{num_days}", user_id, profile, stats)
 
     if not multi_result.days:
         return None
 
-    db_meals_by_id = {str(m.id): m for m in db_meals}
     start_date = date.today()
+    rates = await get_pricing_rates(db)
 
     plans = []
     total_price = 0.0
     for day_result in multi_result.days:
         day_date = start_date + timedelta(days=day_result.day - 1)
         resp = await _build_plan_response(
-            db, day_result.plan, targets, db_meals_by_id,
-            variant_id=str(uuid.uuid4()),
+            db, day_result.plan, targets, snapshot.db_meals_by_id,
+            variant_id=str(uuid.uuid4()), rates=rates,
         )
         resp["day"] = day_result.day
         resp["date"] = day_date.isoformat()
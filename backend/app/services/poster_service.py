@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.order import Order
 from app.providers.poster_provider import PosterProvider
+from app.realtime.redis_pubsub import publish_order_status
 
 
 async def push_order_to_poster(
@@ -25,6 +26,7 @@ async def push_order_to_poster(
     order.poster_order_id = poster_order_id
     order.status = "preparing"
     await db.commit()
+    await publish_order_status(str(order.id), "preparing")
     return poster_order_id
 
 
@@ -42,5 +44,6 @@ async def poll_order_status(
     if new_status is not None and new_status != order.status:
         order.status = new_status
         await db.commit()
+        await publish_order_status(str(order.id), new_status)
         return new_status
     return order.status
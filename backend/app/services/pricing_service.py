@@ -1,12 +1,33 @@
 """Pricing service — per-macro price calculations."""
 
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings as app_config
 from app.models.meal import Meal
 from app.models.settings import AppSettings
 from app.schemas.settings import SettingsUpdate
 
+# Extra grams of (protein, carbs, fat) added to one item; negative removes
+MacroExtras = tuple[float, float, float]
+
+
+@dataclass(frozen=True)
+class PricingRates:
+    """Global per-gram prices, detached from the AppSettings row."""
+
+    protein_price_per_gram: float
+    carbs_price_per_gram: float
+    fat_price_per_gram: float
+
+
+# (monotonic expiry, rates) — per process; other workers see changes within the TTL
+_rates_cache: tuple[float, PricingRates] | None = None
+
 
 async def get_settings(db: AsyncSession) -> AppSettings:
     result = await db.execute(select(AppSettings).limit(1))
@@ -32,23 +53,80 @@ async def update_settings(
         setattr(settings, key, value)
     await db.commit()
     await db.refresh(settings)
+    invalidate_pricing_rates()
     return settings
 
 
-async def calculate_item_price(
-    db: AsyncSession,
+def invalidate_pricing_rates() -> None:
+    """Drop the cached rates; the next pricing call reloads them."""
+    global _rates_cache
+    _rates_cache = None
+
+
+async def get_pricing_rates(db: AsyncSession) -> PricingRates:
+    """Global rates, from the cache while it is younger than the configured TTL."""
+    global _rates_cache
+    now = time.monotonic()
+    if _rates_cache is not None and _rates_cache[0] > now:
+        return _rates_cache[1]
+    settings = await get_settings(db)
+    rates = PricingRates(
+        protein_price_per_gram=settings.protein_price_per_gram,
+        carbs_price_per_gram=settings.carbs_price_per_gram,
+        fat_price_per_gram=settings.fat_price_per_gram,
+    )
+    if app_config.pricing_settings_ttl_s > 0:
+        _rates_cache = (now + app_config.pricing_settings_ttl_s, rates)
+    return rates
+
+
+def _item_price(
     meal: Meal,
+    rates: PricingRates,
     extra_protein: float,
     extra_carbs: float,
     extra_fat: float,
 ) -> float:
-    settings = await get_settings(db)
-    protein_rate = meal.protein_price_per_gram or settings.protein_price_per_gram
-    carbs_rate = meal.carbs_price_per_gram or settings.carbs_price_per_gram
-    fat_rate = meal.fat_price_per_gram or settings.fat_price_per_gram
+    protein_rate = meal.protein_price_per_gram or rates.protein_price_per_gram
+    carbs_rate = meal.carbs_price_per_gram or rates.carbs_price_per_gram
+    fat_rate = meal.fat_price_per_gram or rates.fat_price_per_gram
     extra_cost = (
         max(0, extra_protein) * protein_rate
         + max(0, extra_carbs) * carbs_rate
         + max(0, extra_fat) * fat_rate
     )
     return round(meal.price + extra_cost, 2)
+
+
+async def calculate_item_price(
+    db: AsyncSession,
+    meal: Meal,
+    extra_protein: float,
+    extra_carbs: float,
+    extra_fat: float,
+) -> float:
+    rates = await get_pricing_rates(db)
+    return _item_price(meal, rates, extra_protein, extra_carbs, extra_fat)
+
+
+async def price_items_bulk(
+    db: AsyncSession,
+    meals: Sequence[Meal],
+    extras: Sequence[MacroExtras],
+    rates: PricingRates | None = None,
+) -> list[float]:
+    """Unit prices of many items, loading the global rates at most once.
+
+    `extras[i]` applies to `meals[i]`; the same meal may appear several times.
+    Pass `rates` to share one load across several calls.
+    """
+    if len(meals) != len(extras):
+        raise ValueError("meals and extras must have the same length")
+    if not meals:
+        return []
+    if rates is None:
+        rates = await get_pricing_rates(db)
+    return [
+        _item_price(meal, rates, protein, carbs, fat)
+        for meal, (protein, carbs, fat) in zip(meals, extras, strict=True)
+    ]
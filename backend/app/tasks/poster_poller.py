@@ -1,26 +1,72 @@
-"""Background task to poll Poster POS for order status changes."""
+"""Background task to poll Poster POS for order status changes.
+
+Each cycle asks Poster about every active order at once, at most `concurrency`
+(POSTER_POLL_CONCURRENCY) requests in flight, so a cycle takes about
+orders / concurrency round trips rather than one round trip per order.
+"""
 
 import asyncio
 import logging
+import time
+from dataclasses import dataclass
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.config import settings
 from app.models.order import Order
 from app.providers.poster_provider import PosterProvider
+from app.realtime.redis_pubsub import publish_order_status
 
 logger = logging.getLogger(__name__)
 
 ACTIVE_STATUSES = {"preparing", "ready", "delivering"}
 
 
+@dataclass
+class PollStats:
+    orders: int = 0
+    updated: int = 0
+    errors: int = 0
+    elapsed_ms: float = 0.0  # whole cycle, database included
+    p50_ms: float = 0.0  # Poster request latency
+    p95_ms: float = 0.0
+    max_ms: float = 0.0
+
+
 async def poll_active_orders(
     session_factory: async_sessionmaker[AsyncSession],
     provider: PosterProvider,
-    publish_fn: object | None = None,
+    concurrency: int | None = None,
+    stats: PollStats | None = None,
 ) -> int:
-    """Poll all active orders for status changes. Returns count of updated."""
+    """Poll all active orders for status changes. Returns count of updated.
+
+    `concurrency` defaults to settings.poster_poll_concurrency. Pass `stats` to get
+    the cycle's order count, errors and request latencies.
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency or settings.poster_poll_concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def fetch_status(order: Order) -> str | None:
+        nonlocal errors
+        async with semaphore:
+            requested = time.perf_counter()
+            try:
+                return await provider.get_order_status(
+                    order.poster_order_id  # type: ignore[arg-type]
+                )
+            except Exception:
+                errors += 1
+                logger.exception("Failed to poll order %s", order.id)
+                return None
+            finally:
+                latencies.append((time.perf_counter() - requested) * 1000)
+
     updated = 0
+    changed: list[tuple[str, str]] = []
     async with session_factory() as db:
         result = await db.execute(
             select(Order).where(
@@ -30,37 +76,65 @@ async def poll_active_orders(
         )
         orders = result.scalars().all()
 
-        for order in orders:
-            try:
-                new_status = await provider.get_order_status(
-                    order.poster_order_id  # type: ignore[arg-type]
+        statuses = await asyncio.gather(*(fetch_status(order) for order in orders))
+        for order, new_status in zip(orders, statuses, strict=True):
+            if new_status and new_status != order.status:
+                old_status = order.status
+                order.status = new_status
+                updated += 1
+                changed.append((str(order.id), new_status))
+                logger.info(
+                    "Order %s: %s -> %s",
+                    order.id, old_status, new_status,
                 )
-                if new_status and new_status != order.status:
-                    old_status = order.status
-                    order.status = new_status
-                    updated += 1
-                    logger.info(
-                        "Order %s: %s -> %s",
-                        order.id, old_status, new_status,
-                    )
-            except Exception:
-                logger.exception("Failed to poll order %s", order.id)
 
         if updated > 0:
             await db.commit()
 
+    for order_id, status in changed:
+        await publish_order_status(order_id, status)
+
+    if stats is not None:
+        latencies.sort()
+        stats.orders = len(orders)
+        stats.updated = updated
+        stats.errors = errors
+        stats.elapsed_ms = (time.perf_counter() - started) * 1000
+        if latencies:
+            stats.p50_ms = latencies[len(latencies) // 2]
+            stats.p95_ms = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            stats.max_ms = latencies[-1]
     return updated
 
 
 async def poster_poller_loop(
     session_factory: async_sessionmaker[AsyncSession],
     provider: PosterProvider,
-    interval_ms: int = 30000,
+    interval_ms: int | None = None,
+    concurrency: int | None = None,
 ) -> None:
-    """Long-running background loop."""
+    """Long-running background loop.
+
+    Defaults come from settings.poster_poll_interval_ms and poster_poll_concurrency.
+    """
+    interval_ms = interval_ms or settings.poster_poll_interval_ms
     while True:
+        stats = PollStats()
         try:
-            await poll_active_orders(session_factory, provider)
+            await poll_active_orders(
+                session_factory, provider, concurrency=concurrency, stats=stats
+            )
+            logger.info(
+                "Poster poll: %d orders, %d updated, %d errors in %.0f ms "
+                "(request p50 %.0f ms, p95 %.0f ms, max %.0f ms)",
+                stats.orders, stats.updated, stats.errors, stats.elapsed_ms,
+                stats.p50_ms, stats.p95_ms, stats.max_ms,
+            )
+            if stats.elapsed_ms > interval_ms:
+                logger.warning(
+                    "Poster poll took %.0f ms, longer than its %d ms interval",
+                    stats.elapsed_ms, interval_ms,
+                )
         except Exception:
             logger.exception("Poster poller error")
         await asyncio.sleep(interval_ms / 1000)
@@ -0,0 +1,101 @@
+"""Score loss and speed of shortlist (approximate) plans against exact plans.
+
+Plans random user targets both ways over one catalog and reports, per shortlist size,
+the measured loss in total_score next to the certified gap_bound.
+
+    python -m benchmarks.approximate_plans [--meals 100000] [--users 200] [--sizes 64 256]
+"""
+
+import argparse
+import json
+import random
+import time
+from dataclasses import asdict, dataclass
+
+from app.engine.approximate import build_shortlist, plan_from_shortlist
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.types import MacroTargets, PlanRequest, TargetGrid
+from benchmarks.catalogs import generate_large_catalog
+
+
+@dataclass(frozen=True)
+class ApproximationResult:
+    shortlist_size: int
+    users: int
+    max_loss: float
+    mean_loss: float
+    max_gap_bound: float
+    certified_exact: int  # plans returned with optimal=True
+    exact_ms: float  # mean per plan
+    approximate_ms: float  # mean per plan, shortlist already built
+
+
+def measure_approximation(
+    catalog: MealCatalog,
+    requests: list[PlanRequest],
+    size: int,
+    grid: TargetGrid = TargetGrid(),
+) -> ApproximationResult:
+    losses: list[float] = []
+    gaps: list[float] = []
+    certified = 0
+    exact_s = approximate_s = 0.0
+    for request in requests:
+        start = time.perf_counter()
+        exact = PreparedPlanContext(catalog, request).plan()
+        exact_s += time.perf_counter() - start
+
+        shortlist = build_shortlist(catalog, request, grid, size)
+        start = time.perf_counter()
+        plan = plan_from_shortlist(shortlist, request)
+        approximate_s += time.perf_counter() - start
+
+        if exact is None or plan is None:
+            continue
+        losses.append(exact.total_score - plan.total_score)
+        gaps.append(plan.gap_bound)
+        certified += plan.optimal
+
+    n = len(requests)
+    return ApproximationResult(
+        shortlist_size=size,
+        users=n,
+        max_loss=round(max(losses), 6),
+        mean_loss=round(sum(losses) / len(losses), 6),
+        max_gap_bound=round(max(gaps), 6),
+        certified_exact=certified,
+        exact_ms=round(exact_s * 1000 / n, 2),
+        approximate_ms=round(approximate_s * 1000 / n, 2),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meals", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    catalog = MealCatalog(generate_large_catalog(args.meals))
+    rng = random.Random(args.seed)
+    requests = [
+        PlanRequest(
+            daily_targets=MacroTargets(
+                calories=rng.uniform(1500, 3000),
+                protein=rng.uniform(80, 220),
+                carbs=rng.uniform(120, 320),
+                fat=rng.uniform(40, 110),
+            ),
+            slots=DEFAULT_SLOT_PERCENTAGES,
+        )
+        for _ in range(args.users)
+    ]
+    for size in args.sizes:
+        print(json.dumps(asdict(measure_approximation(catalog, requests, size))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Synthetic meal catalogs of any size for the engine benchmarks.
+
+SEED_MEALS is a fixed set of templates per category with Thai-menu-like macro
+ranges, allergens and dietary tags, drawn from a seeded RNG so every run times the
+same catalog. scale_catalog repeats templates with unique ids and small macro
+variations up to the requested size; the engine test fixtures use it on their own
+seed meals.
+"""
+
+import random
+from collections.abc import Sequence
+from typing import get_args
+
+from app.engine.types import Allergen, DietaryTag, MacroTargets, Meal, NutritionalInfo
+
+maintenance_targets = MacroTargets(calories=2000, protein=150, carbs=200, fat=65)
+
+# Templates per category and their calorie range
+SEED_CATEGORIES = {
+    "breakfast": (8, 280, 450),
+    "lunch": (9, 250, 620),
+    "dinner": (9, 380, 620),
+    "snack": (7, 150, 260),
+}
+
+
+def _seed_meals(seed: int = 0) -> list[Meal]:
+    rng = random.Random(seed)
+    allergens, tags = get_args(Allergen), get_args(DietaryTag)
+    meals: list[Meal] = []
+    for category, (count, low, high) in SEED_CATEGORIES.items():
+        for _ in range(count):
+            calories = rng.randrange(low, high + 1, 10)
+            protein_share = rng.uniform(0.1, 0.45)
+            fat_share = rng.uniform(0.15, 0.6 - protein_share / 2)
+            carbs_share = max(0.0, 1.0 - protein_share - fat_share)
+            meals.append(
+                Meal(
+                    id=f"{len(meals) + 1:08x}-0000-0000-0000-000000000000",
+                    name=f"{category.title()} {len(meals) + 1}",
+                    description=f"Synthetic {category} template",
+                    category=category,  # type: ignore[arg-type]
+                    nutritional_info=NutritionalInfo(
+                        calories=calories,
+                        protein=round(calories * protein_share / 4),
+                        carbs=round(calories * carbs_share / 4),
+                        fat=round(calories * fat_share / 9),
+                    ),
+                    serving_size="350g",
+                    price=120,
+                    allergens=rng.sample(allergens, rng.randint(0, 2)),
+                    dietary_tags=rng.sample(tags, rng.randint(0, 3)),
+                    active=True,
+                )
+            )
+    return meals
+
+
+SEED_MEALS: list[Meal] = _seed_meals()
+
+
+def scale_catalog(templates: Sequence[Meal], count: int) -> list[Meal]:
+    """`count` meals repeating `templates` with unique IDs and slight macro variations."""
+    result: list[Meal] = []
+
+    for i in range(count):
+        template = templates[i % len(templates)]
+        new_id = template.id[:28] + str(i).zfill(8)
+        ni = template.nutritional_info
+        result.append(
+            Meal(
+                id=new_id,
+                name=f"{template.name} #{i}",
+                description=template.description,
+                category=template.category,
+                nutritional_info=NutritionalInfo(
+                    calories=max(100, ni.calories + (i % 50) - 25),
+                    protein=max(1, ni.protein + (i % 10) - 5),
+                    carbs=max(0, ni.carbs + (i % 10) - 5),
+                    fat=max(1, ni.fat + (i % 6) - 3),
+                ),
+                serving_size=template.serving_size,
+                price=template.price,
+                allergens=template.allergens,
+                dietary_tags=template.dietary_tags,
+                active=template.active,
+            )
+        )
+
+    return result
+
+
+def generate_large_catalog(count: int) -> list[Meal]:
+    """A benchmark catalog of `count` meals scaled from SEED_MEALS."""
+    return scale_catalog(SEED_MEALS, count)
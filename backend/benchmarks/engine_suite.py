@@ -0,0 +1,301 @@
+"""Engine benchmark suite: scaling curves over catalog size, with a regression check.
+
+Each case runs against catalogs from generate_large_catalog at every size (100 to
+100k meals by default), warm-up first, then `--repeat` timed runs, and records
+min/p50/p90/p99/max wall-clock milliseconds. Catalogs are built once per size, as the
+engine executor's workers keep them, and catalog building is its own case. The sweep
+runs `--rounds` times and each case keeps its fastest round (lowest p50), which damps
+machine-wide drift such as CPU frequency changes between rounds.
+
+    python -m benchmarks.engine_suite run [--sizes 100 1000 ...] [--repeat 20] [-o out.json]
+    python -m benchmarks.engine_suite compare out.json [--baseline PATH] [--threshold 50]
+
+Absolute timings drift by 50% and more between runs on a shared VM, so every timed
+run is followed by a fixed reference workload (about 1 ms of NumPy sorting and a
+Python loop, independent of the engine) and each case also records that workload's
+p50 as ref_p50_ms. `compare` scales the baseline p50 by ref_p50_ms(now) /
+ref_p50_ms(baseline) before applying the threshold, which cancels load that slows
+both alike, and exits with status 1 when any case is more than `threshold` percent
+slower than the scaled baseline. The committed baseline came from a 1-vCPU x86_64
+Xeon VM (Python 3.11, NumPy 2.4); regenerate it (`run -o benchmarks/baseline.json`)
+when cases change. Its meta records the machine it was taken on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.multi_day_generator import generate_multi_day_plan
+from app.engine.per_meal_matcher import match_meals
+from app.engine.types import Meal, MealMatchRequest, PlanRequest, VariantDiversity
+from app.engine.variant_generator import generate_plan_variants
+from benchmarks.catalogs import generate_large_catalog, maintenance_targets
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+# p50 slowdown (percent) that `compare` reports as a regression, after scaling by the
+# reference workload. Scaled p50s still drift by up to ~30% between runs on a shared
+# VM; tighten this on quiet hardware.
+DEFAULT_THRESHOLD = 50.0
+# Cases faster than this are dominated by timer noise; they never fail `compare`
+NOISE_FLOOR_MS = 0.5
+# Cases whose warm-up run takes longer than this get a quarter of the timed runs
+SLOW_CASE_MS = 50.0
+
+PLAN_REQUEST = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+MATCH_REQUEST = MealMatchRequest(targets=maintenance_targets, limit=10)
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    run: Callable[[MealCatalog, Sequence[Meal]], object]
+
+
+@dataclass(frozen=True)
+class CaseResult:
+    case: str
+    size: int
+    runs: int
+    min_ms: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    ref_p50_ms: float  # reference workload timed between this case's runs
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.size}"
+
+
+CASES: tuple[BenchmarkCase, ...] = (
+    BenchmarkCase("catalog_build", lambda _catalog, meals: MealCatalog(meals)),
+    BenchmarkCase("match_meals", lambda catalog, _meals: match_meals(catalog, MATCH_REQUEST)),
+    BenchmarkCase(
+        "daily_plan", lambda catalog, _meals: generate_daily_plan(catalog, PLAN_REQUEST)
+    ),
+    BenchmarkCase(
+        "variants_3",
+        lambda catalog, _meals: generate_plan_variants(catalog, PLAN_REQUEST, 3),
+    ),
+    BenchmarkCase(
+        "variants_10_differing_2",
+        lambda catalog, _meals: generate_plan_variants(
+            catalog, PLAN_REQUEST, 10, VariantDiversity(min_differing_slots=2)
+        ),
+    ),
+    *(
+        BenchmarkCase(
+            f"multi_day_{days}",
+            lambda catalog, _meals, days=days: generate_multi_day_plan(
+                catalog, PLAN_REQUEST, days
+            ),
+        )
+        for days in (4, 7, 30)
+    ),
+)
+
+
+def _percentile(sorted_ms: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, so p99 never exceeds the slowest run."""
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * q))]
+
+
+REFERENCE_VALUES = np.random.default_rng(0).random(20_000)
+
+
+def reference_workload() -> None:
+    """About a millisecond of fixed, engine-independent NumPy and Python work."""
+    np.cumsum(np.sort(REFERENCE_VALUES))
+    sum(i * i for i in range(10_000))
+
+
+def _time_ms(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def time_case(
+    case: BenchmarkCase, catalog: MealCatalog, meals: Sequence[Meal], repeat: int
+) -> CaseResult:
+    start = time.perf_counter()
+    case.run(catalog, meals)  # warm-up: imports, eligibility caches
+    if (time.perf_counter() - start) * 1000 > SLOW_CASE_MS:
+        # Keep the slowest cases to a few seconds per round
+        repeat = max(3, repeat // 4)
+    timings: list[float] = []
+    reference: list[float] = []
+    for _ in range(repeat):
+        timings.append(_time_ms(lambda: case.run(catalog, meals)))
+        reference.append(_time_ms(reference_workload))
+    timings.sort()
+    reference.sort()
+    return CaseResult(
+        case=case.name,
+        size=len(meals),
+        runs=repeat,
+        min_ms=round(timings[0], 3),
+        p50_ms=round(_percentile(timings, 0.5), 3),
+        p90_ms=round(_percentile(timings, 0.9), 3),
+        p99_ms=round(_percentile(timings, 0.99), 3),
+        max_ms=round(timings[-1], 3),
+        ref_p50_ms=round(_percentile(reference, 0.5), 3),
+    )
+
+
+def run_suite(
+    sizes: Sequence[int],
+    repeat: int,
+    rounds: int = 1,
+    cases: Sequence[BenchmarkCase] = CASES,
+    progress: Callable[[CaseResult], None] | None = None,
+) -> list[CaseResult]:
+    """Best round per (case, size), in sweep order."""
+    catalogs: dict[int, tuple[MealCatalog, list[Meal]]] = {}
+    for size in sizes:
+        meals = generate_large_catalog(size)
+        catalogs[size] = (MealCatalog(meals), meals)
+
+    best: dict[str, CaseResult] = {}
+    for _ in range(rounds):
+        for catalog, meals in catalogs.values():
+            for case in cases:
+                result = time_case(case, catalog, meals, repeat)
+                if result.key not in best or result.p50_ms < best[result.key].p50_ms:
+                    best[result.key] = result
+                if progress is not None:
+                    progress(result)
+    return list(best.values())
+
+
+def to_report(results: Sequence[CaseResult]) -> dict[str, Any]:
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": _cpu_model(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [asdict(r) for r in results],
+    }
+
+
+def _cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def find_regressions(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """One line per case whose p50 slowed down by more than `threshold` percent.
+
+    The baseline p50 is first scaled by how much slower the reference workload ran
+    next to the case now than in the baseline, so a machine that is busier or slower
+    today does not read as a regression. Cases missing from either report are
+    skipped, so sweeps over different sizes can still be compared on what they share.
+    """
+    base = {f"{r['case']}@{r['size']}": r for r in baseline["results"]}
+    regressions: list[str] = []
+    for result in current["results"]:
+        key = f"{result['case']}@{result['size']}"
+        before = base.get(key)
+        if before is None:
+            continue
+        scale = _machine_scale(result, before)
+        expected = before["p50_ms"] * scale
+        if max(result["p50_ms"], expected) < NOISE_FLOOR_MS:
+            continue
+        change = (result["p50_ms"] - expected) / expected * 100
+        if change > threshold:
+            regressions.append(
+                f"{key}: p50 {before['p50_ms']:.3f} (x{scale:.2f} = {expected:.3f}) -> "
+                f"{result['p50_ms']:.3f} ms (+{change:.0f}%)"
+            )
+    return regressions
+
+
+def _machine_scale(result: dict[str, Any], before: dict[str, Any]) -> float:
+    """Reference time now over reference time then (1.0 for reports without one)."""
+    now, then = result.get("ref_p50_ms"), before.get("ref_p50_ms")
+    if not now or not then:
+        return 1.0
+    return float(now / then)
+
+
+def _run(args: argparse.Namespace) -> int:
+    def progress(result: CaseResult) -> None:
+        print(
+            f"{result.key:<34} p50 {result.p50_ms:>10.3f} ms  p99 {result.p99_ms:>10.3f} ms",
+            file=sys.stderr,
+        )
+
+    report = to_report(run_suite(args.sizes, args.repeat, args.rounds, progress=progress))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    current = json.loads(Path(args.results).read_text())
+    baseline = json.loads(Path(args.baseline).read_text())
+    regressions = find_regressions(current, baseline, args.threshold)
+    for line in regressions:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:g}%")
+        return 1
+    print(f"No case regressed by more than {args.threshold:g}%")
+    return 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="time every case and write a JSON report")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    run.add_argument("--repeat", type=int, default=20)
+    run.add_argument("--rounds", type=int, default=3)
+    run.add_argument("-o", "--output", help="report path (default: stdout)")
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser("compare", help="fail on regressions against a baseline")
+    compare.add_argument("results")
+    compare.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare.set_defaults(handler=_compare)
+
+    args = parser.parse_args(argv)
+    handler: Callable[[argparse.Namespace], int] = args.handler
+    return handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
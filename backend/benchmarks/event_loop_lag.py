@@ -0,0 +1,97 @@
+"""Event-loop lag while multi-day plans are generated concurrently, per executor mode.
+
+A ticker coroutine sleeps TICK_INTERVAL at a time and records how late it wakes up:
+that lateness is what every other request on the worker (SSE heartbeats included)
+waits while the engine runs.
+
+    python -m benchmarks.event_loop_lag [--meals 100000] [--concurrency 8] [--days 30]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.multi_day_generator import generate_multi_day_plan
+from app.engine.types import Meal, PlanRequest
+from app.services.engine_executor import EngineExecutor, EngineExecutorMode
+from benchmarks.catalogs import generate_large_catalog, maintenance_targets
+
+# Seconds between ticker wake-ups
+TICK_INTERVAL = 0.005
+
+
+@dataclass(frozen=True)
+class LagResult:
+    mode: str
+    elapsed_ms: float
+    max_lag_ms: float
+    p99_lag_ms: float
+
+
+async def measure_lag(
+    executor: EngineExecutor, meals: list[Meal], concurrency: int, days: int
+) -> LagResult:
+    """Run `concurrency` multi-day plans at once and measure the loop's wake-up lag."""
+    request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+    await executor.start()
+    # Load the catalog everywhere first, so the measurement is the steady state
+    await asyncio.gather(*(
+        executor.run("bench", meals, generate_multi_day_plan, request, 1)
+        for _ in range(executor.max_workers)
+    ))
+
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            expected = time.perf_counter() + TICK_INTERVAL
+            await asyncio.sleep(TICK_INTERVAL)
+            lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        executor.run("bench", meals, generate_multi_day_plan, request, days)
+        for _ in range(concurrency)
+    ))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    done.set()
+    await tick_task
+
+    lags.sort()
+    return LagResult(
+        mode=executor.mode,
+        elapsed_ms=round(elapsed_ms, 1),
+        max_lag_ms=round(lags[-1], 1),
+        p99_lag_ms=round(lags[min(len(lags) - 1, int(len(lags) * 0.99))], 1),
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    meals = generate_large_catalog(args.meals)
+    modes: list[EngineExecutorMode] = ["inline", "thread", "process"]
+    for mode in modes:
+        executor = EngineExecutor(mode=mode, max_workers=args.workers or None)
+        try:
+            result = await measure_lag(executor, meals, args.concurrency, args.days)
+        finally:
+            executor.shutdown()
+        print(json.dumps(asdict(result)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--meals", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=0)
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Memory and CPU per idle SSE connection, shared heartbeat ticker vs per-connection timers.
+
+Each simulated connection is what the SSE route holds for a client: a buffer plus a
+task waiting on it. "wheel" is the SSEManager (SSEConnection + one heartbeat ticker);
+"legacy" is an asyncio.Queue read through `asyncio.wait_for(queue.get(), heartbeat)`,
+the per-connection timeout loop the route used before. Heartbeats are shortened so a
+few seconds of idling covers several intervals.
+
+    python -m benchmarks.sse_connections [--connections 10000 50000] [--heartbeat 1]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Literal
+
+from app.realtime.sse_manager import HEARTBEAT_MESSAGE, SSEManager
+
+ConnectionMode = Literal["wheel", "legacy"]
+
+
+@dataclass(frozen=True)
+class ConnectionResult:
+    mode: str
+    connections: int
+    bytes_per_connection: float
+    cpu_us_per_connection_s: float  # process CPU per connection per second idle
+    pings: int
+
+
+async def measure_connections(
+    mode: ConnectionMode, connections: int, heartbeat_s: float = 1.0, idle_s: float = 3.0
+) -> ConnectionResult:
+    """Open `connections` idle subscribers, then measure their memory and idle CPU."""
+    manager = SSEManager(heartbeat_s=heartbeat_s)
+    pings = 0
+
+    async def wheel_reader(channel: str) -> None:
+        nonlocal pings
+        connection = manager.subscribe(channel)
+        while True:
+            if await connection.get() is HEARTBEAT_MESSAGE:
+                pings += 1
+
+    async def legacy_reader() -> None:
+        nonlocal pings
+        queue: asyncio.Queue[str] = asyncio.Queue(manager.queue_size)
+        while True:
+            try:
+                await asyncio.wait_for(queue.get(), timeout=heartbeat_s)
+            except TimeoutError:
+                pings += 1
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if mode == "wheel":
+        tasks = [asyncio.create_task(wheel_reader(f"order:{i}")) for i in range(connections)]
+    else:
+        tasks = [asyncio.create_task(legacy_reader()) for _ in range(connections)]
+    await asyncio.sleep(0)  # every reader is now parked on its buffer
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    await manager.start()
+    started = time.process_time()
+    await asyncio.sleep(idle_s)
+    cpu_s = time.process_time() - started
+    await manager.stop()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    return ConnectionResult(
+        mode=mode,
+        connections=connections,
+        bytes_per_connection=round(allocated / connections, 1),
+        cpu_us_per_connection_s=round(cpu_s / idle_s / connections * 1e6, 3),
+        pings=pings,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    parser.add_argument("--idle", type=float, default=3.0)
+    args = parser.parse_args()
+    modes: list[ConnectionMode] = ["wheel", "legacy"]
+    for connections in args.connections:
+        for mode in modes:
+            result = asyncio.run(
+                measure_connections(mode, connections, args.heartbeat, args.idle)
+            )
+            print(json.dumps(asdict(result)))
+
+
+if __name__ == "__main__":
+    main()
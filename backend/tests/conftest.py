@@ -12,6 +12,8 @@ from app.database import get_db
 from app.main import create_app
 from app.models import Base
 from app.models.user import User
+from app.services.catalog_snapshot import catalog_snapshots
+from app.services.pricing_service import invalidate_pricing_rates
 
 TEST_DATABASE_URL = settings.database_url
 
@@ -25,6 +27,9 @@ test_session_factory = async_sessionmaker(
 async def setup_database() -> AsyncGenerator[None]:
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # Each test starts from empty meals and settings tables
+    catalog_snapshots.invalidate()
+    invalidate_pricing_rates()
     yield
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -1,6 +1,7 @@
 """Test fixtures for the meal plan engine — mirrors the TypeScript fixtures."""
 
 from app.engine.types import MacroTargets, Meal, NutritionalInfo
+from benchmarks.catalogs import scale_catalog
 
 
 def make_meal(
@@ -315,31 +316,4 @@ keto_targets = MacroTargets(calories=1800, protein=130, carbs=30, fat=140)
 
 def generate_large_catalog(count: int) -> list[Meal]:
     """Generate a large catalog by repeating meals with unique IDs and slight macro variations."""
-    base = all_meals
-    result: list[Meal] = []
-
-    for i in range(count):
-        template = base[i % len(base)]
-        new_id = template.id[:28] + str(i).zfill(8)
-        ni = template.nutritional_info
-        result.append(
-            Meal(
-                id=new_id,
-                name=f"{template.name} #{i}",
-                description=template.description,
-                category=template.category,
-                nutritional_info=NutritionalInfo(
-                    calories=max(100, ni.calories + (i % 50) - 25),
-                    protein=max(1, ni.protein + (i % 10) - 5),
-                    carbs=max(0, ni.carbs + (i % 10) - 5),
-                    fat=max(1, ni.fat + (i % 6) - 3),
-                ),
-                serving_size=template.serving_size,
-                price=template.price,
-                allergens=template.allergens,
-                dietary_tags=template.dietary_tags,
-                active=template.active,
-            )
-        )
-
-    return result
+    return scale_catalog(all_meals, count)
@@ -0,0 +1,208 @@
+"""Approximate (shortlist) planning tests."""
+
+import math
+import random
+from dataclasses import replace
+
+import pytest
+
+from app.engine.approximate import (
+    build_shortlist,
+    plan_from_shortlist,
+    score_shift_bound,
+    snap_targets,
+)
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.scoring import calculate_score
+from app.engine.types import (
+    MacroTargets,
+    NutritionalInfo,
+    PlanConstraints,
+    PlanRequest,
+    ScoringWeights,
+    TargetGrid,
+)
+from tests.engine.fixtures import (
+    all_meals,
+    generate_large_catalog,
+    keto_targets,
+    maintenance_targets,
+)
+
+
+def _request(targets: MacroTargets, **kwargs: object) -> PlanRequest:
+    return PlanRequest(daily_targets=targets, slots=DEFAULT_SLOT_PERCENTAGES, **kwargs)  # type: ignore[arg-type]
+
+
+def _random_targets(rng: random.Random) -> MacroTargets:
+    return MacroTargets(
+        calories=rng.uniform(1500, 3000),
+        protein=rng.uniform(80, 220),
+        carbs=rng.uniform(120, 320),
+        fat=rng.uniform(40, 110),
+    )
+
+
+class TestSnapTargets:
+    def test_snaps_to_nearest_cell(self) -> None:
+        snapped = snap_targets(
+            MacroTargets(calories=2010, protein=152.4, carbs=196, fat=67.6), TargetGrid()
+        )
+        assert snapped == MacroTargets(calories=2000, protein=150, carbs=200, fat=70)
+
+    def test_zero_cell_keeps_macro_exact(self) -> None:
+        targets = MacroTargets(calories=2013, protein=151, carbs=203, fat=66)
+        assert snap_targets(targets, TargetGrid(0, 0, 0, 0)) == targets
+
+    def test_nearby_targets_share_a_cell(self) -> None:
+        a = MacroTargets(calories=2000, protein=150, carbs=200, fat=65)
+        b = MacroTargets(calories=2010, protein=151, carbs=203, fat=66)
+        assert snap_targets(a, TargetGrid()) == snap_targets(b, TargetGrid())
+
+
+class TestScoreShiftBound:
+    def test_zero_for_identical_targets(self) -> None:
+        assert score_shift_bound(maintenance_targets, maintenance_targets) == 0.0
+
+    def test_bounds_every_score_change(self) -> None:
+        rng = random.Random(7)
+        weights = ScoringWeights(calories=0.5, protein=0.2, carbs=0.2, fat=0.1)
+        for _ in range(200):
+            a = _random_targets(rng)
+            b = MacroTargets(
+                calories=a.calories * rng.uniform(0.9, 1.1),
+                protein=a.protein * rng.uniform(0.9, 1.1),
+                carbs=a.carbs * rng.uniform(0.9, 1.1),
+                fat=a.fat * rng.uniform(0.9, 1.1),
+            )
+            bound = score_shift_bound(a, b, weights)
+            for _ in range(50):
+                actual = NutritionalInfo(
+                    calories=rng.uniform(0, 2 * a.calories),
+                    protein=rng.uniform(0, 2 * a.protein),
+                    carbs=rng.uniform(0, 2 * a.carbs),
+                    fat=rng.uniform(0, 2 * a.fat),
+                )
+                change = abs(
+                    calculate_score(actual, a, weights) - calculate_score(actual, b, weights)
+                )
+                assert change <= bound + 1e-12
+
+    def test_zero_target_shift_is_unbounded(self) -> None:
+        a = MacroTargets(calories=2000, protein=150, carbs=0, fat=65)
+        b = MacroTargets(calories=2000, protein=150, carbs=10, fat=65)
+        weights = ScoringWeights(calories=0, protein=0, carbs=1, fat=0)
+        assert score_shift_bound(a, b, weights) == 1.0
+
+
+class TestPlanFromShortlist:
+    def test_matches_exact_plan_on_grid_targets(self) -> None:
+        request = _request(maintenance_targets)
+        shortlist = build_shortlist(all_meals, request, TargetGrid(), size=3)
+
+        result = plan_from_shortlist(shortlist, request)
+        exact = generate_daily_plan(all_meals, request)
+
+        assert result is not None and exact is not None
+        assert result.total_score == exact.total_score
+        assert result.optimal
+
+    def test_loss_never_exceeds_gap_bound(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(5000))
+        rng = random.Random(3)
+        for _ in range(40):
+            request = _request(_random_targets(rng))
+            shortlist = build_shortlist(catalog, request, size=32)
+
+            result = plan_from_shortlist(shortlist, request)
+            exact = generate_daily_plan(catalog, request)
+
+            assert result is not None and exact is not None
+            loss = exact.total_score - result.total_score
+            assert -1e-12 <= loss <= result.gap_bound + 1e-12
+            assert result.optimal == (result.gap_bound == 0)
+
+    def test_one_shortlist_serves_a_whole_cell(self) -> None:
+        shortlist = build_shortlist(all_meals, _request(maintenance_targets))
+        for calories in (1980, 2000, 2020):
+            targets = MacroTargets(calories=calories, protein=151, carbs=198, fat=66)
+            result = plan_from_shortlist(shortlist, _request(targets))
+            assert result is not None
+            assert result.target_macros == targets
+
+    def test_full_shortlist_is_exact_everywhere(self) -> None:
+        request = _request(keto_targets)
+        shortlist = build_shortlist(all_meals, request, TargetGrid(), size=len(all_meals))
+
+        assert all(c == -math.inf for c in shortlist.cutoffs)
+        result = plan_from_shortlist(shortlist, request)
+        exact = generate_daily_plan(all_meals, request)
+        assert result is not None and exact is not None
+        assert result.total_score == exact.total_score
+        assert result.optimal
+
+    def test_allergies_are_respected(self) -> None:
+        request = _request(maintenance_targets, allergies=["dairy", "gluten"])
+        result = plan_from_shortlist(build_shortlist(all_meals, request), request)
+
+        assert result is not None
+        for item in result.items:
+            assert not {"dairy", "gluten"} & set(item.meal.allergens)
+
+    def test_permuted_allergy_lists_share_a_shortlist(self) -> None:
+        first = _request(maintenance_targets, allergies=["dairy", "eggs"])
+        shortlist = build_shortlist(all_meals, first)
+        targets = MacroTargets(calories=2010, protein=151, carbs=198, fat=66)
+        second = _request(
+            targets, allergies=["eggs", "dairy", "eggs"], dietary_preferences=["b", "a"]
+        )
+        with pytest.raises(ValueError):
+            plan_from_shortlist(shortlist, second)  # preferences differ
+
+        second = replace(second, dietary_preferences=[])
+        result = plan_from_shortlist(shortlist, second)
+        exact = generate_daily_plan(all_meals, replace(second, allergies=["dairy", "eggs"]))
+
+        assert result is not None and exact is not None
+        assert result.total_score + result.gap_bound >= exact.total_score
+        for item in result.items:
+            assert not {"dairy", "eggs"} & set(item.meal.allergens)
+
+    def test_rejects_request_from_another_profile(self) -> None:
+        shortlist = build_shortlist(all_meals, _request(maintenance_targets))
+        with pytest.raises(ValueError):
+            plan_from_shortlist(shortlist, _request(maintenance_targets, allergies=["dairy"]))
+
+    def test_rejects_non_separable_requests(self) -> None:
+        constrained = _request(
+            maintenance_targets, constraints=PlanConstraints(max_calories=2100)
+        )
+        with pytest.raises(ValueError):
+            build_shortlist(all_meals, constrained)
+        with pytest.raises(ValueError):
+            build_shortlist(all_meals, _request(maintenance_targets, objective="daily_total"))
+
+    def test_empty_constraints_are_separable(self) -> None:
+        unconstrained = _request(maintenance_targets)
+        empty = _request(maintenance_targets, constraints=PlanConstraints())
+
+        result = plan_from_shortlist(build_shortlist(all_meals, empty), unconstrained)
+        shared = plan_from_shortlist(build_shortlist(all_meals, unconstrained), empty)
+        exact = generate_daily_plan(all_meals, empty)
+
+        assert result is not None and shared is not None and exact is not None
+        assert result.total_score == shared.total_score == exact.total_score
+
+    def test_constrained_request_cannot_use_a_shortlist(self) -> None:
+        shortlist = build_shortlist(all_meals, _request(maintenance_targets))
+        constrained = _request(
+            maintenance_targets, constraints=PlanConstraints(max_calories=2100)
+        )
+        with pytest.raises(ValueError):
+            plan_from_shortlist(shortlist, constrained)
+
+    def test_rejects_empty_shortlist(self) -> None:
+        with pytest.raises(ValueError):
+            build_shortlist(all_meals, _request(maintenance_targets), size=0)
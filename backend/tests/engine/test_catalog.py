@@ -0,0 +1,93 @@
+"""Tests for the columnar MealCatalog."""
+
+import numpy as np
+
+from app.engine.catalog import MealCatalog, as_catalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.filters import filter_meals, filter_rows
+from app.engine.multi_day_generator import generate_multi_day_plan
+from app.engine.per_meal_matcher import match_meals
+from app.engine.scoring import calculate_score
+from app.engine.types import MealMatchRequest, PlanRequest
+from tests.engine.fixtures import all_meals, generate_large_catalog, maintenance_targets
+
+
+class TestMealCatalog:
+    def test_rows_sorted_by_category_then_id(self) -> None:
+        catalog = MealCatalog(reversed(all_meals))
+        assert catalog.categories == ("breakfast", "lunch", "dinner", "snack")
+        for category in catalog.categories:
+            start, end = catalog.category_range(category)
+            ids = catalog.ids[start:end]
+            assert list(ids) == sorted(ids)
+            assert all(m.category == category for m in catalog.meals[start:end])
+
+    def test_macro_columns(self) -> None:
+        catalog = MealCatalog(all_meals)
+        for row, meal in enumerate(catalog.meals):
+            assert catalog.calories[row] == meal.nutritional_info.calories
+            assert catalog.protein[row] == meal.nutritional_info.protein
+            assert catalog.carbs[row] == meal.nutritional_info.carbs
+            assert catalog.fat[row] == meal.nutritional_info.fat
+
+    def test_unknown_category_range_is_empty(self) -> None:
+        catalog = MealCatalog(all_meals)
+        assert catalog.category_range("brunch") == (0, 0)
+        assert len(catalog.rows_for_category("brunch")) == 0
+
+    def test_empty_catalog(self) -> None:
+        catalog = MealCatalog([])
+        assert len(catalog) == 0
+        assert len(filter_rows(catalog, ["dairy"], ["vegan"])) == 0
+
+    def test_exclusion_mask_and_subset(self) -> None:
+        catalog = MealCatalog(all_meals)
+        excluded = {all_meals[0].id, all_meals[5].id, "not-a-meal"}
+        sub = catalog.subset(np.flatnonzero(catalog.exclusion_mask(excluded)))
+        assert len(sub) == len(all_meals) - 2
+        assert not excluded & set(sub.ids)
+        assert sub.row_of(all_meals[1].id) is not None
+        assert sub.category_range("snack")[1] == len(sub)
+
+    def test_as_catalog_passthrough(self) -> None:
+        catalog = MealCatalog(all_meals)
+        assert as_catalog(catalog) is catalog
+
+    def test_filter_rows_matches_filter_meals(self) -> None:
+        catalog = MealCatalog(all_meals)
+        cases = [
+            ([], [], None),
+            (["dairy", "eggs"], [], None),
+            ([], ["gluten_free"], "lunch"),
+            (["soy"], ["vegetarian", "gluten_free"], None),
+            ([], ["no_such_tag"], None),
+        ]
+        for allergies, prefs, category in cases:
+            expected = filter_meals(all_meals, allergies, prefs, category)
+            rows = filter_rows(catalog, allergies, prefs, category)
+            assert {m.id for m in catalog.take(rows)} == {m.id for m in expected}
+
+
+class TestCatalogEntryPoints:
+    def test_match_meals_ranking_matches_object_sort(self) -> None:
+        meals = generate_large_catalog(500)
+        request = MealMatchRequest(targets=maintenance_targets, allergies=["fish"], limit=25)
+        expected = sorted(
+            filter_meals(meals, allergies=["fish"]),
+            key=lambda m: (-calculate_score(m.nutritional_info, maintenance_targets), m.id),
+        )[:25]
+        result = match_meals(MealCatalog(meals), request)
+        assert [s.meal.id for s in result] == [m.id for m in expected]
+
+    def test_daily_plan_same_for_list_and_catalog(self) -> None:
+        meals = generate_large_catalog(500)
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+        assert generate_daily_plan(meals, request) == generate_daily_plan(
+            MealCatalog(meals), request
+        )
+
+    def test_multi_day_plan_accepts_catalog(self) -> None:
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+        result = generate_multi_day_plan(MealCatalog(all_meals), request, 5)
+        assert result == generate_multi_day_plan(all_meals, request, 5)
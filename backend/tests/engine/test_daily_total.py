@@ -0,0 +1,245 @@
+"""Tests for the daily-total objective (meet-in-the-middle search)."""
+
+import itertools
+import random
+
+import pytest
+
+from app.engine import daily_total
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS, DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.daily_total import find_daily_total_plan
+from app.engine.multi_day_assignment import assign_multi_day_plan
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.scoring import calculate_score
+from app.engine.types import (
+    MacroTargets,
+    Meal,
+    PlanConstraints,
+    PlanRequest,
+    ScoringWeights,
+    SearchBudget,
+    SearchStats,
+)
+from tests.engine.fixtures import (
+    NutritionalInfo,
+    all_meals,
+    generate_large_catalog,
+    maintenance_targets,
+    make_meal,
+)
+
+CATEGORIES = ["breakfast", "lunch", "dinner", "snack"]
+
+
+def _random_meals(count: int, seed: int) -> list[Meal]:
+    rng = random.Random(seed)
+    return [
+        make_meal(
+            f"meal-{i:04d}",
+            f"Meal {i}",
+            CATEGORIES[i % 4],
+            NutritionalInfo(
+                calories=rng.uniform(100, 900),
+                protein=rng.uniform(5, 60),
+                carbs=rng.uniform(5, 100),
+                fat=rng.uniform(2, 40),
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def _make_request(**overrides: object) -> PlanRequest:
+    defaults = {
+        "daily_targets": maintenance_targets,
+        "slots": DEFAULT_SLOT_PERCENTAGES,
+        "objective": "daily_total",
+    }
+    defaults.update(overrides)
+    return PlanRequest(**defaults)  # type: ignore[arg-type]
+
+
+def _brute_force(
+    meals: list[Meal], request: PlanRequest
+) -> tuple[float, list[str]] | None:
+    """Best (daily score, meal ids) over every combination; ties go to the lowest ids."""
+    by_slot = [
+        sorted((m for m in meals if m.category == s["slot"]), key=lambda m: m.id)
+        for s in request.slots
+    ]
+    constraints = request.constraints or PlanConstraints()
+    best: tuple[float, list[str]] | None = None
+    for combo in itertools.product(*by_slot):
+        infos = [m.nutritional_info for m in combo]
+        total = NutritionalInfo(
+            calories=sum(i.calories for i in infos),
+            protein=sum(i.protein for i in infos),
+            carbs=sum(i.carbs for i in infos),
+            fat=sum(i.fat for i in infos),
+        )
+        if constraints.min_calories is not None and total.calories < constraints.min_calories:
+            continue
+        if constraints.max_calories is not None and total.calories > constraints.max_calories:
+            continue
+        score = calculate_score(
+            total, request.daily_targets, request.weights or DEFAULT_SCORING_WEIGHTS
+        )
+        if best is None or score > best[0]:
+            best = (score, [m.id for m in combo])
+    return best
+
+
+class TestFindDailyTotalPlan:
+    @pytest.mark.parametrize("seed", range(4))
+    @pytest.mark.parametrize(
+        "constraints",
+        [
+            None,
+            PlanConstraints(min_calories=1500, max_calories=1700),
+            PlanConstraints(max_calories=900),
+        ],
+    )
+    def test_matches_brute_force(self, seed: int, constraints: PlanConstraints | None) -> None:
+        meals = _random_meals(40, seed)
+        request = _make_request(constraints=constraints)
+        result = generate_daily_plan(meals, request)
+        expected = _brute_force(meals, request)
+
+        if expected is None:
+            assert result is None
+            return
+        assert result is not None
+        assert [item.meal.id for item in result.items] == expected[1]
+        assert result.total_score == expected[0]
+
+    def test_matches_brute_force_on_repeated_templates(self) -> None:
+        # Many identical macro sums: exercises deduplication and id tie-breaking
+        meals = generate_large_catalog(60)
+        request = _make_request()
+        result = generate_daily_plan(meals, request)
+        expected = _brute_force(meals, request)
+
+        assert result is not None and expected is not None
+        assert [item.meal.id for item in result.items] == expected[1]
+        assert result.total_score == expected[0]
+
+    @pytest.mark.parametrize("slot_count", [1, 3])
+    def test_odd_slot_counts(self, slot_count: int) -> None:
+        meals = _random_meals(40, 7)
+        slots = [{"slot": s, "percentage": 1 / slot_count} for s in CATEGORIES[:slot_count]]
+        request = _make_request(slots=slots)
+        result = generate_daily_plan(meals, request)
+        expected = _brute_force(meals, request)
+
+        assert result is not None and expected is not None
+        assert [item.meal.id for item in result.items] == expected[1]
+
+    def test_custom_weights(self) -> None:
+        meals = _random_meals(40, 3)
+        request = _make_request(weights=ScoringWeights(calories=0, protein=1, carbs=0, fat=0))
+        result = generate_daily_plan(meals, request)
+        expected = _brute_force(meals, request)
+
+        assert result is not None and expected is not None
+        assert result.total_score == expected[0]
+
+    def test_total_score_scores_summed_macros(self) -> None:
+        result = generate_daily_plan(all_meals, _make_request())
+
+        assert result is not None
+        assert result.total_score == calculate_score(result.actual_macros, maintenance_targets)
+
+    def test_beats_per_slot_objective_on_daily_score(self) -> None:
+        meals = _random_meals(80, 11)
+        per_slot = generate_daily_plan(meals, _make_request(objective="per_slot"))
+        daily = generate_daily_plan(meals, _make_request())
+
+        assert per_slot is not None and daily is not None
+        per_slot_daily_score = calculate_score(per_slot.actual_macros, maintenance_targets)
+        assert daily.total_score >= per_slot_daily_score
+
+    def test_infeasible_window_returns_none(self) -> None:
+        request = _make_request(constraints=PlanConstraints(max_calories=100))
+        assert generate_daily_plan(all_meals, request) is None
+
+    def test_empty_slot_returns_none(self) -> None:
+        breakfasts = [m for m in all_meals if m.category == "breakfast"]
+        assert generate_daily_plan(breakfasts, _make_request()) is None
+
+    def test_honours_exclusions(self) -> None:
+        context = PreparedPlanContext(_random_meals(40, 5), _make_request())
+        first = context.plan()
+        assert first is not None
+
+        excluded = {item.meal.id for item in first.items}
+        second = context.plan(excluded)
+        assert second is not None
+        assert not excluded & {item.meal.id for item in second.items}
+
+    def test_stats_count_every_pair(self) -> None:
+        context = PreparedPlanContext(_random_meals(40, 2), _make_request())
+        stats = SearchStats()
+        find_daily_total_plan(
+            context.slot_allocations, context.ranked_by_slot, maintenance_targets, stats=stats
+        )
+
+        # 10 meals per slot: 100 combinations on each side
+        assert stats.nodes_expanded > 0
+        assert stats.nodes_expanded + stats.nodes_pruned == 100 * 100
+
+    def test_zero_targets(self) -> None:
+        meals = _random_meals(40, 9)
+        request = _make_request(
+            daily_targets=MacroTargets(calories=2000, protein=0, carbs=0, fat=0)
+        )
+        result = generate_daily_plan(meals, request)
+        expected = _brute_force(meals, request)
+
+        assert result is not None and expected is not None
+        assert result.total_score == expected[0]
+
+    def test_node_budget_returns_incumbent_with_valid_gap(self) -> None:
+        context = PreparedPlanContext(_random_meals(200, 4), _make_request())
+        full = context.plan()
+        partial = context.plan(budget=SearchBudget(max_nodes=1))
+
+        assert full is not None and partial is not None
+        assert full.optimal
+        assert not partial.optimal
+        assert partial.total_score <= full.total_score
+        assert partial.total_score + partial.gap_bound >= full.total_score
+
+    def test_expired_deadline_keeps_incumbent(self) -> None:
+        context = PreparedPlanContext(_random_meals(200, 4), _make_request())
+        full = context.plan()
+        partial = context.plan(budget=SearchBudget(deadline_ms=0))
+
+        assert full is not None and partial is not None
+        assert partial.total_score + partial.gap_bound >= full.total_score
+
+    def test_large_pools_are_bounded_to_their_best_ranked_meals(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        context = PreparedPlanContext(_random_meals(200, 4), _make_request())
+        full = context.plan()
+        # 50 meals per slot: 2,500 combinations per half, bounded to 10 x 10
+        monkeypatch.setattr(daily_total, "MAX_SIDE_COMBINATIONS", 100)
+        stats = SearchStats()
+        bounded = context.plan(stats=stats)
+
+        assert full is not None and bounded is not None
+        assert stats.nodes_expanded + stats.nodes_pruned == 100 * 100
+        assert not bounded.optimal
+        assert bounded.total_score <= full.total_score
+        assert bounded.total_score + bounded.gap_bound >= full.total_score
+        top_ten = [
+            {catalog.meals[row].id for row in order[:10]}
+            for catalog, _, order in context.ranked_by_slot
+        ]
+        for item, allowed in zip(bounded.items, top_ten, strict=True):
+            assert item.meal.id in allowed
+
+    def test_global_assignment_rejects_daily_total(self) -> None:
+        with pytest.raises(ValueError, match="per_slot"):
+            assign_multi_day_plan(all_meals, _make_request(), 3)
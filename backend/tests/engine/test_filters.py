@@ -1,11 +1,18 @@
 """Tests for filters module — ported from TypeScript."""
 
+from dataclasses import replace
+
+from app.engine.catalog import MealCatalog
 from app.engine.filters import (
+    ELIGIBILITY_CACHE_SIZE,
+    eligibility_mask,
     filter_by_allergens,
     filter_by_category,
     filter_by_dietary_tags,
     filter_meals,
+    filter_rows,
 )
+from app.engine.types import ALLERGEN_BITS, DIETARY_TAG_BITS
 from tests.engine.fixtures import all_meals, breakfast_meals, lunch_meals
 
 
@@ -117,3 +124,58 @@ class TestFilterMealsCombined:
             category="snack",
         )
         assert result == []
+
+
+class TestBitmaskIndex:
+    def test_meal_masks_precomputed(self) -> None:
+        meal = lunch_meals[0]
+        for allergen, bit in ALLERGEN_BITS.items():
+            assert bool(meal.allergen_mask & bit) == (allergen in meal.allergens)
+        for tag, bit in DIETARY_TAG_BITS.items():
+            assert bool(meal.dietary_tag_mask & bit) == (tag in meal.dietary_tags)
+
+    def test_masks_do_not_affect_equality(self) -> None:
+        meal = breakfast_meals[0]
+        assert replace(meal) == meal
+
+    def test_unknown_values_fall_back_to_membership(self) -> None:
+        custom = replace(
+            lunch_meals[0],
+            id="custom-0000-0000-0000-000000000001",
+            allergens=["celery"],
+            dietary_tags=["paleo"],
+        )
+        meals = [*all_meals, custom]
+        assert custom not in filter_by_allergens(meals, ["celery"])
+        assert filter_by_dietary_tags(meals, ["paleo"]) == [custom]
+
+        catalog = MealCatalog(meals)
+        assert custom.id not in {m.id for m in catalog.take(filter_rows(catalog, ["celery"]))}
+        assert catalog.take(filter_rows(catalog, dietary_preferences=["paleo"])) == [custom]
+
+    def test_catalog_rows_match_list_filters(self) -> None:
+        catalog = MealCatalog(all_meals)
+        for allergies, prefs in [
+            (["peanuts", "fish"], []),
+            ([], ["vegan", "gluten_free"]),
+            (["soy"], ["high_protein"]),
+        ]:
+            expected = {m.id for m in filter_meals(all_meals, allergies, prefs)}
+            rows = filter_rows(catalog, allergies, prefs)
+            assert {m.id for m in catalog.take(rows)} == expected
+
+
+class TestEligibilityCache:
+    def test_same_profile_reuses_mask(self) -> None:
+        catalog = MealCatalog(all_meals)
+        first = eligibility_mask(catalog, ["dairy", "eggs"], ["vegetarian"])
+        # Order and duplicates do not change the canonical profile
+        second = eligibility_mask(catalog, ["eggs", "dairy", "eggs"], ["vegetarian"])
+        assert second is first
+        assert not first.flags.writeable
+
+    def test_cache_is_bounded(self) -> None:
+        catalog = MealCatalog(all_meals)
+        for i in range(ELIGIBILITY_CACHE_SIZE + 10):
+            eligibility_mask(catalog, [f"custom-allergen-{i}"])
+        assert len(catalog.eligibility_cache) == ELIGIBILITY_CACHE_SIZE
@@ -0,0 +1,152 @@
+"""Tests for global multi-day assignment."""
+
+import itertools
+from collections import Counter
+
+import pytest
+
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.multi_day_assignment import assign_multi_day_plan
+from app.engine.multi_day_generator import generate_multi_day_plan
+from app.engine.scoring import calculate_score
+from app.engine.slot_allocator import allocate_slots
+from app.engine.types import (
+    Meal,
+    MultiDayPlanResult,
+    PlanConstraints,
+    PlanRequest,
+    VarietyConstraints,
+)
+from tests.engine.fixtures import (
+    NutritionalInfo,
+    all_meals,
+    breakfast_meals,
+    lunch_meals,
+    maintenance_targets,
+    make_meal,
+)
+
+TWO_SLOTS = [
+    {"slot": "breakfast", "percentage": 0.4},
+    {"slot": "lunch", "percentage": 0.6},
+]
+
+
+def _make_request(**overrides: object) -> PlanRequest:
+    defaults = {
+        "daily_targets": maintenance_targets,
+        "slots": DEFAULT_SLOT_PERCENTAGES,
+        "allergies": [],
+        "dietary_preferences": [],
+    }
+    defaults.update(overrides)
+    return PlanRequest(**defaults)  # type: ignore[arg-type]
+
+
+def _sequences(result: MultiDayPlanResult) -> dict[str, list[str]]:
+    by_slot: dict[str, list[str]] = {}
+    for day in result.days:
+        for item in day.plan.items:
+            by_slot.setdefault(item.slot, []).append(item.meal.id)
+    return by_slot
+
+
+def _brute_force_total(
+    meals: list[Meal], slot_targets: object, days: int, variety: VarietyConstraints
+) -> float:
+    """Best summed score over every per-day sequence of one slot's meals."""
+    scores = [calculate_score(m.nutritional_info, slot_targets) for m in meals]  # type: ignore[arg-type]
+    best = -1.0
+    for seq in itertools.product(range(len(meals)), repeat=days):
+        if max(Counter(seq).values()) > variety.max_repeats:
+            continue
+        if variety.no_consecutive_days and any(a == b for a, b in itertools.pairwise(seq)):
+            continue
+        best = max(best, sum(scores[i] for i in seq))
+    return best
+
+
+class TestAssignMultiDayPlan:
+    @pytest.mark.parametrize(
+        "variety",
+        [
+            VarietyConstraints(max_repeats=1),
+            VarietyConstraints(max_repeats=2),
+            VarietyConstraints(max_repeats=3, no_consecutive_days=False),
+        ],
+    )
+    def test_matches_brute_force(self, variety: VarietyConstraints) -> None:
+        meals = breakfast_meals[:3] + lunch_meals[:3]
+        request = _make_request(slots=TWO_SLOTS)
+        result = assign_multi_day_plan(meals, request, num_days=3, variety=variety)
+        assert len(result.days) == 3
+
+        allocations = allocate_slots(maintenance_targets, TWO_SLOTS)
+        for allocation, pool in zip(
+            allocations, [breakfast_meals[:3], lunch_meals[:3]], strict=True
+        ):
+            planned = sum(
+                item.score
+                for day in result.days
+                for item in day.plan.items
+                if item.slot == allocation.slot
+            )
+            expected = _brute_force_total(pool, allocation.targets, 3, variety)
+            assert planned == pytest.approx(expected, abs=1e-9)
+
+    def test_respects_repeat_cap_and_no_consecutive_days(self) -> None:
+        variety = VarietyConstraints(max_repeats=3)
+        result = assign_multi_day_plan(all_meals, _make_request(), 14, variety)
+        assert len(result.days) == 14
+        for sequence in _sequences(result).values():
+            assert max(Counter(sequence).values()) <= 3
+            assert all(a != b for a, b in itertools.pairwise(sequence))
+
+    def test_no_repeats_matches_greedy_score(self) -> None:
+        request = _make_request()
+        result = assign_multi_day_plan(all_meals, request, 4)
+        greedy = generate_multi_day_plan(all_meals, request, 4)
+        assert not result.has_repeats
+        assert sum(d.plan.total_score for d in result.days) == pytest.approx(
+            sum(d.plan.total_score for d in greedy.days)
+        )
+
+    def test_repeats_are_reported(self) -> None:
+        meals = breakfast_meals[:2] + lunch_meals[:2]
+        request = _make_request(slots=TWO_SLOTS)
+        result = assign_multi_day_plan(meals, request, 4, VarietyConstraints(max_repeats=2))
+        assert len(result.days) == 4
+        assert result.total_unique_meals == 4
+        assert result.total_repeated_meals == 4
+        assert result.days[0].repeated_meal_ids == []
+
+    def test_truncates_to_feasible_horizon(self) -> None:
+        meals = [
+            make_meal(
+                "b1", "Only Breakfast", "breakfast",
+                NutritionalInfo(calories=500, protein=30, carbs=50, fat=15),
+            ),
+            *lunch_meals[:5],
+        ]
+        request = _make_request(slots=TWO_SLOTS)
+        # One breakfast, never on consecutive days: only a single day can be planned
+        result = assign_multi_day_plan(meals, request, 5, VarietyConstraints(max_repeats=5))
+        assert len(result.days) == 1
+
+    def test_empty_pool_returns_no_days(self) -> None:
+        result = assign_multi_day_plan(lunch_meals, _make_request(slots=TWO_SLOTS), 3)
+        assert result.days == []
+
+    def test_rejects_invalid_inputs(self) -> None:
+        with pytest.raises(ValueError, match="max_repeats"):
+            assign_multi_day_plan(all_meals, _make_request(), 3, VarietyConstraints(max_repeats=0))
+        with pytest.raises(ValueError, match="constraints"):
+            assign_multi_day_plan(
+                all_meals, _make_request(constraints=PlanConstraints(max_calories=1800)), 3
+            )
+        duplicate_slots = [
+            {"slot": "lunch", "percentage": 0.5},
+            {"slot": "lunch", "percentage": 0.5},
+        ]
+        with pytest.raises(ValueError, match="distinct"):
+            assign_multi_day_plan(all_meals, _make_request(slots=duplicate_slots), 3)
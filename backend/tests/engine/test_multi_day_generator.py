@@ -2,7 +2,7 @@
 
 from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
 from app.engine.multi_day_generator import generate_multi_day_plan
-from app.engine.types import PlanRequest
+from app.engine.types import EngineStats, PlanRequest
 from tests.engine.fixtures import (
     all_meals,
     make_meal,
@@ -109,3 +109,20 @@ class TestGenerateMultiDayPlan:
         assert len(result.days) == 0
         assert result.total_unique_meals == 0
         assert result.total_repeated_meals == 0
+
+    def test_engine_stats_count_pool_exhaustion_fallbacks(self) -> None:
+        small_pool = [
+            make_meal("fb1", "B1", "breakfast", NutritionalInfo(400, 20, 50, 10)),
+            make_meal("fl1", "L1", "lunch", NutritionalInfo(500, 35, 50, 15)),
+            make_meal("fd1", "D1", "dinner", NutritionalInfo(550, 40, 45, 20)),
+            make_meal("fs1", "S1", "snack", NutritionalInfo(200, 10, 20, 8)),
+        ]
+        stats = EngineStats()
+        generate_multi_day_plan(small_pool, _make_request(), num_days=3, stats=stats)
+
+        # Days 2 and 3 each search the unused pool, find nothing, then reuse meals
+        assert stats.pool_exhausted_fallbacks == 2
+        assert stats.searches == 5
+        assert stats.candidates_per_slot == {
+            "breakfast": 1, "lunch": 1, "dinner": 1, "snack": 1
+        }
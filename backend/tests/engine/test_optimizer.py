@@ -6,10 +6,21 @@ from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
 from app.engine.optimizer import find_optimal_plan
 from app.engine.scoring import calculate_score
 from app.engine.slot_allocator import allocate_slots
-from app.engine.types import MacroTargets, Meal, MealSlot, NutritionalInfo
+from app.engine.types import (
+    EngineStats,
+    MacroTargets,
+    Meal,
+    MealSlot,
+    NutritionalInfo,
+    PlanConstraints,
+    SearchBudget,
+    SearchStats,
+    SlotAllocation,
+)
 from tests.engine.fixtures import (
     breakfast_meals,
     dinner_meals,
+    generate_large_catalog,
     lunch_meals,
     maintenance_targets,
     snack_meals,
@@ -165,3 +176,208 @@ class TestFindOptimalPlan:
         assert len(result.items) == 4
         bf = next(i for i in result.items if i.slot == "breakfast")
         assert bf.meal.id == breakfast_meals[0].id
+
+
+class TestConstrainedPlan:
+    def _meals_by_slot(self) -> dict[MealSlot, list[Meal]]:
+        return {
+            "breakfast": breakfast_meals[:4],
+            "lunch": lunch_meals[:4],
+            "dinner": dinner_meals[:4],
+        }
+
+    def _allocs(self) -> list[SlotAllocation]:
+        return allocate_slots(maintenance_targets, [
+            {"slot": "breakfast", "percentage": 0.33},
+            {"slot": "lunch", "percentage": 0.34},
+            {"slot": "dinner", "percentage": 0.33},
+        ])
+
+    def test_empty_constraints_match_unconstrained(self) -> None:
+        allocs = self._allocs()
+        meals_by_slot = self._meals_by_slot()
+        assert find_optimal_plan(
+            allocs, meals_by_slot, constraints=PlanConstraints()
+        ) == find_optimal_plan(allocs, meals_by_slot)
+
+    def test_calorie_window_matches_brute_force(self) -> None:
+        allocs = self._allocs()
+        meals_by_slot = self._meals_by_slot()
+        constraints = PlanConstraints(min_calories=1100, max_calories=1250)
+
+        result = find_optimal_plan(allocs, meals_by_slot, constraints=constraints)
+        assert result is not None
+        total_calories = sum(i.meal.nutritional_info.calories for i in result.items)
+        assert 1100 <= total_calories <= 1250
+
+        brute_force_score = -1.0
+        for bf in meals_by_slot["breakfast"]:
+            for lm in meals_by_slot["lunch"]:
+                for dm in meals_by_slot["dinner"]:
+                    cals = (
+                        bf.nutritional_info.calories
+                        + lm.nutritional_info.calories
+                        + dm.nutritional_info.calories
+                    )
+                    if not 1100 <= cals <= 1250:
+                        continue
+                    total = (
+                        calculate_score(bf.nutritional_info, allocs[0].targets)
+                        + calculate_score(lm.nutritional_info, allocs[1].targets)
+                        + calculate_score(dm.nutritional_info, allocs[2].targets)
+                    ) / 3
+                    brute_force_score = max(brute_force_score, total)
+
+        assert result.total_score == pytest.approx(brute_force_score, abs=1e-8)
+
+    def test_infeasible_calorie_window_returns_none(self) -> None:
+        result = find_optimal_plan(
+            self._allocs(),
+            self._meals_by_slot(),
+            constraints=PlanConstraints(max_calories=100),
+        )
+        assert result is None
+
+
+class TestSearchStats:
+    def test_separable_plan_expands_one_node_per_slot(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot: dict[MealSlot, list[Meal]] = {
+            "breakfast": breakfast_meals,
+            "lunch": lunch_meals,
+            "dinner": dinner_meals,
+            "snack": snack_meals,
+        }
+        stats = SearchStats()
+        find_optimal_plan(allocs, meals_by_slot, stats=stats)
+        assert stats == SearchStats(nodes_expanded=4, nodes_pruned=0)
+
+    def test_binding_window_records_pruning(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot: dict[MealSlot, list[Meal]] = {
+            "breakfast": breakfast_meals,
+            "lunch": lunch_meals,
+            "dinner": dinner_meals,
+            "snack": snack_meals,
+        }
+        stats = SearchStats()
+        result = find_optimal_plan(
+            allocs, meals_by_slot, constraints=PlanConstraints(max_calories=1700), stats=stats
+        )
+        assert result is not None
+        assert stats.nodes_expanded > 0
+        assert stats.nodes_pruned > 0
+
+    def test_counters_accumulate_across_calls(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot: dict[MealSlot, list[Meal]] = {
+            "breakfast": breakfast_meals,
+            "lunch": lunch_meals,
+            "dinner": dinner_meals,
+            "snack": snack_meals,
+        }
+        stats = SearchStats()
+        find_optimal_plan(allocs, meals_by_slot, stats=stats)
+        find_optimal_plan(allocs, meals_by_slot, stats=stats)
+        assert stats.nodes_expanded == 8
+
+    def test_engine_stats_record_candidates_and_budget_outcome(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot = _large_meals_by_slot(400)
+        stats = EngineStats()
+        find_optimal_plan(
+            allocs,
+            meals_by_slot,
+            constraints=PlanConstraints(min_calories=1900, max_calories=1950),
+            stats=stats,
+            budget=SearchBudget(max_nodes=50),
+        )
+        assert stats.candidates_per_slot == {
+            slot: len(meals) for slot, meals in meals_by_slot.items()
+        }
+        assert stats.nodes_expanded == 50
+        assert stats.searches == 1
+        assert stats.budget_exhausted == 1
+        assert stats.score_ms > 0
+        assert stats.search_ms > 0
+
+
+def _large_meals_by_slot(count: int) -> dict[MealSlot, list[Meal]]:
+    meals_by_slot: dict[MealSlot, list[Meal]] = {
+        "breakfast": [], "lunch": [], "dinner": [], "snack": []
+    }
+    for meal in generate_large_catalog(count):
+        meals_by_slot[meal.category].append(meal)
+    return meals_by_slot
+
+
+class TestSearchBudget:
+    WINDOW = PlanConstraints(min_calories=1900, max_calories=1950)
+
+    def test_unlimited_budget_matches_full_search(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot = _large_meals_by_slot(400)
+        full = find_optimal_plan(allocs, meals_by_slot, constraints=self.WINDOW)
+        budgeted = find_optimal_plan(
+            allocs,
+            meals_by_slot,
+            constraints=self.WINDOW,
+            budget=SearchBudget(deadline_ms=60_000, max_nodes=10**9),
+        )
+        assert full is not None and budgeted is not None
+        assert budgeted == full
+        assert budgeted.optimal
+        assert budgeted.gap_bound == 0.0
+
+    def test_node_limit_returns_incumbent_with_valid_gap(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot = _large_meals_by_slot(400)
+        full = find_optimal_plan(allocs, meals_by_slot, constraints=self.WINDOW)
+        stats = SearchStats()
+        partial = find_optimal_plan(
+            allocs,
+            meals_by_slot,
+            constraints=self.WINDOW,
+            stats=stats,
+            budget=SearchBudget(max_nodes=50),
+        )
+        assert full is not None and partial is not None
+        assert stats.nodes_expanded == 50
+        assert not partial.optimal
+        assert partial.total_score <= full.total_score
+        assert partial.total_score + partial.gap_bound >= full.total_score - 1e-12
+        calories = sum(item.meal.nutritional_info.calories for item in partial.items)
+        assert 1900 <= calories <= 1950
+
+    def test_gap_shrinks_with_more_nodes(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot = _large_meals_by_slot(400)
+        upper_bounds = []
+        for max_nodes in (20, 200, 2000):
+            plan = find_optimal_plan(
+                allocs,
+                meals_by_slot,
+                constraints=self.WINDOW,
+                budget=SearchBudget(max_nodes=max_nodes),
+            )
+            assert plan is not None
+            upper_bounds.append(plan.total_score + plan.gap_bound)
+        assert upper_bounds == sorted(upper_bounds, reverse=True)
+
+    def test_zero_nodes_finds_nothing(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        result = find_optimal_plan(
+            allocs,
+            _large_meals_by_slot(400),
+            constraints=self.WINDOW,
+            budget=SearchBudget(max_nodes=0),
+        )
+        assert result is None
+
+    def test_separable_plan_ignores_budget(self) -> None:
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        result = find_optimal_plan(
+            allocs, _large_meals_by_slot(400), budget=SearchBudget(max_nodes=0)
+        )
+        assert result is not None
+        assert result.optimal
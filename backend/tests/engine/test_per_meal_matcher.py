@@ -72,3 +72,17 @@ class TestMatchMeals:
             assert item.deviation.protein >= 0
             assert item.deviation.carbs >= 0
             assert item.deviation.fat >= 0
+
+    def test_excludes_meal_ids(self) -> None:
+        baseline = match_meals(all_meals, _make_request(limit=5))
+        excluded = frozenset(s.meal.id for s in baseline[:2])
+        results = match_meals(all_meals, _make_request(limit=5, exclude_meal_ids=excluded))
+        assert len(results) == 5
+        assert not excluded & {s.meal.id for s in results}
+        assert [s.meal.id for s in results[:3]] == [s.meal.id for s in baseline[2:]]
+
+    def test_excluding_unknown_ids_is_noop(self) -> None:
+        results = match_meals(
+            all_meals, _make_request(exclude_meal_ids=frozenset({"not-a-meal"}))
+        )
+        assert results == match_meals(all_meals, _make_request())
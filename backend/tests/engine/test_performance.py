@@ -2,10 +2,30 @@
 
 import time
 
+from app.engine.approximate import build_shortlist, plan_from_shortlist
+from app.engine.catalog import MealCatalog
 from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
 from app.engine.daily_planner import generate_daily_plan
+from app.engine.multi_day_assignment import assign_multi_day_plan
+from app.engine.multi_day_generator import generate_multi_day_plan
+from app.engine.optimizer import find_optimal_plan
 from app.engine.per_meal_matcher import match_meals
-from app.engine.types import MealMatchRequest, PlanRequest
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.scoring import calculate_score, score_many
+from app.engine.slot_allocator import allocate_slots
+from app.engine.types import (
+    MacroTargets,
+    Meal,
+    MealMatchRequest,
+    MealSlot,
+    PlanConstraints,
+    PlanRequest,
+    SearchBudget,
+    SearchStats,
+    VariantDiversity,
+    VarietyConstraints,
+)
+from app.engine.variant_generator import generate_plan_variants
 from tests.engine.fixtures import generate_large_catalog, maintenance_targets
 
 
@@ -57,3 +77,190 @@ class TestPerformance:
 
         assert len(result) == 10
         assert elapsed_ms < 20
+
+    def test_separable_fast_path_matches_branch_and_bound_100k(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot = {a.slot: catalog.subset(catalog.rows_for_category(a.slot)) for a in allocs}
+
+        fast = find_optimal_plan(allocs, meals_by_slot)
+        # A non-binding calorie window forces the branch-and-bound path
+        stats = SearchStats()
+        start = time.perf_counter()
+        searched = find_optimal_plan(
+            allocs, meals_by_slot, constraints=PlanConstraints(min_calories=0), stats=stats
+        )
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert fast is not None
+        assert fast == searched
+        # Suffix max-score bounds close the search right after the first full plan
+        assert stats.nodes_expanded == len(allocs)
+        assert elapsed_ms < 500
+
+    def test_separable_fast_path_100k(self) -> None:
+        catalog = generate_large_catalog(100_000)
+        allocs = allocate_slots(maintenance_targets, DEFAULT_SLOT_PERCENTAGES)
+        meals_by_slot: dict[MealSlot, list[Meal]] = {
+            a.slot: [m for m in catalog if m.category == a.slot] for a in allocs
+        }
+
+        start = time.perf_counter()
+        result = find_optimal_plan(allocs, meals_by_slot)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        # Branch-and-bound always returns the head of each (-score, id) ranking first
+        assert result is not None
+        for alloc, item in zip(allocs, result.items, strict=True):
+            ranked = sorted(
+                meals_by_slot[alloc.slot],
+                key=lambda m: (-calculate_score(m.nutritional_info, alloc.targets), m.id),
+            )
+            assert item.meal.id == ranked[0].id
+        assert elapsed_ms < 3000
+
+    def test_score_many_100k_single_digit_ms(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        score_many(catalog, maintenance_targets)  # warm-up
+
+        start = time.perf_counter()
+        scores, deviations = score_many(catalog, maintenance_targets)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert scores.shape == (100_000,)
+        assert deviations.shape == (100_000, 4)
+        assert elapsed_ms < 10
+
+    def test_match_meals_100k_top_k(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        request = MealMatchRequest(
+            targets=maintenance_targets,
+            limit=10,
+            exclude_meal_ids=frozenset(catalog.ids[:1000]),
+        )
+        match_meals(catalog, request)  # warm-up (eligibility mask cache)
+
+        start = time.perf_counter()
+        result = match_meals(catalog, request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert len(result) == 10
+        assert elapsed_ms < 50
+
+    def test_multi_day_30_days_100k_reuses_prepared_context(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+
+        start = time.perf_counter()
+        single = generate_daily_plan(catalog, request)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        result = generate_multi_day_plan(catalog, request, 30)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert single is not None
+        assert len(result.days) == 30
+        assert not result.has_repeats
+        # One scoring/ranking pass plus 30 masked selections, not 30 full plans
+        assert elapsed_ms < 5 * single_ms + 50
+
+    def test_global_assignment_30_days_10k_vs_greedy(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(10_000))
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+
+        start = time.perf_counter()
+        greedy = generate_multi_day_plan(catalog, request, 30)
+        greedy_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        assigned = assign_multi_day_plan(catalog, request, 30, VarietyConstraints(max_repeats=2))
+        assigned_ms = (time.perf_counter() - start) * 1000
+
+        greedy_score = sum(d.plan.total_score for d in greedy.days)
+        assigned_score = sum(d.plan.total_score for d in assigned.days)
+        assert len(assigned.days) == 30
+        # Planned repeats (at most 2x, never on consecutive days) beat 30 distinct picks
+        assert assigned_score >= greedy_score
+        assert assigned_ms < 100
+        assert assigned_ms < greedy_ms * 2
+
+    def test_daily_total_500_per_slot(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(2000))
+        request = PlanRequest(
+            daily_targets=maintenance_targets,
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            objective="daily_total",
+        )
+
+        start = time.perf_counter()
+        result = generate_daily_plan(catalog, request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert result is not None
+        assert result.total_score == calculate_score(result.actual_macros, maintenance_targets)
+        # 500^4 plans; meet-in-the-middle with pair pruning keeps this interactive
+        assert elapsed_ms < 3000
+
+    def test_variants_100k_cost_one_plan(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+
+        start = time.perf_counter()
+        generate_daily_plan(catalog, request)
+        single_ms = (time.perf_counter() - start) * 1000
+
+        for diversity in (VariantDiversity(), VariantDiversity(min_differing_slots=2)):
+            start = time.perf_counter()
+            variants = generate_plan_variants(catalog, request, 20, diversity)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            assert len(variants) == 20
+            # One ranking pass; the variant search itself is tiny next to it
+            assert elapsed_ms < 2 * single_ms + 50
+
+    def test_deadline_bounds_constrained_search_20k(self) -> None:
+        # A binding window over 20k meals takes tens of seconds to prove optimal
+        request = PlanRequest(
+            daily_targets=maintenance_targets,
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            constraints=PlanConstraints(min_calories=1900, max_calories=2100),
+        )
+        context = PreparedPlanContext(MealCatalog(generate_large_catalog(20_000)), request)
+
+        start = time.perf_counter()
+        result = context.plan(budget=SearchBudget(deadline_ms=100))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        assert result is not None
+        assert not result.optimal
+        assert 0 < result.gap_bound < 1
+        assert elapsed_ms < 150
+
+    def test_shortlist_plans_are_independent_of_catalog_size(self) -> None:
+        catalog = MealCatalog(generate_large_catalog(100_000))
+        request = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+        shortlist = build_shortlist(catalog, request)
+        users = [
+            PlanRequest(
+                daily_targets=MacroTargets(
+                    calories=1980 + i, protein=148 + i % 4, carbs=196 + i % 8, fat=64 + i % 3
+                ),
+                slots=DEFAULT_SLOT_PERCENTAGES,
+            )
+            for i in range(40)
+        ]
+
+        start = time.perf_counter()
+        exact = [generate_daily_plan(catalog, user) for user in users[:5]]
+        exact_ms = (time.perf_counter() - start) * 1000 / 5
+        start = time.perf_counter()
+        approximate = [plan_from_shortlist(shortlist, user) for user in users]
+        approximate_ms = (time.perf_counter() - start) * 1000 / len(users)
+
+        for exact_plan, plan in zip(exact, approximate, strict=False):
+            assert exact_plan is not None and plan is not None
+            assert exact_plan.total_score - plan.total_score <= plan.gap_bound + 1e-12
+        # Re-scoring a few hundred candidates per slot instead of 25k
+        assert approximate_ms < 10
+        assert approximate_ms * 10 < exact_ms
@@ -0,0 +1,74 @@
+"""Tests for PreparedPlanContext."""
+
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.plan_context import PreparedPlanContext
+from app.engine.types import EngineStats, PlanConstraints, PlanRequest, SearchStats
+from tests.engine.fixtures import all_meals, generate_large_catalog, maintenance_targets
+
+
+def _make_request(**overrides: object) -> PlanRequest:
+    defaults = {
+        "daily_targets": maintenance_targets,
+        "slots": DEFAULT_SLOT_PERCENTAGES,
+        "allergies": [],
+        "dietary_preferences": [],
+    }
+    defaults.update(overrides)
+    return PlanRequest(**defaults)  # type: ignore[arg-type]
+
+
+class TestPreparedPlanContext:
+    def test_plan_matches_generate_daily_plan(self) -> None:
+        request = _make_request(allergies=["fish"])
+        context = PreparedPlanContext(all_meals, request)
+        assert context.plan() == generate_daily_plan(all_meals, request)
+
+    def test_exclusions_match_replanning_on_reduced_pool(self) -> None:
+        request = _make_request()
+        context = PreparedPlanContext(all_meals, request)
+        first = context.plan()
+        assert first is not None
+
+        used = {item.meal.id for item in first.items}
+        remaining = [m for m in all_meals if m.id not in used]
+        assert context.plan(used) == generate_daily_plan(remaining, request)
+
+    def test_exclusions_with_constraints(self) -> None:
+        request = _make_request(constraints=PlanConstraints(max_calories=1800))
+        context = PreparedPlanContext(MealCatalog(all_meals), request)
+        used = {m.id for m in all_meals[::3]}
+        remaining = [m for m in all_meals if m.id not in used]
+        assert context.plan(used) == generate_daily_plan(remaining, request)
+
+    def test_returns_none_when_slot_exhausted(self) -> None:
+        context = PreparedPlanContext(all_meals, _make_request())
+        breakfast_ids = {m.id for m in all_meals if m.category == "breakfast"}
+        assert context.plan(breakfast_ids) is None
+
+    def test_ranks_once_per_slot(self) -> None:
+        context = PreparedPlanContext(generate_large_catalog(2000), _make_request())
+        rankings = [order for _, _, order in context.ranked_by_slot]
+        stats = SearchStats()
+        for _ in range(5):
+            context.plan(["not-a-meal"], stats=stats)
+        assert all(
+            order is after
+            for order, (_, _, after) in zip(rankings, context.ranked_by_slot, strict=True)
+        )
+        assert stats.nodes_expanded == 5 * len(context.slot_allocations)
+
+    def test_engine_stats_record_every_phase(self) -> None:
+        stats = EngineStats()
+        result = generate_daily_plan(
+            generate_large_catalog(2000), _make_request(allergies=["fish"]), stats=stats
+        )
+        assert result is not None
+        for phase in ("filter_ms", "allocate_ms", "group_ms", "score_ms", "search_ms"):
+            assert getattr(stats, phase) > 0, phase
+        assert set(stats.candidates_per_slot) == {"breakfast", "lunch", "dinner", "snack"}
+        assert all(count > 0 for count in stats.candidates_per_slot.values())
+        assert stats.nodes_expanded == len(DEFAULT_SLOT_PERCENTAGES)
+        assert stats.searches == 1
+        assert stats.budget_exhausted == 0
@@ -0,0 +1,35 @@
+"""Tests for deterministic top-K ranking."""
+
+import numpy as np
+import pytest
+
+from app.engine.ranking import rank_order, top_k
+
+
+def _ranked_reference(scores: list[float], tiebreak: list[int]) -> list[int]:
+    return sorted(range(len(scores)), key=lambda i: (-scores[i], tiebreak[i]))
+
+
+class TestRankOrder:
+    def test_score_desc_then_tiebreak_asc(self) -> None:
+        scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1])
+        tiebreak = np.array([4, 3, 2, 1, 0], dtype=np.int64)
+        assert rank_order(scores, tiebreak).tolist() == [3, 1, 2, 0, 4]
+
+
+class TestTopK:
+    @pytest.mark.parametrize("k", [0, 1, 3, 10, 50, 199, 200, 500])
+    def test_matches_full_sort_with_heavy_ties(self, k: int) -> None:
+        rng = np.random.default_rng(42)
+        # Few distinct values so the k-th score is almost always tied
+        scores = rng.integers(0, 7, size=200).astype(np.float64) / 7
+        tiebreak = rng.permutation(200).astype(np.int64)
+        expected = _ranked_reference(scores.tolist(), tiebreak.tolist())[:k]
+        assert top_k(scores, tiebreak, k).tolist() == expected
+
+    def test_empty(self) -> None:
+        empty = np.empty(0, dtype=np.float64)
+        assert top_k(empty, np.empty(0, dtype=np.int64), 5).tolist() == []
+
+    def test_negative_k(self) -> None:
+        assert top_k(np.array([1.0]), np.array([0], dtype=np.int64), -1).tolist() == []
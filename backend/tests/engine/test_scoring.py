@@ -1,9 +1,19 @@
 """Tests for scoring module — ported from TypeScript."""
 
+from dataclasses import replace
+
 import pytest
 
-from app.engine.scoring import calculate_deviation, calculate_score
+from app.engine.catalog import MealCatalog
+from app.engine.scoring import calculate_deviation, calculate_score, deviation_at, score_many
 from app.engine.types import MacroTargets, NutritionalInfo, ScoringWeights
+from tests.engine.fixtures import (
+    all_meals,
+    bulking_targets,
+    generate_large_catalog,
+    keto_targets,
+    maintenance_targets,
+)
 
 
 class TestCalculateDeviation:
@@ -110,3 +120,60 @@ class TestCalculateScore:
         score_above = calculate_score(above, target)
         score_below = calculate_score(below, target)
         assert score_above == pytest.approx(score_below, abs=1e-10)
+
+
+class TestScoreMany:
+    @pytest.mark.parametrize(
+        "target",
+        [
+            maintenance_targets,
+            bulking_targets,
+            keto_targets,
+            MacroTargets(calories=500, protein=0, carbs=0, fat=15),
+        ],
+    )
+    @pytest.mark.parametrize(
+        "weights",
+        [
+            ScoringWeights(),
+            ScoringWeights(calories=1, protein=0, carbs=0, fat=0),
+            ScoringWeights(calories=0, protein=0, carbs=0, fat=0),
+        ],
+    )
+    def test_bit_identical_to_scalar(self, target: MacroTargets, weights: ScoringWeights) -> None:
+        catalog = MealCatalog(generate_large_catalog(500))
+        scores, deviations = score_many(catalog, target, weights)
+        for row, meal in enumerate(catalog.meals):
+            assert scores[row] == calculate_score(meal.nutritional_info, target, weights)
+            assert deviation_at(deviations, row) == calculate_deviation(
+                meal.nutritional_info, target
+            )
+
+    def test_rows_subset(self) -> None:
+        catalog = MealCatalog(all_meals)
+        rows = catalog.rows_for_category("dinner")
+        scores, deviations = score_many(catalog, maintenance_targets, rows=rows)
+        assert scores.shape == (len(rows),)
+        assert deviations.shape == (len(rows), 4)
+        for i, row in enumerate(rows):
+            meal = catalog.meals[row]
+            assert scores[i] == calculate_score(meal.nutritional_info, maintenance_targets)
+
+    def test_zero_target_special_case(self) -> None:
+        catalog = MealCatalog(all_meals)
+        target = MacroTargets(calories=0, protein=0, carbs=0, fat=0)
+        scores, _ = score_many(catalog, target)
+        # Every fixture meal has calories, protein and fat, so all are penalised
+        assert (scores == 0.0).all()
+
+    def test_zero_target_zero_actual(self) -> None:
+        meal = all_meals[0]
+        info = NutritionalInfo(calories=0, protein=0, carbs=0, fat=0)
+        catalog = MealCatalog([replace(meal, nutritional_info=info)])
+        scores, _ = score_many(catalog, MacroTargets(calories=0, protein=0, carbs=0, fat=0))
+        assert scores.tolist() == [1.0]
+
+    def test_empty_catalog(self) -> None:
+        scores, deviations = score_many(MealCatalog([]), maintenance_targets)
+        assert scores.shape == (0,)
+        assert deviations.shape == (0, 4)
@@ -1,12 +1,16 @@
 """Matching route tests."""
 
+import json
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.meal import Meal
 from app.models.user import UserProfile
-from tests.conftest import create_test_user, make_auth_header
+from tests.conftest import create_test_user, make_auth_header, test_engine
 
 
 async def _seed_meals(db: AsyncSession) -> list[Meal]:
@@ -121,6 +125,49 @@ class TestGeneratePlan:
         assert "items" in data
         assert len(data["items"]) == 4  # 4 slots
 
+    async def test_generate_approximate_plan(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(settings, "plan_approximate", True)
+        user = await create_test_user(db_session)
+        await _seed_meals(db_session)
+
+        resp = await client.post(
+            "/api/v1/matching/plan",
+            headers=make_auth_header(user.id),
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data["items"]) == 4
+        # Shortlists this small hold every candidate, so the plan is exact
+        assert data["optimal"] is True
+
+    async def test_debug_stats_header(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        user = await create_test_user(db_session)
+        await _seed_meals(db_session)
+
+        resp = await client.post(
+            "/api/v1/matching/plan", headers=make_auth_header(user.id)
+        )
+        assert "x-engine-stats" not in resp.headers
+
+        monkeypatch.setattr(settings, "engine_debug_stats", True)
+        resp = await client.post(
+            "/api/v1/matching/multi-day-plan?days=4", headers=make_auth_header(user.id)
+        )
+        assert resp.status_code == 200
+        stats = json.loads(resp.headers["x-engine-stats"])
+        assert stats["searches"] >= 4
+        assert set(stats["candidates_per_slot"]) == {"breakfast", "lunch", "dinner", "snack"}
+
     async def test_plan_items_have_slots(
         self, client: AsyncClient, db_session: AsyncSession
     ) -> None:
@@ -270,6 +317,22 @@ class TestGeneratePlans:
             meals_1 = {item["meal_id"] for item in data[1]["items"]}
             assert meals_0 != meals_1
 
+    async def test_plans_with_min_differing_slots(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        user = await create_test_user(db_session)
+        await _seed_meals(db_session)
+
+        resp = await client.post(
+            "/api/v1/matching/plans?count=3&min_differing_slots=1",
+            headers=make_auth_header(user.id),
+        )
+        assert resp.status_code == 200
+        plans = [[item["meal_id"] for item in plan["items"]] for plan in resp.json()]
+        assert len({tuple(p) for p in plans}) == len(plans)
+        scores = [plan["total_score"] for plan in resp.json()]
+        assert scores == sorted(scores, reverse=True)
+
     async def test_plans_requires_auth(self, client: AsyncClient) -> None:
         resp = await client.post("/api/v1/matching/plans")
         assert resp.status_code in (401, 403)
@@ -315,6 +378,41 @@ class TestMultiDayPlan:
             assert "items" in plan
             assert len(plan["items"]) == 4
 
+    async def test_multi_day_plan_query_count_is_independent_of_days(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        # Reload the pricing settings every request, so only batching keeps it flat
+        monkeypatch.setattr(settings, "pricing_settings_ttl_s", 0)
+        user = await create_test_user(db_session)
+        await _seed_meals(db_session)
+        statements: list[str] = []
+
+        def count(*args: object) -> None:
+            statements.append(str(args[2]))
+
+        async def queries_for(days: int) -> int:
+            statements.clear()
+            resp = await client.post(
+                f"/api/v1/matching/multi-day-plan?days={days}",
+                headers=make_auth_header(user.id),
+            )
+            assert resp.status_code == 200
+            return len(statements)
+
+        await queries_for(4)  # loads the catalog snapshot
+        event.listen(test_engine.sync_engine, "before_cursor_execute", count)
+        try:
+            short = await queries_for(4)
+            month = await queries_for(30)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", count)
+
+        assert month == short
+        assert sum("app_settings" in s for s in statements) == 1
+
     async def test_multi_day_plan_no_meals_returns_404(
         self, client: AsyncClient, db_session: AsyncSession
     ) -> None:
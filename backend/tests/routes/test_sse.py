@@ -0,0 +1,106 @@
+"""SSE route tests (authorization; streaming itself is covered by the SSE manager tests)."""
+
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+from app.realtime.sse_manager import sse_manager
+from app.routes.sse import MAX_STREAM_ORDERS
+from app.services.order_service import owned_order_ids
+from tests.conftest import create_test_user, make_auth_header
+
+
+async def _seed_order(db: AsyncSession, user_id: uuid.UUID, status: str = "paid") -> Order:
+    order = Order(user_id=user_id, status=status, type="one_time", total=450.0)
+    db.add(order)
+    await db.commit()
+    await db.refresh(order)
+    return order
+
+
+@pytest.mark.asyncio
+class TestOwnedOrderIds:
+    async def test_keeps_only_the_users_orders(self, db_session: AsyncSession) -> None:
+        user = await create_test_user(db_session, google_id="g1", email="u1@test.com")
+        other = await create_test_user(db_session, google_id="g2", email="u2@test.com")
+        mine = await _seed_order(db_session, user.id)
+        theirs = await _seed_order(db_session, other.id)
+
+        owned = await owned_order_ids(db_session, user.id, [mine.id, theirs.id, uuid.uuid4()])
+
+        assert owned == [mine.id]
+
+    async def test_defaults_to_unfinished_orders(self, db_session: AsyncSession) -> None:
+        user = await create_test_user(db_session)
+        paid = await _seed_order(db_session, user.id, "paid")
+        delivering = await _seed_order(db_session, user.id, "delivering")
+        await _seed_order(db_session, user.id, "delivered")
+        await _seed_order(db_session, user.id, "cancelled")
+
+        owned = await owned_order_ids(db_session, user.id)
+
+        assert set(owned) == {paid.id, delivering.id}
+
+
+@pytest.mark.asyncio
+class TestStreamAuthorization:
+    async def test_single_stream_rejects_another_users_order(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        user = await create_test_user(db_session, google_id="g1", email="u1@test.com")
+        other = await create_test_user(db_session, google_id="g2", email="u2@test.com")
+        theirs = await _seed_order(db_session, other.id)
+
+        resp = await client.get(
+            f"/api/v1/sse/orders/{theirs.id}", headers=make_auth_header(user.id)
+        )
+
+        assert resp.status_code == 404
+
+    async def test_multiplexed_stream_rejects_any_foreign_order(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        user = await create_test_user(db_session, google_id="g1", email="u1@test.com")
+        other = await create_test_user(db_session, google_id="g2", email="u2@test.com")
+        mine = await _seed_order(db_session, user.id)
+        theirs = await _seed_order(db_session, other.id)
+
+        resp = await client.get(
+            "/api/v1/sse/orders",
+            params={"order_ids": [str(mine.id), str(theirs.id)]},
+            headers=make_auth_header(user.id),
+        )
+
+        assert resp.status_code == 404
+
+    async def test_multiplexed_stream_limits_order_count(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        user = await create_test_user(db_session)
+
+        resp = await client.get(
+            "/api/v1/sse/orders",
+            params={"order_ids": [str(uuid.uuid4()) for _ in range(MAX_STREAM_ORDERS + 1)]},
+            headers=make_auth_header(user.id),
+        )
+
+        assert resp.status_code == 422
+
+    async def test_multiplexed_stream_needs_an_unfinished_order(
+        self, client: AsyncClient, db_session: AsyncSession
+    ) -> None:
+        user = await create_test_user(db_session)
+        await _seed_order(db_session, user.id, "delivered")
+
+        resp = await client.get("/api/v1/sse/orders", headers=make_auth_header(user.id))
+
+        assert resp.status_code == 404
+        assert not any(sse_manager._wheel)
+
+    async def test_requires_authentication(self, client: AsyncClient) -> None:
+        resp = await client.get("/api/v1/sse/orders")
+
+        assert resp.status_code in (401, 403)
@@ -0,0 +1,183 @@
+"""Catalog snapshot service tests."""
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from app.models.meal import Meal
+from app.services import catalog_snapshot
+from app.services.catalog_snapshot import CATALOG_CHANNEL, CatalogSnapshotService
+
+
+def _meal(name: str, category: str = "lunch") -> Meal:
+    return Meal(
+        id=uuid.uuid4(), name=name, description=name, category=category,
+        calories=500, protein=30, carbs=50, fat=15, serving_size="300g",
+        price=100, allergens=[], dietary_tags=[], active=True,
+    )
+
+
+class FakeResult:
+    def __init__(self, rows: list[Meal]) -> None:
+        self._rows = rows
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list[Meal]:
+        return list(self._rows)
+
+
+class FakeSession:
+    """Stands in for AsyncSession: every query returns the current `rows`."""
+
+    def __init__(self, rows: list[Meal]) -> None:
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, _query: object) -> FakeResult:
+        self.queries += 1
+        await asyncio.sleep(0)
+        return FakeResult(self.rows)
+
+
+class FakePubSub:
+    def __init__(self, broker: "FakeRedis") -> None:
+        self._broker = broker
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def subscribe(self, channel: str) -> None:
+        self._broker.subscribers.setdefault(channel, []).append(self._queue)
+
+    async def listen(self) -> AsyncIterator[dict[str, Any]]:
+        while True:
+            yield await self._queue.get()
+
+    async def aclose(self) -> None:
+        for queues in self._broker.subscribers.values():
+            if self._queue in queues:
+                queues.remove(self._queue)
+
+
+class FakeRedis:
+    """In-process pub/sub shared by several 'workers'."""
+
+    def __init__(self) -> None:
+        self.subscribers: dict[str, list[asyncio.Queue[dict[str, Any]]]] = {}
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def publish(self, channel: str, data: str) -> int:
+        queues = self.subscribers.get(channel, [])
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": data})
+        return len(queues)
+
+
+async def _no_redis() -> None:
+    return None
+
+
+@pytest.mark.asyncio
+class TestCatalogSnapshot:
+    async def test_loads_once_until_invalidated(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(catalog_snapshot, "get_redis", _no_redis)
+        service = CatalogSnapshotService()
+        db = FakeSession([_meal("a"), _meal("b")])
+
+        first = await service.get(db)  # type: ignore[arg-type]
+        second = await service.get(db)  # type: ignore[arg-type]
+
+        assert second is first
+        assert db.queries == 1
+        assert len(first.catalog) == 2
+        assert set(first.db_meals_by_id) == {m.id for m in first.meals}
+
+    async def test_refresh_swaps_in_new_version(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(catalog_snapshot, "get_redis", _no_redis)
+        service = CatalogSnapshotService()
+        db = FakeSession([_meal("a")])
+        old = await service.get(db)  # type: ignore[arg-type]
+
+        db.rows = [*db.rows, _meal("b")]
+        new = await service.refresh(db)  # type: ignore[arg-type]
+
+        assert new.version > old.version
+        assert new.key != old.key
+        assert await service.get(db) is new  # type: ignore[arg-type]
+        # A request still holding the old snapshot keeps a consistent view
+        assert len(old.meals) == len(old.catalog) == 1
+        assert len(new.meals) == 2
+
+    async def test_concurrent_gets_share_one_load(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(catalog_snapshot, "get_redis", _no_redis)
+        service = CatalogSnapshotService()
+        db = FakeSession([_meal("a")])
+
+        snapshots = await asyncio.gather(
+            *(service.get(db) for _ in range(10))  # type: ignore[arg-type]
+        )
+
+        assert db.queries == 1
+        assert all(s is snapshots[0] for s in snapshots)
+
+    async def test_snapshot_rows_are_not_the_sessions_objects(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(catalog_snapshot, "get_redis", _no_redis)
+        service = CatalogSnapshotService()
+        row = _meal("a")
+        snapshot = await service.get(FakeSession([row]))  # type: ignore[arg-type]
+
+        copy = snapshot.db_meals_by_id[str(row.id)]
+        assert copy is not row
+        assert copy.name == row.name
+        with pytest.raises(TypeError):
+            snapshot.db_meals_by_id["x"] = row  # type: ignore[index]
+
+    async def test_other_workers_invalidate_through_pubsub(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        redis = FakeRedis()
+
+        async def fake_get_redis() -> FakeRedis:
+            return redis
+
+        monkeypatch.setattr(catalog_snapshot, "get_redis", fake_get_redis)
+        writer, reader = CatalogSnapshotService(), CatalogSnapshotService()
+        db = FakeSession([_meal("a")])
+        await reader.start_listener()
+        try:
+            while not redis.subscribers.get(CATALOG_CHANNEL):
+                await asyncio.sleep(0)
+            stale = await reader.get(db)  # type: ignore[arg-type]
+
+            db.rows = [*db.rows, _meal("b")]
+            await writer.refresh(db)  # type: ignore[arg-type]
+            await asyncio.sleep(0.01)
+
+            fresh = await reader.get(db)  # type: ignore[arg-type]
+        finally:
+            await reader.stop_listener()
+
+        assert fresh.version > stale.version
+        assert len(fresh.meals) == 2
+
+    async def test_own_messages_are_ignored(self) -> None:
+        service = CatalogSnapshotService()
+        version = service.version
+
+        service.handle_message(f'{{"origin": "{service._origin}"}}')
+        assert service.version == version
+        service.handle_message('{"origin": "another-worker"}')
+        assert service.version == version + 1
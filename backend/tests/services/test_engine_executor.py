@@ -0,0 +1,166 @@
+"""Engine executor tests."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.types import EngineStats, PlanRequest
+from app.services.engine_executor import (
+    EngineBusyError,
+    EngineCancelledError,
+    EngineExecutor,
+)
+from benchmarks.event_loop_lag import measure_lag
+from tests.engine.fixtures import all_meals, generate_large_catalog, maintenance_targets
+
+REQUEST = PlanRequest(daily_targets=maintenance_targets, slots=DEFAULT_SLOT_PERCENTAGES)
+
+
+def _catalog_size(catalog: MealCatalog) -> int:
+    return len(catalog)
+
+
+def _catalog_identity(catalog: MealCatalog) -> int:
+    return id(catalog)
+
+
+def _sleep_and_record(catalog: MealCatalog, seconds: float, ran: list[float]) -> None:
+    time.sleep(seconds)
+    ran.append(seconds)
+
+
+@pytest.mark.asyncio
+class TestEngineExecutor:
+    async def test_inline_runs_on_catalog(self) -> None:
+        executor = EngineExecutor(mode="inline")
+        result = await executor.run("k", all_meals, generate_daily_plan, REQUEST)
+
+        assert result == generate_daily_plan(all_meals, REQUEST)
+        assert executor.stats.submitted == 1
+        assert executor.stats.completed == 1
+        assert executor.stats.in_flight == 0
+
+    async def test_catalog_is_built_once_per_key(self) -> None:
+        executor = EngineExecutor(mode="thread", max_workers=2)
+        try:
+            first = await executor.run("same", all_meals, _catalog_identity)
+            second = await executor.run("same", all_meals, _catalog_identity)
+            other = await executor.run("other", all_meals, _catalog_identity)
+        finally:
+            executor.shutdown()
+
+        assert first == second
+        assert other != first
+
+    async def test_process_pool_loads_catalog_once_per_worker(self) -> None:
+        executor = EngineExecutor(mode="process", max_workers=1)
+        try:
+            await executor.start()
+            plan = await executor.run("k", all_meals, generate_daily_plan, REQUEST)
+            size = await executor.run("k", all_meals, _catalog_size)
+        finally:
+            executor.shutdown()
+
+        assert plan == generate_daily_plan(all_meals, REQUEST)
+        assert size == len(all_meals)
+        # Only the first job had to ship the meals
+        assert executor.stats.catalog_loads == 1
+
+    async def test_engine_stats_come_back_from_the_worker(self) -> None:
+        executor = EngineExecutor(mode="process", max_workers=1)
+        stats = EngineStats()
+        try:
+            plan = await executor.run(
+                "k", all_meals, generate_daily_plan, REQUEST, None, stats=stats
+            )
+            await executor.run("k", all_meals, generate_daily_plan, REQUEST, None, stats=stats)
+        finally:
+            executor.shutdown()
+
+        assert plan == generate_daily_plan(all_meals, REQUEST)
+        assert stats.searches == 2
+        assert stats.nodes_expanded == 2 * len(DEFAULT_SLOT_PERCENTAGES)
+        assert set(stats.candidates_per_slot) == {"breakfast", "lunch", "dinner", "snack"}
+        assert stats.search_ms > 0
+
+    async def test_rejects_when_queue_is_full(self) -> None:
+        executor = EngineExecutor(mode="thread", max_workers=1, max_pending=1)
+        try:
+            running = asyncio.create_task(
+                executor.run("k", all_meals, _sleep_and_record, 0.2, [])
+            )
+            await asyncio.sleep(0.01)
+            with pytest.raises(EngineBusyError):
+                await executor.run("k", all_meals, _catalog_size)
+            await running
+        finally:
+            executor.shutdown()
+
+        assert executor.stats.rejected == 1
+        assert executor.stats.completed == 1
+
+    async def test_disconnect_cancels_queued_job(self) -> None:
+        executor = EngineExecutor(mode="thread", max_workers=1)
+        ran: list[float] = []
+
+        async def disconnected() -> bool:
+            return True
+
+        try:
+            blocker = asyncio.create_task(
+                executor.run("k", all_meals, _sleep_and_record, 0.3, ran)
+            )
+            await asyncio.sleep(0.01)
+            with pytest.raises(EngineCancelledError):
+                await executor.run(
+                    "k", all_meals, _sleep_and_record, 0.01, ran,
+                    is_disconnected=disconnected,
+                )
+            await blocker
+            await asyncio.sleep(0.05)
+        finally:
+            executor.shutdown()
+
+        # The queued job never started
+        assert ran == [0.3]
+        assert executor.stats.cancelled == 1
+
+    async def test_task_cancellation_cancels_queued_job(self) -> None:
+        executor = EngineExecutor(mode="thread", max_workers=1)
+        ran: list[float] = []
+        try:
+            blocker = asyncio.create_task(
+                executor.run("k", all_meals, _sleep_and_record, 0.2, ran)
+            )
+            await asyncio.sleep(0.01)
+            queued = asyncio.create_task(
+                executor.run("k", all_meals, _sleep_and_record, 0.01, ran)
+            )
+            await asyncio.sleep(0.01)
+            queued.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await queued
+            await blocker
+            await asyncio.sleep(0.05)
+        finally:
+            executor.shutdown()
+
+        assert ran == [0.2]
+        assert executor.stats.in_flight == 0
+
+    async def test_process_pool_keeps_event_loop_responsive(self) -> None:
+        meals = generate_large_catalog(50_000)
+        inline = await measure_lag(EngineExecutor(mode="inline"), meals, 4, 30)
+        executor = EngineExecutor(mode="process", max_workers=2)
+        try:
+            pooled = await measure_lag(executor, meals, 4, 30)
+        finally:
+            executor.shutdown()
+
+        # Inline, the loop is blocked for the whole batch of plans
+        assert inline.max_lag_ms > 100
+        assert pooled.max_lag_ms < 50
@@ -0,0 +1,207 @@
+"""Plan cache tests."""
+
+import asyncio
+
+import pytest
+
+from app.engine.catalog import MealCatalog
+from app.engine.constants import DEFAULT_SCORING_WEIGHTS, DEFAULT_SLOT_PERCENTAGES
+from app.engine.daily_planner import generate_daily_plan
+from app.engine.types import MacroTargets, PlanRequest, PlanResult, ScoringWeights
+from app.services import plan_service
+from app.services.catalog_snapshot import CatalogSnapshot
+from app.services.engine_executor import EngineExecutor
+from app.services.plan_cache import PlanCache, profile_key
+from tests.engine.fixtures import all_meals
+
+ONBOARDING = MacroTargets(calories=2000, protein=150, carbs=200, fat=65)
+
+
+class Counter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def plan(self) -> PlanResult | None:
+        self.calls += 1
+        await asyncio.sleep(0)
+        request = PlanRequest(daily_targets=ONBOARDING, slots=DEFAULT_SLOT_PERCENTAGES)
+        return generate_daily_plan(all_meals, request)
+
+
+class TestProfileKey:
+    def test_list_order_and_duplicates_do_not_matter(self) -> None:
+        a = profile_key(ONBOARDING, ["peanuts", "dairy"], ["keto", "halal", "keto"])
+        b = profile_key(ONBOARDING, ["dairy", "peanuts"], ["halal", "keto"])
+        assert a == b
+        assert hash(a) == hash(b)
+
+    def test_default_weights_are_explicit(self) -> None:
+        assert profile_key(ONBOARDING, [], []) == profile_key(
+            ONBOARDING, [], [], DEFAULT_SCORING_WEIGHTS
+        )
+        assert profile_key(ONBOARDING, [], []) != profile_key(
+            ONBOARDING, [], [], ScoringWeights(calories=1.0, protein=0, carbs=0, fat=0)
+        )
+
+    def test_targets_and_allergies_distinguish_profiles(self) -> None:
+        other = MacroTargets(calories=2000, protein=160, carbs=200, fat=65)
+        assert profile_key(ONBOARDING, [], []) != profile_key(other, [], [])
+        assert profile_key(ONBOARDING, [], []) != profile_key(ONBOARDING, ["dairy"], [])
+
+
+@pytest.mark.asyncio
+class TestPlanCache:
+    async def test_identical_profiles_share_one_computation(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+        counter = Counter()
+        key = ("daily", profile_key(ONBOARDING, [], []))
+
+        first = await cache.get_or_compute(1, key, counter.plan)
+        second = await cache.get_or_compute(1, key, counter.plan)
+
+        assert second is first
+        assert counter.calls == 1
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.size) == (1, 1, 1)
+
+    async def test_none_results_are_cached(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+        calls = 0
+
+        async def nothing() -> None:
+            nonlocal calls
+            calls += 1
+
+        assert await cache.get_or_compute(1, "k", nothing) is None
+        assert await cache.get_or_compute(1, "k", nothing) is None
+        assert calls == 1
+
+    async def test_new_catalog_version_evicts_everything(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+        counter = Counter()
+        await cache.get_or_compute(1, "a", counter.plan)
+        await cache.get_or_compute(1, "b", counter.plan)
+
+        await cache.get_or_compute(2, "a", counter.plan)
+
+        assert counter.calls == 3
+        assert cache.stats.invalidations == 1
+        assert cache.stats.size == 1
+
+    async def test_stale_catalog_version_bypasses_cache(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+        counter = Counter()
+        await cache.get_or_compute(2, "a", counter.plan)
+
+        await cache.get_or_compute(1, "a", counter.plan)
+        await cache.get_or_compute(1, "a", counter.plan)
+
+        assert counter.calls == 3
+        assert cache.stats.size == 1
+        assert await cache.get_or_compute(2, "a", counter.plan) is not None
+        assert counter.calls == 3
+
+    async def test_catalog_change_during_compute_is_not_stored(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+
+        async def slow() -> str:
+            # Another request sees the next catalog version while this one computes
+            await cache.get_or_compute(2, "other", fast)
+            return "v1 result"
+
+        async def fast() -> str:
+            return "v2 result"
+
+        assert await cache.get_or_compute(1, "a", slow) == "v1 result"
+        assert cache.stats.size == 1  # only the v2 entry
+
+    async def test_lru_eviction_keeps_recently_used(self) -> None:
+        cache = PlanCache(max_entries=2, ttl_s=60)
+        counter = Counter()
+        await cache.get_or_compute(1, "a", counter.plan)
+        await cache.get_or_compute(1, "b", counter.plan)
+        await cache.get_or_compute(1, "a", counter.plan)  # a is now most recent
+        await cache.get_or_compute(1, "c", counter.plan)  # evicts b
+
+        await cache.get_or_compute(1, "a", counter.plan)
+        assert counter.calls == 3
+        await cache.get_or_compute(1, "b", counter.plan)
+        assert counter.calls == 4
+        assert cache.stats.evicted == 2
+
+    async def test_expired_entries_are_recomputed(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=0.01)
+        counter = Counter()
+        await cache.get_or_compute(1, "a", counter.plan)
+        await asyncio.sleep(0.02)
+
+        await cache.get_or_compute(1, "a", counter.plan)
+
+        assert counter.calls == 2
+        assert cache.stats.expired == 1
+
+    async def test_should_store_can_veto(self) -> None:
+        cache = PlanCache(max_entries=8, ttl_s=60)
+        counter = Counter()
+
+        for _ in range(2):
+            await cache.get_or_compute(
+                1, "a", counter.plan, should_store=lambda _result: False
+            )
+
+        assert counter.calls == 2
+        assert cache.stats.size == 0
+
+    async def test_disabled_cache_always_computes(self) -> None:
+        cache = PlanCache(max_entries=0, ttl_s=60)
+        counter = Counter()
+        await cache.get_or_compute(1, "a", counter.plan)
+        await cache.get_or_compute(1, "a", counter.plan)
+
+        assert counter.calls == 2
+        assert cache.stats.misses == 0
+
+
+@pytest.mark.asyncio
+class TestShortlistCache:
+    async def test_permuted_allergies_share_a_cell_shortlist(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        cache = PlanCache()
+        monkeypatch.setattr(plan_service.settings, "plan_approximate", True)
+        monkeypatch.setattr(plan_service, "plan_cache", cache)
+        monkeypatch.setattr(plan_service, "engine_executor", EngineExecutor(mode="inline"))
+        snapshot = CatalogSnapshot(
+            version=1, meals=tuple(all_meals), catalog=MealCatalog(all_meals), db_meals_by_id={}
+        )
+        first = PlanRequest(
+            daily_targets=ONBOARDING, slots=DEFAULT_SLOT_PERCENTAGES, allergies=["dairy", "eggs"]
+        )
+        second = PlanRequest(
+            daily_targets=MacroTargets(calories=2010, protein=151, carbs=199, fat=66),
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            allergies=["eggs", "dairy"],
+        )
+
+        assert await plan_service._daily_plan(snapshot, first, None) is not None
+        assert await plan_service._daily_plan(snapshot, second, None) is not None
+        assert cache.stats.misses == 1
+        assert cache.stats.hits == 1
+
+    async def test_weights_get_their_own_shortlist(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        cache = PlanCache()
+        monkeypatch.setattr(plan_service.settings, "plan_approximate", True)
+        monkeypatch.setattr(plan_service, "plan_cache", cache)
+        monkeypatch.setattr(plan_service, "engine_executor", EngineExecutor(mode="inline"))
+        snapshot = CatalogSnapshot(
+            version=1, meals=tuple(all_meals), catalog=MealCatalog(all_meals), db_meals_by_id={}
+        )
+        default = PlanRequest(daily_targets=ONBOARDING, slots=DEFAULT_SLOT_PERCENTAGES)
+        weighted = PlanRequest(
+            daily_targets=ONBOARDING,
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            weights=ScoringWeights(calories=1, protein=3, carbs=1, fat=1),
+        )
+
+        assert await plan_service._daily_plan(snapshot, default, None) is not None
+        assert await plan_service._daily_plan(snapshot, weighted, None) is not None
+        assert cache.stats.misses == 2
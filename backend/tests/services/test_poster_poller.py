@@ -0,0 +1,220 @@
+"""Poster poller tests against a local stub Poster server."""
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.models.order import Order
+from app.providers.poster_provider import RealPosterProvider
+from app.tasks import poster_poller
+from app.tasks.poster_poller import PollStats, poll_active_orders
+
+
+class StubPoster:
+    """HTTP/1.1 keep-alive server answering order.getOrder after `latency_s`.
+
+    Orders listed in `failing` get a 500.
+    """
+
+    def __init__(self, latency_s: float, statuses: dict[str, str]) -> None:
+        self.latency_s = latency_s
+        self.statuses = statuses
+        self.failing: set[str] = set()
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                while (await reader.readline()) not in (b"\r\n", b""):
+                    pass  # headers; GET requests have no body
+                query = parse_qs(urlsplit(request_line.split()[1].decode()).query)
+                order_id = query["order_id"][0]
+
+                self.requests += 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.latency_s)
+                self.in_flight -= 1
+
+                if order_id in self.failing:
+                    status_line, body = b"500 Internal Server Error", b"{}"
+                else:
+                    status_line = b"200 OK"
+                    body = json.dumps(
+                        {"response": {"status": self.statuses.get(order_id, "cooking")}}
+                    ).encode()
+                writer.write(
+                    b"HTTP/1.1 " + status_line + b"\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class FakeResult:
+    def __init__(self, orders: list[Order]) -> None:
+        self._orders = orders
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list[Order]:
+        return self._orders
+
+
+class FakeSession:
+    def __init__(self, orders: list[Order]) -> None:
+        self.orders = orders
+        self.commits = 0
+
+    async def __aenter__(self) -> "FakeSession":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execute(self, query: Any) -> FakeResult:
+        return FakeResult(self.orders)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+@pytest.fixture
+async def stub() -> AsyncIterator[tuple[StubPoster, str]]:
+    poster = StubPoster(latency_s=0.05, statuses={})
+    server = await asyncio.start_server(poster._handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        yield poster, f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def published(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, str]]:
+    calls: list[tuple[str, str]] = []
+
+    async def record(order_id: str, status: str) -> None:
+        calls.append((order_id, status))
+
+    monkeypatch.setattr(poster_poller, "publish_order_status", record)
+    return calls
+
+
+def _orders(count: int) -> list[Order]:
+    return [
+        Order(id=uuid.uuid4(), status="preparing", poster_order_id=f"p{i}")
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+class TestRealPosterProvider:
+    async def test_calls_share_one_keep_alive_pool(
+        self, stub: tuple[StubPoster, str]
+    ) -> None:
+        poster, url = stub
+        poster.statuses = {"p1": "ready"}
+        provider = RealPosterProvider(url, "token", max_connections=5)
+        try:
+            statuses = await asyncio.gather(
+                *(provider.get_order_status(f"p{i % 3}") for i in range(50))
+            )
+        finally:
+            await provider.aclose()
+
+        assert statuses[:3] == ["preparing", "ready", "preparing"]
+        assert poster.requests == 50
+        assert poster.connections <= 5
+
+
+@pytest.mark.asyncio
+class TestPollActiveOrders:
+    ORDERS = 200
+    CONCURRENCY = 20
+
+    async def test_fans_out_with_bounded_concurrency(
+        self, stub: tuple[StubPoster, str], published: list[tuple[str, str]]
+    ) -> None:
+        poster, url = stub
+        poster.statuses = {f"p{i}": "ready" for i in range(0, self.ORDERS, 10)}
+        orders = _orders(self.ORDERS)
+        session = FakeSession(orders)
+        provider = RealPosterProvider(url, "token", max_connections=self.CONCURRENCY)
+        stats = PollStats()
+        try:
+            updated = await poll_active_orders(
+                lambda: session,  # type: ignore[arg-type]
+                provider,
+                concurrency=self.CONCURRENCY,
+                stats=stats,
+            )
+        finally:
+            await provider.aclose()
+
+        assert updated == self.ORDERS // 10
+        assert session.commits == 1
+        assert sorted(published) == sorted(
+            (str(o.id), "ready") for o in orders if o.status == "ready"
+        )
+        assert poster.max_in_flight <= self.CONCURRENCY
+        assert poster.connections <= self.CONCURRENCY
+        assert stats.orders == self.ORDERS
+        assert stats.errors == 0
+        assert 50 <= stats.p50_ms <= stats.p95_ms <= stats.max_ms
+        # Sequential polling would take ORDERS * 50 ms = 10 s; fanned out ~0.5 s
+        assert stats.elapsed_ms < 3000
+
+    async def test_concurrency_defaults_to_settings(
+        self,
+        stub: tuple[StubPoster, str],
+        published: list[tuple[str, str]],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        monkeypatch.setattr(poster_poller.settings, "poster_poll_concurrency", 4)
+        poster, url = stub
+        orders = _orders(20)
+        provider = RealPosterProvider(url, "token")
+        try:
+            await poll_active_orders(lambda: FakeSession(orders), provider)  # type: ignore[arg-type]
+        finally:
+            await provider.aclose()
+
+        assert provider.max_connections == 4
+        assert poster.requests == 20
+        assert poster.max_in_flight <= 4
+        assert poster.connections <= 4
+
+    async def test_failed_requests_are_counted_and_skipped(
+        self, stub: tuple[StubPoster, str], published: list[tuple[str, str]]
+    ) -> None:
+        poster, url = stub
+        poster.statuses = {"p0": "ready", "p1": "ready"}
+        poster.failing = {"p1"}
+        orders = _orders(3)
+        provider = RealPosterProvider(url, "token")
+        stats = PollStats()
+        try:
+            updated = await poll_active_orders(
+                lambda: FakeSession(orders),  # type: ignore[arg-type]
+                provider,
+                stats=stats,
+            )
+        finally:
+            await provider.aclose()
+
+        assert updated == 1
+        assert [o.status for o in orders] == ["ready", "preparing", "preparing"]
+        assert stats.errors == 1
+        assert published == [(str(orders[0].id), "ready")]
@@ -0,0 +1,258 @@
+"""Order status relay tests."""
+
+import asyncio
+import fnmatch
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from app.realtime import redis_pubsub
+from app.realtime.redis_pubsub import (
+    ORDER_STATUS_PATTERN,
+    OrderStatusRelay,
+    order_channel,
+    order_status_history,
+    publish_order_status,
+)
+from app.realtime.sse_manager import SSEManager
+
+
+class FakePubSub:
+    def __init__(self, broker: "FakeRedis") -> None:
+        self._broker = broker
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def psubscribe(self, pattern: str) -> None:
+        if self._broker.fail_connects > 0:
+            self._broker.fail_connects -= 1
+            raise ConnectionError("connection refused")
+        self._broker.patterns.append((pattern, self._queue))
+
+    async def listen(self) -> AsyncIterator[dict[str, Any]]:
+        while True:
+            message = await self._queue.get()
+            if message["type"] == "error":
+                raise ConnectionError("connection lost")
+            yield message
+
+    async def aclose(self) -> None:
+        self._broker.patterns = [p for p in self._broker.patterns if p[1] is not self._queue]
+
+
+class FakeScript:
+    """Runs PUBLISH_SCRIPT's steps against FakeRedis."""
+
+    def __init__(self, broker: "FakeRedis") -> None:
+        self._broker = broker
+
+    async def __call__(self, keys: list[str], args: list[Any]) -> int:
+        counter, stream = keys
+        channel, data, maxlen, _ttl = args
+        event_id = self._broker.counters[counter] = self._broker.counters.get(counter, 0) + 1
+        history = self._broker.streams.setdefault(stream, [])
+        history.append((f"{event_id}-0", {"id": str(event_id), "data": data}))
+        del history[:-maxlen]
+        await self._broker.publish(channel, _envelope(event_id, json.loads(data)))
+        return event_id
+
+
+class FakeRedis:
+    """Pattern pub/sub and streams shared by several 'workers'."""
+
+    def __init__(self) -> None:
+        self.patterns: list[tuple[str, asyncio.Queue[dict[str, Any]]]] = []
+        self.pubsubs = 0
+        self.fail_connects = 0
+        self.counters: dict[str, int] = {}
+        self.streams: dict[str, list[tuple[str, dict[str, str]]]] = {}
+
+    def pubsub(self) -> FakePubSub:
+        self.pubsubs += 1
+        return FakePubSub(self)
+
+    def register_script(self, script: str) -> FakeScript:
+        return FakeScript(self)
+
+    async def xrange(self, key: str) -> list[tuple[str, dict[str, str]]]:
+        return list(self.streams.get(key, []))
+
+    async def publish(self, channel: str, data: str) -> int:
+        matches = [q for pattern, q in self.patterns if fnmatch.fnmatch(channel, pattern)]
+        for queue in matches:
+            queue.put_nowait(
+                {"type": "pmessage", "pattern": ORDER_STATUS_PATTERN, "channel": channel,
+                 "data": data}
+            )
+        return len(matches)
+
+    def drop_connections(self) -> None:
+        for _, queue in self.patterns:
+            queue.put_nowait({"type": "error"})
+
+
+def _envelope(event_id: int, data: dict[str, Any]) -> str:
+    return json.dumps({"id": event_id, "data": data})
+
+
+async def _settle() -> None:
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    fake = FakeRedis()
+
+    async def get_redis() -> FakeRedis:
+        return fake
+
+    monkeypatch.setattr(redis_pubsub, "get_redis", get_redis)
+    monkeypatch.setattr(redis_pubsub, "RELAY_RETRY_DELAY", 0.01)
+    return fake
+
+
+@pytest.mark.asyncio
+class TestOrderStatusRelay:
+    async def test_one_connection_serves_every_tracked_order(self, redis: FakeRedis) -> None:
+        manager = SSEManager()
+        relay = OrderStatusRelay(manager)
+        queues = {f"o{i}": manager.subscribe(order_channel(f"o{i}")) for i in range(10_000)}
+        await relay.start()
+        await _settle()
+
+        await publish_order_status("o42", "ready")
+        await publish_order_status("o9999", "delivering")
+        await _settle()
+        await relay.stop()
+
+        assert redis.pubsubs == 1
+        ready = json.loads(queues["o42"].get_nowait().data)
+        assert ready == {"order_id": "o42", "status": "ready"}
+        assert json.loads(queues["o9999"].get_nowait().data)["status"] == "delivering"
+        assert sum(q.qsize() for q in queues.values()) == 0
+        assert relay.stats.messages == 2
+
+    async def test_every_worker_hears_every_status(self, redis: FakeRedis) -> None:
+        workers = [SSEManager(), SSEManager()]
+        relays = [OrderStatusRelay(m) for m in workers]
+        queues = [m.subscribe(order_channel("o1")) for m in workers]
+        for relay in relays:
+            await relay.start()
+        await _settle()
+
+        await redis.publish("order_status:o1", _envelope(7, {"order_id": "o1", "status": "paid"}))
+        await _settle()
+        for relay in relays:
+            await relay.stop()
+
+        events = [q.get_nowait() for q in queues]
+        assert [e.id for e in events] == ["7", "7"]
+        assert [json.loads(e.data)["status"] for e in events] == ["paid", "paid"]
+
+    async def test_event_ids_come_from_the_publisher(self, redis: FakeRedis) -> None:
+        workers = [SSEManager(), SSEManager()]
+        relays = [OrderStatusRelay(m) for m in workers]
+        queues = [m.subscribe(order_channel("o1")) for m in workers]
+        workers[1].publish_nowait("order:other", {})  # a local id the other worker lacks
+        for relay in relays:
+            await relay.start()
+        await _settle()
+
+        await publish_order_status("o1", "paid")
+        await publish_order_status("o1", "ready")
+        await _settle()
+        for relay in relays:
+            await relay.stop()
+
+        assert [[q.get_nowait().id for _ in range(2)] for q in queues] == [["1", "2"], ["1", "2"]]
+
+    async def test_reconnects_with_backoff(self, redis: FakeRedis) -> None:
+        manager = SSEManager()
+        relay = OrderStatusRelay(manager)
+        queue = manager.subscribe(order_channel("o1"))
+        redis.fail_connects = 2
+        await relay.start()
+        await asyncio.sleep(0.1)  # 0.01 + 0.02 s of backoff
+        assert relay.stats.redis_connections == 1
+
+        redis.drop_connections()
+        await asyncio.sleep(0.05)
+        await publish_order_status("o1", "ready")
+        await _settle()
+
+        assert relay.stats.errors == 3
+        assert relay.stats.connects == 2
+        assert relay.stats.redis_connections == 1
+        assert json.loads(queue.get_nowait().data)["status"] == "ready"
+
+        await relay.stop()
+        assert relay.stats.redis_connections == 0
+        assert redis.patterns == []
+
+    async def test_malformed_messages_are_skipped(self, redis: FakeRedis) -> None:
+        manager = SSEManager()
+        relay = OrderStatusRelay(manager)
+        queue = manager.subscribe(order_channel("o1"))
+        await relay.start()
+        await _settle()
+
+        await redis.publish("order_status:o1", "not json")
+        await redis.publish("order_status:o1", json.dumps({"order_id": "o1"}))
+        await publish_order_status("o1", "ready")
+        await _settle()
+        await relay.stop()
+
+        assert relay.stats.connects == 1
+        assert json.loads(queue.get_nowait().data)["status"] == "ready"
+        assert queue.empty()
+
+
+@pytest.mark.asyncio
+class TestOrderStatusHistory:
+    async def test_returns_events_after_the_given_id(self, redis: FakeRedis) -> None:
+        for status in ("paid", "preparing", "ready"):
+            await publish_order_status("o1", status)
+        await publish_order_status("o2", "paid")
+
+        events = await order_status_history("o1", "1")
+
+        assert [e.id for e in events] == ["2", "3"]
+        assert [json.loads(e.data)["status"] for e in events] == ["preparing", "ready"]
+
+    async def test_history_is_bounded(
+        self, redis: FakeRedis, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(redis_pubsub.settings, "sse_replay_size", 2)
+        for status in ("paid", "preparing", "ready"):
+            await publish_order_status("o1", status)
+
+        assert [e.id for e in await order_status_history("o1", "")] == ["2", "3"]
+
+    async def test_minted_last_event_id_gets_the_whole_history(self, redis: FakeRedis) -> None:
+        for status in ("paid", "ready"):
+            await publish_order_status("o1", status)
+
+        events = await order_status_history("o1", "0123abcd-5")
+
+        assert [e.id for e in events] == ["1", "2"]
+
+
+@pytest.mark.asyncio
+class TestPublishWithoutRedis:
+    async def test_delivers_to_local_subscribers(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        async def no_redis() -> None:
+            return None
+
+        manager = SSEManager()
+        monkeypatch.setattr(redis_pubsub, "get_redis", no_redis)
+        monkeypatch.setattr(redis_pubsub, "sse_manager", manager)
+        queue = manager.subscribe(order_channel("o1"))
+
+        await publish_order_status("o1", "paid")
+
+        event = queue.get_nowait()
+        assert json.loads(event.data) == {"order_id": "o1", "status": "paid"}
+        assert event.id == f"{manager.epoch}-1"
+        assert await order_status_history("o1", "") == []
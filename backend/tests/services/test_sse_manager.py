@@ -2,10 +2,18 @@
 
 import asyncio
 import json
+import time
 
 import pytest
 
-from app.realtime.sse_manager import SSEManager
+from app.realtime.sse_manager import (
+    DISCONNECT_MESSAGE,
+    HEARTBEAT_MESSAGE,
+    HEARTBEAT_SLOTS,
+    SSEConnection,
+    SSEManager,
+)
+from benchmarks.sse_connections import measure_connections
 
 
 @pytest.mark.asyncio
@@ -16,7 +24,7 @@ class TestSSEManager:
         await mgr.publish("ch1", {"status": "paid"})
 
         msg = await asyncio.wait_for(queue.get(), timeout=1.0)
-        assert json.loads(msg) == {"status": "paid"}
+        assert json.loads(msg.data) == {"status": "paid"}
 
     async def test_multiple_subscribers(self) -> None:
         mgr = SSEManager()
@@ -26,8 +34,8 @@ class TestSSEManager:
 
         m1 = await asyncio.wait_for(q1.get(), timeout=1.0)
         m2 = await asyncio.wait_for(q2.get(), timeout=1.0)
-        assert json.loads(m1) == {"test": True}
-        assert json.loads(m2) == {"test": True}
+        assert json.loads(m1.data) == {"test": True}
+        assert json.loads(m2.data) == {"test": True}
 
     async def test_unsubscribe(self) -> None:
         mgr = SSEManager()
@@ -43,7 +51,7 @@ class TestSSEManager:
         await mgr.publish("ch1", {"msg": "for ch1"})
 
         m1 = await asyncio.wait_for(q1.get(), timeout=1.0)
-        assert json.loads(m1) == {"msg": "for ch1"}
+        assert json.loads(m1.data) == {"msg": "for ch1"}
         assert q2.empty()
 
     async def test_connection_count(self) -> None:
@@ -57,3 +65,337 @@ class TestSSEManager:
         assert mgr.connection_count("ch1") == 1
         mgr.unsubscribe("ch1", q2)
         assert mgr.connection_count("ch1") == 0
+
+
+@pytest.mark.asyncio
+class TestOverflowPolicies:
+    async def test_queues_are_bounded(self) -> None:
+        mgr = SSEManager(queue_size=3, overflow="drop_oldest")
+        queue = mgr.subscribe("ch1")
+        for i in range(10):
+            await mgr.publish("ch1", {"n": i})
+
+        assert queue.qsize() == 3
+        assert [json.loads(queue.get_nowait().data)["n"] for _ in range(3)] == [7, 8, 9]
+        assert mgr.stats().dropped == 7
+
+    async def test_coalesce_keeps_only_the_latest(self) -> None:
+        mgr = SSEManager(queue_size=2, overflow="coalesce")
+        queue = mgr.subscribe("ch1")
+        for status in ("paid", "preparing", "ready"):
+            await mgr.publish("ch1", {"status": status})
+
+        assert queue.qsize() == 1
+        assert json.loads(queue.get_nowait().data) == {"status": "ready"}
+
+    async def test_disconnect_drops_only_the_slow_subscriber(self) -> None:
+        mgr = SSEManager(queue_size=1, overflow="disconnect")
+        slow = mgr.subscribe("ch1")
+        fast = mgr.subscribe("ch1")
+        await mgr.publish("ch1", {"n": 1})
+        fast.get_nowait()
+        await mgr.publish("ch1", {"n": 2})
+
+        assert slow.closed
+        assert slow.get_nowait() == DISCONNECT_MESSAGE
+        assert not fast.closed
+        assert json.loads(fast.get_nowait().data) == {"n": 2}
+        assert mgr.connection_count("ch1") == 1
+        assert mgr.stats().disconnected == 1
+
+    async def test_stats_report_queue_depths(self) -> None:
+        mgr = SSEManager(queue_size=8)
+        mgr.subscribe("ch1")
+        mgr.subscribe("ch1")
+        mgr.subscribe("ch2")
+        for _ in range(3):
+            await mgr.publish("ch1", {})
+        await mgr.publish("ch3", {})
+
+        stats = mgr.stats()
+        assert stats.connections == 3
+        assert stats.channels == 2
+        assert stats.published == 4
+        assert stats.delivered == 6
+        assert stats.queued == 6
+        assert stats.max_queue_depth == 3
+
+
+@pytest.mark.asyncio
+class TestMultiplexedConnections:
+    async def test_one_connection_hears_every_channel(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe_many(["order:a", "order:b"])
+        await mgr.publish("order:a", {"order_id": "a"})
+        await mgr.publish("order:c", {"order_id": "c"})
+        await mgr.publish("order:b", {"order_id": "b"})
+
+        received = [json.loads(connection.get_nowait().data)["order_id"] for _ in range(2)]
+        assert received == ["a", "b"]
+        assert connection.empty()
+        assert mgr.stats().connections == 1
+
+    async def test_unsubscribe_all_leaves_every_channel(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe_many(["order:a", "order:b"])
+        mgr.unsubscribe_all(connection)
+
+        assert mgr.connection_count("order:a") == 0
+        assert mgr.connection_count("order:b") == 0
+        assert sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS)) == 0
+
+    async def test_coalesce_keeps_the_latest_event_of_each_channel(self) -> None:
+        mgr = SSEManager(queue_size=2, overflow="coalesce")
+        connection = mgr.subscribe_many(["order:a", "order:b"])
+        await mgr.publish("order:a", {"status": "paid"})
+        await mgr.publish("order:b", {"status": "paid"})
+        await mgr.publish("order:a", {"status": "ready"})
+
+        events = [connection.get_nowait() for _ in range(connection.qsize())]
+        assert [(e.channel, json.loads(e.data)["status"]) for e in events] == [
+            ("order:b", "paid"),
+            ("order:a", "ready"),
+        ]
+
+    async def test_disconnect_leaves_every_channel(self) -> None:
+        mgr = SSEManager(queue_size=1, overflow="disconnect")
+        connection = mgr.subscribe_many(["order:a", "order:b"])
+        await mgr.publish("order:a", {})
+        await mgr.publish("order:b", {})
+
+        assert connection.closed
+        assert mgr.stats().connections == 0
+
+
+@pytest.mark.asyncio
+class TestHeartbeats:
+    async def test_idle_connection_is_pinged_once_per_rotation(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+
+        for _ in range(HEARTBEAT_SLOTS - 1):
+            mgr.tick()
+        assert connection.empty()
+        mgr.tick()
+
+        assert connection.get_nowait() == HEARTBEAT_MESSAGE
+        assert mgr.stats().heartbeats == 1
+
+    async def test_connection_active_since_the_last_tick_is_not_pinged(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        for _ in range(HEARTBEAT_SLOTS - 1):
+            mgr.tick()
+        await mgr.publish("ch1", {"status": "paid"})
+        connection.get_nowait()
+
+        assert mgr.tick() == 0
+        assert connection.empty()
+
+    async def test_connection_active_earlier_in_the_interval_is_pinged(self) -> None:
+        # Skipping it here would leave it silent until the next visit, ~2 intervals
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        mgr.tick()
+        await mgr.publish("ch1", {"status": "paid"})
+        connection.get_nowait()
+
+        pings = sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS - 1))
+
+        assert pings == 1
+        assert connection.get_nowait() == HEARTBEAT_MESSAGE
+
+    async def test_busy_connection_is_never_pinged(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        for _ in range(3 * HEARTBEAT_SLOTS):
+            await mgr.publish("ch1", {"status": "paid"})
+            connection.get_nowait()
+            assert mgr.tick() == 0
+
+    async def test_pings_are_not_stacked_on_an_unread_connection(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        for _ in range(3 * HEARTBEAT_SLOTS):
+            mgr.tick()
+
+        assert connection.qsize() == 1
+
+    async def test_unsubscribed_connection_leaves_the_wheel(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        mgr.unsubscribe("ch1", connection)
+
+        assert sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS)) == 0
+
+    async def test_connection_keeps_heartbeats_until_its_last_channel_leaves(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe_many(["ch1", "ch2"])
+
+        mgr.unsubscribe("ch1", connection)
+        assert sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS)) == 1
+        connection.get_nowait()
+
+        mgr.unsubscribe("ch2", connection)
+        assert sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS)) == 0
+
+    async def test_channelless_connection_leaves_the_wheel(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe_many([])
+
+        mgr.unsubscribe_all(connection)
+
+        assert not any(mgr._wheel)
+        assert sum(mgr.tick() for _ in range(HEARTBEAT_SLOTS)) == 0
+
+    async def test_ticker_wakes_a_waiting_reader(self) -> None:
+        mgr = SSEManager(heartbeat_s=0.03)
+        connection = mgr.subscribe("ch1")
+        await mgr.start()
+        try:
+            message = await asyncio.wait_for(connection.get(), timeout=1.0)
+        finally:
+            await mgr.stop()
+
+        assert message == HEARTBEAT_MESSAGE
+
+
+@pytest.mark.asyncio
+class TestReplay:
+    async def test_events_get_minted_ids(self) -> None:
+        mgr = SSEManager()
+        connection = mgr.subscribe("ch1")
+        ids = [await mgr.publish(channel, {}) for channel in ("ch1", "ch2", "ch1")]
+
+        assert ids == [f"{mgr.epoch}-1", f"{mgr.epoch}-2", f"{mgr.epoch}-3"]
+        assert [connection.get_nowait().id for _ in range(2)] == [ids[0], ids[2]]
+
+    async def test_minted_ids_differ_per_process(self) -> None:
+        assert await SSEManager().publish("ch1", {}) != await SSEManager().publish("ch1", {})
+
+    async def test_publisher_ids_are_kept(self) -> None:
+        mgr = SSEManager()
+        assert await mgr.publish("ch1", {}, event_id="10") == "10"
+        assert await mgr.publish("ch1", {}) == f"{mgr.epoch}-1"
+
+    async def test_replays_events_after_the_last_seen_id(self) -> None:
+        mgr = SSEManager()
+        ids = [
+            await mgr.publish("ch1", {"status": status})
+            for status in ("paid", "preparing", "ready")
+        ]
+
+        missed = mgr.replay("ch1", ids[0])
+
+        assert missed is not None
+        assert [json.loads(e.data)["status"] for e in missed] == ["preparing", "ready"]
+        assert mgr.replay("ch1", ids[2]) == []
+        assert mgr.stats().replayed == 2
+
+    async def test_unknown_shared_id_filters_by_number(self) -> None:
+        mgr = SSEManager()
+        for event_id in ("4", "7", "9"):
+            await mgr.publish("ch1", {}, event_id=event_id)
+
+        missed = mgr.replay("ch1", "5")  # an id from another order's stream
+
+        assert [e.id for e in missed or []] == ["7", "9"]
+
+    async def test_fallback_events_after_a_shared_id_are_replayed(self) -> None:
+        # Redis failed after id 7: the worker minted the next ids itself
+        mgr = SSEManager()
+        await mgr.publish("ch1", {"status": "paid"}, event_id="7")
+        await mgr.publish("ch1", {"status": "ready"})
+
+        missed = mgr.replay("ch1", "7")
+
+        assert [json.loads(e.data)["status"] for e in missed or []] == ["ready"]
+
+    async def test_unknown_minted_id_replays_everything(self) -> None:
+        # Minted by another process, or evicted: it says nothing about what was seen
+        mgr = SSEManager()
+        await mgr.publish("ch1", {}, event_id="7")
+        await mgr.publish("ch1", {})
+
+        assert len(mgr.replay("ch1", "0123abcd-99") or []) == 2
+
+    async def test_history_is_bounded_per_channel(self) -> None:
+        mgr = SSEManager(replay_size=3)
+        for i in range(10):
+            await mgr.publish("ch1", {"n": i})
+
+        missed = mgr.replay("ch1", "")
+
+        assert missed is not None
+        assert [json.loads(e.data)["n"] for e in missed] == [7, 8, 9]
+
+    async def test_least_recently_published_channels_are_forgotten(self) -> None:
+        mgr = SSEManager(replay_channels=2)
+        await mgr.publish("ch1", {})
+        await mgr.publish("ch2", {})
+        await mgr.publish("ch1", {})
+        await mgr.publish("ch3", {})
+
+        assert mgr.replay("ch2", "") is None
+        assert mgr.replay("ch1", "") is not None
+        assert mgr.stats().history_channels == 2
+
+    async def test_replay_can_be_disabled(self) -> None:
+        mgr = SSEManager(replay_size=0)
+        await mgr.publish("ch1", {})
+
+        assert mgr.replay("ch1", "") is None
+
+
+@pytest.mark.asyncio
+class TestConnectionBenchmark:
+    async def test_wheel_connections_are_leaner_than_queue_timers(self) -> None:
+        wheel = await measure_connections("wheel", 500, heartbeat_s=0.1, idle_s=0.3)
+        legacy = await measure_connections("legacy", 500, heartbeat_s=0.1, idle_s=0.3)
+
+        assert wheel.pings >= 500
+        assert wheel.bytes_per_connection < legacy.bytes_per_connection
+
+
+@pytest.mark.asyncio
+class TestFanOutLoad:
+    SUBSCRIBERS = 20_000
+    MESSAGES = 20
+
+    async def test_stalled_subscribers_do_not_slow_or_grow_fan_out(self) -> None:
+        mgr = SSEManager(queue_size=4, overflow="coalesce")
+        received = [0] * (self.SUBSCRIBERS // 2)
+
+        async def reader(index: int, queue: SSEConnection) -> None:
+            while True:
+                json.loads((await queue.get()).data)
+                received[index] += 1
+
+        # Half the subscribers read, the other half are stalled tabs that never do
+        readers = [
+            asyncio.create_task(reader(i, mgr.subscribe("orders")))
+            for i in range(self.SUBSCRIBERS // 2)
+        ]
+        for _ in range(self.SUBSCRIBERS // 2):
+            mgr.subscribe("orders")
+        await asyncio.sleep(0)
+
+        slowest_publish = 0.0
+        for i in range(self.MESSAGES):
+            start = time.perf_counter()
+            await mgr.publish("orders", {"order_id": "o1", "status": f"s{i}"})
+            slowest_publish = max(slowest_publish, time.perf_counter() - start)
+            await asyncio.sleep(0)  # let readers drain
+        await asyncio.sleep(0)
+
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+
+        stats = mgr.stats()
+        assert stats.connections == self.SUBSCRIBERS
+        assert stats.max_queue_depth <= 4
+        assert stats.queued <= self.SUBSCRIBERS // 2 * 4
+        assert set(received) == {self.MESSAGES}
+        # ~50 ms here; the publisher never waits on a subscriber
+        assert slowest_publish < 1.0
@@ -1,4 +1,4 @@
-"""Tests for admin routes — stats, orders list, users list."""
+"""Tests for admin routes — stats, orders list, users list, plan cache stats."""
 
 import pytest
 from httpx import AsyncClient
@@ -111,3 +111,44 @@ class TestAdminUsers:
         users = resp.json()
         assert len(users) >= 1
         assert users[0]["email"] == "admin-u@test.com"
+
+
+@pytest.mark.asyncio
+class TestAdminPlanCache:
+    async def test_admin_gets_plan_cache_stats(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
+        admin = await create_test_user(
+            db_session, google_id="admin-1", email="admin@test.com", is_admin=True
+        )
+        resp = await client.get(
+            "/api/v1/admin/plan-cache", headers=make_auth_header(admin.id)
+        )
+        assert resp.status_code == 200
+        assert {"hits", "misses", "size", "max_entries"} <= resp.json().keys()
+
+    async def test_non_admin_forbidden(self, client: AsyncClient, db_session: AsyncSession):
+        user = await create_test_user(db_session)
+        resp = await client.get(
+            "/api/v1/admin/plan-cache", headers=make_auth_header(user.id)
+        )
+        assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+class TestAdminSSE:
+    async def test_admin_gets_sse_stats(self, client: AsyncClient, db_session: AsyncSession):
+        admin = await create_test_user(
+            db_session, google_id="admin-1", email="admin@test.com", is_admin=True
+        )
+        resp = await client.get("/api/v1/admin/sse", headers=make_auth_header(admin.id))
+        assert resp.status_code == 200
+        data = resp.json()
+        assert {"connections", "queued", "max_queue_depth", "dropped"} <= data.keys()
+        assert data["overflow_policy"] in {"drop_oldest", "coalesce", "disconnect"}
+        assert data["redis_connections"] in (0, 1)
+
+    async def test_non_admin_forbidden(self, client: AsyncClient, db_session: AsyncSession):
+        user = await create_test_user(db_session)
+        resp = await client.get("/api/v1/admin/sse", headers=make_auth_header(user.id))
+        assert resp.status_code == 403
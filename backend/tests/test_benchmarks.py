@@ -0,0 +1,87 @@
+"""Engine benchmark suite tests."""
+
+import json
+from pathlib import Path
+
+from benchmarks.engine_suite import (
+    CASES,
+    find_regressions,
+    main,
+    run_suite,
+    to_report,
+)
+
+
+def _report(ref_p50_ms: float | None = None, **p50_by_key: float) -> dict:
+    results = []
+    for key, p50 in p50_by_key.items():
+        case, size = key.rsplit("_at_", 1)
+        result = {"case": case, "size": int(size), "p50_ms": p50}
+        if ref_p50_ms is not None:
+            result["ref_p50_ms"] = ref_p50_ms
+        results.append(result)
+    return {"meta": {}, "results": results}
+
+
+class TestRunSuite:
+    def test_every_case_is_timed_at_every_size(self) -> None:
+        results = run_suite([100, 200], repeat=3, rounds=2)
+
+        assert {(r.case, r.size) for r in results} == {
+            (case.name, size) for case in CASES for size in (100, 200)
+        }
+        for r in results:
+            assert 0 < r.min_ms <= r.p50_ms <= r.p90_ms <= r.p99_ms <= r.max_ms
+            assert r.runs == 3
+            assert r.ref_p50_ms > 0
+
+    def test_report_is_json(self) -> None:
+        report = to_report(run_suite([100], repeat=1, cases=CASES[:1]))
+        decoded = json.loads(json.dumps(report))
+        assert decoded["results"][0]["case"] == "catalog_build"
+        assert "python" in decoded["meta"]
+
+
+class TestFindRegressions:
+    def test_flags_slowdowns_beyond_threshold(self) -> None:
+        baseline = _report(daily_plan_at_1000=10.0, match_meals_at_1000=10.0)
+        current = _report(daily_plan_at_1000=13.0, match_meals_at_1000=11.0)
+
+        regressions = find_regressions(current, baseline, threshold=20)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("daily_plan@1000")
+
+    def test_speedups_and_missing_cases_pass(self) -> None:
+        baseline = _report(daily_plan_at_1000=10.0)
+        current = _report(daily_plan_at_1000=5.0, daily_plan_at_100000=500.0)
+        assert find_regressions(current, baseline, threshold=20) == []
+
+    def test_slowdowns_shared_with_the_reference_pass(self) -> None:
+        baseline = _report(ref_p50_ms=1.0, daily_plan_at_1000=10.0)
+        busy = _report(ref_p50_ms=2.0, daily_plan_at_1000=19.0)
+        assert find_regressions(busy, baseline, threshold=20) == []
+
+        regressed = _report(ref_p50_ms=1.0, daily_plan_at_1000=19.0)
+        assert len(find_regressions(regressed, baseline, threshold=20)) == 1
+
+    def test_sub_noise_floor_cases_pass(self) -> None:
+        baseline = _report(match_meals_at_100=0.1)
+        current = _report(match_meals_at_100=0.3)
+        assert find_regressions(current, baseline, threshold=20) == []
+
+
+class TestCompareCommand:
+    def test_exit_status_reflects_regressions(self, tmp_path: Path) -> None:
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps(_report(daily_plan_at_1000=10.0)))
+        fast = tmp_path / "fast.json"
+        fast.write_text(json.dumps(_report(daily_plan_at_1000=11.0)))
+        slow = tmp_path / "slow.json"
+        slow.write_text(json.dumps(_report(daily_plan_at_1000=20.0)))
+
+        assert main(["compare", str(fast), "--baseline", str(baseline)]) == 0
+        assert main(["compare", str(slow), "--baseline", str(baseline)]) == 1
+        assert main(
+            ["compare", str(fast), "--baseline", str(baseline), "--threshold", "5"]
+        ) == 1
@@ -3,9 +3,17 @@
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings as app_config
 from app.models.meal import Meal
 from app.models.settings import AppSettings
-from app.services.pricing_service import calculate_item_price, get_settings
+from app.schemas.settings import SettingsUpdate
+from app.services import pricing_service
+from app.services.pricing_service import (
+    calculate_item_price,
+    get_settings,
+    price_items_bulk,
+    update_settings,
+)
 
 
 async def _seed_meal(db: AsyncSession, **overrides: object) -> Meal:
@@ -167,3 +175,62 @@ class TestCalculateItemPrice:
         # max(0, 10)*3 + max(0, -15)*1 + max(0, 5)*1.5 = 30 + 0 + 7.5 = 37.5
         price = await calculate_item_price(db_session, meal, 10, -15, 5)
         assert price == 237.5
+
+
+@pytest.mark.asyncio
+class TestPriceItemsBulk:
+    async def test_matches_per_item_prices(
+        self, db_session: AsyncSession
+    ) -> None:
+        await _seed_settings(db_session, protein=3.0, carbs=1.0, fat=1.5)
+        plain = await _seed_meal(db_session, price=200.0)
+        override = await _seed_meal(
+            db_session, price=150.0, protein_price_per_gram=5.0
+        )
+        meals = [plain, override, plain]
+        extras = [(10.0, 0.0, 0.0), (10.0, 10.0, -5.0), (0.0, 0.0, 0.0)]
+
+        prices = await price_items_bulk(db_session, meals, extras)
+
+        assert prices == [
+            await calculate_item_price(db_session, m, *e)
+            for m, e in zip(meals, extras, strict=True)
+        ]
+        assert prices == [230.0, 210.0, 200.0]
+
+    async def test_loads_settings_once(
+        self, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(app_config, "pricing_settings_ttl_s", 0)
+        await _seed_settings(db_session)
+        meal = await _seed_meal(db_session)
+        loads = 0
+        original = pricing_service.get_settings
+
+        async def counting_get_settings(db: AsyncSession) -> AppSettings:
+            nonlocal loads
+            loads += 1
+            return await original(db)
+
+        monkeypatch.setattr(pricing_service, "get_settings", counting_get_settings)
+        await price_items_bulk(db_session, [meal] * 120, [(5.0, 5.0, 5.0)] * 120)
+
+        assert loads == 1
+
+    async def test_rejects_mismatched_lengths(
+        self, db_session: AsyncSession
+    ) -> None:
+        meal = await _seed_meal(db_session)
+        with pytest.raises(ValueError):
+            await price_items_bulk(db_session, [meal, meal], [(0.0, 0.0, 0.0)])
+
+    async def test_update_settings_invalidates_cached_rates(
+        self, db_session: AsyncSession
+    ) -> None:
+        await _seed_settings(db_session, protein=3.0)
+        meal = await _seed_meal(db_session, price=200.0)
+        assert await calculate_item_price(db_session, meal, 10, 0, 0) == 230.0
+
+        await update_settings(db_session, SettingsUpdate(protein_price_per_gram=4.0))
+
+        assert await calculate_item_price(db_session, meal, 10, 0, 0) == 240.0
@@ -1,9 +1,16 @@
 """Tests for rate limiting middleware."""
 
+import uuid
+
 import pytest
+from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
+from redis.exceptions import ConnectionError as RedisConnectionError
 
+from app import rate_limit
 from app.middleware import RateLimitMiddleware
+from app.rate_limit import TOKEN_BUCKET_SCRIPT, InMemoryRateLimiter, RedisRateLimiter
+from tests.conftest import make_auth_header
 
 
 @pytest.mark.asyncio
@@ -64,3 +71,211 @@ class TestRateLimit:
             # Should still have full budget for /test
             resp = await client.get("/test")
             assert resp.status_code == 200
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+class TestInMemoryRateLimiter:
+    async def test_spends_costs_and_refills(self) -> None:
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(10, window_s=60, clock=clock)
+
+        assert (await limiter.hit("a", cost=5)).allowed
+        assert (await limiter.hit("a", cost=5)).allowed
+        rejected = await limiter.hit("a")
+        assert not rejected.allowed
+        assert rejected.retry_after_s == pytest.approx(6.0)
+
+        clock.now = 6.0  # one token back
+        assert (await limiter.hit("a")).allowed
+        assert not (await limiter.hit("a")).allowed
+
+    async def test_keys_have_separate_buckets(self) -> None:
+        limiter = InMemoryRateLimiter(1, clock=FakeClock())
+        assert (await limiter.hit("a")).allowed
+        assert not (await limiter.hit("a")).allowed
+        assert (await limiter.hit("b")).allowed
+
+    async def test_idle_buckets_are_evicted(self) -> None:
+        clock = FakeClock()
+        limiter = InMemoryRateLimiter(10, window_s=60, clock=clock)
+        for i in range(1000):
+            await limiter.hit(f"ip-{i}")
+        assert limiter.tracked_keys == 1000
+
+        clock.now = 30.0
+        await limiter.hit("ip-0")
+        clock.now = 61.0
+        await limiter.hit("fresh")
+
+        # Only the bucket hit within the last window survives, next to the new one
+        assert limiter.tracked_keys == 2
+        assert (await limiter.hit("ip-1")).remaining == 9
+
+
+class FakeScript:
+    """Evaluates TOKEN_BUCKET_SCRIPT's logic against FakeRedis's hashes."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self._redis = redis
+
+    async def __call__(self, keys: list[str], args: list[float]) -> list[object]:
+        if self._redis.down:
+            raise RedisConnectionError("connection refused")
+        limit, rate, cost, _ttl_ms = args
+        now = self._redis.now_ms
+        state = self._redis.hashes.get(keys[0])
+        tokens = limit if state is None else min(limit, state[0] + (now - state[1]) * rate)
+        allowed = 0
+        if tokens >= cost:
+            tokens -= cost
+            allowed = 1
+        self._redis.hashes[keys[0]] = (tokens, now)
+        return [allowed, str(tokens)]
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, tuple[float, float]] = {}
+        self.now_ms = 0.0
+        self.down = False
+        self.scripts: list[str] = []
+
+    def register_script(self, script: str) -> FakeScript:
+        self.scripts.append(script)
+        return FakeScript(self)
+
+
+@pytest.mark.asyncio
+class TestRedisRateLimiter:
+    async def test_workers_share_buckets(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        redis = FakeRedis()
+
+        async def get_redis() -> FakeRedis:
+            return redis
+
+        monkeypatch.setattr(rate_limit, "get_redis", get_redis)
+        worker_a = RedisRateLimiter(10)
+        worker_b = RedisRateLimiter(10)
+
+        assert (await worker_a.hit("user:1", cost=6)).allowed
+        rejected = await worker_b.hit("user:1", cost=6)
+        assert not rejected.allowed
+        assert rejected.remaining == 4
+        assert rejected.retry_after_s == pytest.approx(12.0)
+        assert set(redis.hashes) == {rate_limit.KEY_PREFIX + "user:1"}
+        assert redis.scripts == [TOKEN_BUCKET_SCRIPT, TOKEN_BUCKET_SCRIPT]
+
+        redis.now_ms = 12_000
+        assert (await worker_b.hit("user:1", cost=6)).allowed
+
+    async def test_falls_back_to_memory_when_redis_fails(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        redis = FakeRedis()
+        redis.down = True
+
+        async def get_redis() -> FakeRedis:
+            return redis
+
+        monkeypatch.setattr(rate_limit, "get_redis", get_redis)
+        limiter = RedisRateLimiter(2)
+
+        assert (await limiter.hit("ip:1")).allowed
+        assert (await limiter.hit("ip:1")).allowed
+        assert not (await limiter.hit("ip:1")).allowed
+
+        redis.down = False
+        assert (await limiter.hit("ip:1")).allowed
+
+    async def test_without_redis_url_uses_memory(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        async def get_redis() -> None:
+            return None
+
+        monkeypatch.setattr(rate_limit, "get_redis", get_redis)
+        limiter = RedisRateLimiter(1)
+        assert (await limiter.hit("ip:1")).allowed
+        assert not (await limiter.hit("ip:1")).allowed
+
+    async def test_script_registered_once_per_client(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        first, second = FakeRedis(), FakeRedis()
+        current = first
+
+        async def get_redis() -> FakeRedis:
+            return current
+
+        monkeypatch.setattr(rate_limit, "get_redis", get_redis)
+        limiter = RedisRateLimiter(10)
+
+        await limiter.hit("ip:1")
+        await limiter.hit("ip:1")
+        current = second  # close_redis() then a fresh client
+        await limiter.hit("ip:1")
+
+        assert first.scripts == [TOKEN_BUCKET_SCRIPT]
+        assert second.scripts == [TOKEN_BUCKET_SCRIPT]
+
+
+def _app(**middleware_kwargs: object) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/meals")
+    async def meals() -> dict:
+        return {"ok": True}
+
+    @app.post("/api/v1/matching/plan")
+    async def plan() -> dict:
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, **middleware_kwargs)
+    return app
+
+
+@pytest.mark.asyncio
+class TestRateLimitCosts:
+    async def test_expensive_routes_spend_more(self) -> None:
+        app = _app(requests_per_minute=10, route_costs={"/api/v1/matching/": 5})
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.post("/api/v1/matching/plan")).status_code == 200
+            assert (await client.post("/api/v1/matching/plan")).status_code == 200
+            resp = await client.post("/api/v1/matching/plan")
+            assert resp.status_code == 429
+            assert int(resp.headers["retry-after"]) >= 1
+            assert (await client.get("/api/v1/meals")).status_code == 429
+
+    async def test_users_get_their_own_budget(self) -> None:
+        app = _app(requests_per_minute=1)
+        transport = ASGITransport(app=app)
+        first = make_auth_header(uuid.uuid4())
+        second = make_auth_header(uuid.uuid4())
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/api/v1/meals", headers=first)).status_code == 200
+            assert (await client.get("/api/v1/meals", headers=first)).status_code == 429
+            assert (await client.get("/api/v1/meals", headers=second)).status_code == 200
+            # A forged token counts against the client IP, not the user it names
+            forged = {"Authorization": "Bearer not-a-jwt"}
+            assert (await client.get("/api/v1/meals", headers=forged)).status_code == 200
+            assert (await client.get("/api/v1/meals", headers=forged)).status_code == 429
+
+    async def test_unpayable_route_costs_are_rejected(self) -> None:
+        with pytest.raises(ValueError, match="between 1 and the bucket size 10"):
+            RateLimitMiddleware(
+                _app(), requests_per_minute=10, route_costs={"/api/v1/matching/": 11}
+            )
+        with pytest.raises(ValueError):
+            RateLimitMiddleware(
+                _app(), limiter=InMemoryRateLimiter(10), route_costs={"/api/v1/meals": 0}
+            )
+        RateLimitMiddleware(
+            _app(), requests_per_minute=10, route_costs={"/api/v1/matching/": 10}
+        )
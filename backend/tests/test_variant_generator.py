@@ -1,11 +1,17 @@
 """Tests for the variant generator engine module."""
 
+import itertools
+
+import pytest
+
 from app.engine.constants import DEFAULT_SLOT_PERCENTAGES
 from app.engine.types import (
     Meal,
     MacroTargets,
     NutritionalInfo,
+    PlanConstraints,
     PlanRequest,
+    VariantDiversity,
 )
 from app.engine.variant_generator import generate_plan_variants
 
@@ -114,3 +120,108 @@ class TestGeneratePlanVariants:
             slots = {item.slot for item in variant.items}
             assert slots == {"breakfast", "lunch", "dinner", "snack"}
             assert variant.total_score > 0
+
+
+def _graded_meals(per_slot: int) -> list[Meal]:
+    """Meals whose calories spread around each slot's share of the daily target."""
+    return [
+        _make_meal(f"{slot[0]}{i}", f"{slot} {i}", slot, calories=300 + 45 * i)
+        for slot in ("breakfast", "lunch", "dinner", "snack")
+        for i in range(per_slot)
+    ]
+
+
+class TestVariantDiversity:
+    def test_default_matches_repeated_exclusion(self) -> None:
+        """Default diversity keeps the disjoint variants of the exclusion loop."""
+        meals = _graded_meals(5)
+        variants = generate_plan_variants(meals, _make_request(), count=5)
+        meal_sets = [{item.meal.id for item in v.items} for v in variants]
+
+        assert len(variants) == 5
+        for a, b in itertools.combinations(meal_sets, 2):
+            assert a.isdisjoint(b)
+
+    def test_min_one_differing_slot_is_k_best(self) -> None:
+        """min_differing_slots=1 enumerates the k best distinct plans in order."""
+        meals = _graded_meals(4)
+        everything = generate_plan_variants(
+            meals, _make_request(), count=4**4, diversity=VariantDiversity(1)
+        )
+        top = generate_plan_variants(
+            meals, _make_request(), count=10, diversity=VariantDiversity(1)
+        )
+
+        assert len(everything) == 4**4
+        plans = [tuple(item.meal.id for item in v.items) for v in everything]
+        assert len(set(plans)) == len(plans)
+        scores = [v.total_score for v in everything]
+        assert scores == sorted(scores, reverse=True)
+        assert [v.items for v in top] == [v.items for v in everything[:10]]
+
+    @pytest.mark.parametrize("min_differing", [2, 3, 4])
+    def test_pairs_differ_in_enough_slots(self, min_differing: int) -> None:
+        meals = _graded_meals(6)
+        variants = generate_plan_variants(
+            meals, _make_request(), count=5, diversity=VariantDiversity(min_differing)
+        )
+
+        assert len(variants) == 5
+        for a, b in itertools.combinations(variants, 2):
+            differing = sum(x.meal.id != y.meal.id for x, y in zip(a.items, b.items))
+            assert differing >= min_differing
+
+    def test_each_variant_is_best_remaining(self) -> None:
+        """Every variant beats all plans that satisfy the rule against earlier ones."""
+        meals = _graded_meals(4)
+        variants = generate_plan_variants(
+            meals, _make_request(), count=4, diversity=VariantDiversity(2)
+        )
+        everything = generate_plan_variants(
+            meals, _make_request(), count=4**4, diversity=VariantDiversity(1)
+        )
+
+        chosen: list[tuple[str, ...]] = []
+        for variant in variants:
+            plan = tuple(item.meal.id for item in variant.items)
+            for other in everything:
+                other_plan = tuple(item.meal.id for item in other.items)
+                if all(sum(x != y for x, y in zip(other_plan, c)) >= 2 for c in chosen):
+                    assert other_plan == plan
+                    break
+            chosen.append(plan)
+
+    def test_stops_when_rule_cannot_be_met(self) -> None:
+        meals = _graded_meals(2)
+        variants = generate_plan_variants(
+            meals, _make_request(), count=5, diversity=VariantDiversity(4)
+        )
+        assert len(variants) == 2
+
+    def test_rejects_out_of_range_min_differing(self) -> None:
+        with pytest.raises(ValueError, match="between 1"):
+            generate_plan_variants(
+                _graded_meals(2), _make_request(), diversity=VariantDiversity(5)
+            )
+
+    def test_rejects_min_differing_with_constraints(self) -> None:
+        request = PlanRequest(
+            daily_targets=MacroTargets(calories=2000, protein=150, carbs=200, fat=65),
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            constraints=PlanConstraints(max_calories=2500),
+        )
+        with pytest.raises(ValueError, match="per_slot"):
+            generate_plan_variants(_graded_meals(2), request, diversity=VariantDiversity(1))
+
+    def test_constrained_requests_keep_disjoint_variants(self) -> None:
+        request = PlanRequest(
+            daily_targets=MacroTargets(calories=2000, protein=150, carbs=200, fat=65),
+            slots=DEFAULT_SLOT_PERCENTAGES,
+            constraints=PlanConstraints(max_calories=2500),
+        )
+        variants = generate_plan_variants(_graded_meals(4), request, count=3)
+        meal_sets = [{item.meal.id for item in v.items} for v in variants]
+
+        assert len(variants) == 3
+        for a, b in itertools.combinations(meal_sets, 2):
+            assert a.isdisjoint(b)